@@ -122,6 +122,21 @@ if %ERRORLEVEL% NEQ 0 (
     exit /b 1
 )
 
+REM Apply database migrations (the function refuses requests until the schema is current)
+echo Applying database migrations...
+if "%FUNCTION_NAME%"=="" set FUNCTION_NAME=coo-api-handler-demo
+aws lambda invoke --function-name %FUNCTION_NAME% --cli-binary-format raw-in-base64-out --payload "{\"action\": \"migrate\"}" migrate-output.json > nul
+type migrate-output.json
+echo.
+findstr /C:"errorMessage" migrate-output.json > nul
+if %ERRORLEVEL% EQU 0 (
+    echo [ERROR] Database migration failed
+    cd ..
+    pause
+    exit /b 1
+)
+echo [OK] Database schema is current
+
 echo.
 echo ============================================
 echo [SUCCESS] Deployment Complete!
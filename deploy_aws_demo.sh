@@ -99,6 +99,23 @@ fi
 
 terraform apply -input=false tfplan
 
+# Apply database migrations (the function refuses requests until the schema is current)
+echo "Applying database migrations..."
+FUNCTION_NAME=${FUNCTION_NAME:-coo-api-handler-demo}
+aws lambda invoke \
+    --function-name "$FUNCTION_NAME" \
+    --cli-binary-format raw-in-base64-out \
+    --payload '{"action": "migrate"}' \
+    migrate-output.json > /dev/null
+cat migrate-output.json
+echo
+if grep -q "errorMessage" migrate-output.json; then
+    echo "[ERROR] Database migration failed"
+    cd ..
+    exit 1
+fi
+echo "[OK] Database schema is current"
+
 echo
 echo "============================================"
 echo "[SUCCESS] Deployment Complete!"
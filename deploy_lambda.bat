@@ -44,7 +44,9 @@ echo 1. Go to AWS Lambda Console
 echo 2. Find function: coo-api-handler
 echo 3. Upload coo-lambda.zip
 echo 4. Wait for upload to complete
-echo 5. Test your deployment!
+echo 5. Apply database migrations:
+echo    aws lambda invoke --function-name coo-api-handler --cli-binary-format raw-in-base64-out --payload "{\"action\": \"migrate\"}" migrate-output.json
+echo 6. Test your deployment!
 echo.
 echo Deployment guide: BUDGET_AWS_DEPLOYMENT.md
 pause
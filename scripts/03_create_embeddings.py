@@ -1,40 +1,69 @@
 """
 Create Vector Embeddings for RAG
 Windows-compatible (no emoji characters)
+
+Indexing is incremental: every chunk ID is derived from its file path,
+position and content hash, so a re-run only embeds new or edited chunks
+and deletes chunks whose file was edited or removed. Pass --rebuild to
+drop the collection and re-embed everything.
 """
 
+import argparse
+import hashlib
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
+import os
+import sys
 import time
 
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.bm25_index import BM25Index
+from src.services.retrieval_filters import derive_path_metadata
+from src.services.vector_index import save_index
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "./vector_index")
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float16")
+
 class EmbeddingCreator:
     """Creates vector embeddings for knowledge base"""
     
-    def __init__(self):
+    def __init__(self, rebuild: bool = False):
         print("[INIT] Initializing embedding system...")
         
         # Initialize ChromaDB
         self.client = chromadb.PersistentClient(path="./vector_db")
         
-        # Delete existing collection if exists
-        try:
-            self.client.delete_collection("coo_knowledge")
-            print("  [OK] Cleared existing embeddings")
-        except:
-            pass
+        # Full rebuild: delete existing collection if exists
+        if rebuild:
+            try:
+                self.client.delete_collection("coo_knowledge")
+                print("  [OK] Cleared existing embeddings")
+            except:
+                pass
         
-        # Create new collection
-        self.collection = self.client.create_collection(
+        # Open (or create) collection
+        self.collection = self.client.get_or_create_collection(
             name="coo_knowledge",
             metadata={"description": "Coo medical knowledge base - Pregnancy through Age 5"}
         )
+        print(f"  [OK] Collection has {self.collection.count()} chunks")
         
-        # Load embedding model
-        print("  [LOADING] Downloading embedding model (first time only, ~100MB)...")
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
-        print("  [OK] Model loaded")
+        # Embedding model is loaded only when something needs embedding
+        self._embedder = None
+    
+    @property
+    def embedder(self):
+        """Load the embedding model on first use"""
+        if self._embedder is None:
+            print("  [LOADING] Downloading embedding model (first time only, ~100MB)...")
+            self._embedder = SentenceTransformer(MODEL_NAME)
+            print("  [OK] Model loaded")
+        return self._embedder
     
     def chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50):
         """Split text into overlapping chunks"""
@@ -48,64 +77,134 @@ class EmbeddingCreator:
         
         return chunks
     
-    def index_knowledge_base(self):
-        """Index all markdown files"""
-        print("\n[INDEXING] Processing knowledge base...")
-        
-        kb_dir = Path("knowledge-base")
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Short SHA-256 of a file or chunk"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+    
+    @staticmethod
+    def chunk_id(source: str, index: int, chunk_hash: str) -> str:
+        """Stable chunk ID: same file, position and text always map to the same ID"""
+        return f"{source}#{index}:{chunk_hash}"
+    
+    def collect_chunks(self, kb_dir: Path):
+        """Chunk every markdown file; returns {chunk_id: (document, metadata)}"""
+        chunks_by_id = {}
+        md_files = sorted(kb_dir.rglob("*.md"))
         
-        documents = []
-        metadatas = []
-        ids = []
-        doc_id = 0
+        # Category and age / pregnancy-week ranges from the file paths
+        path_metadata = derive_path_metadata(f.relative_to(kb_dir).as_posix() for f in md_files)
         
-        # Process all markdown files
-        for md_file in kb_dir.rglob("*.md"):
-            print(f"  [FILE] {md_file.relative_to(kb_dir)}")
+        for md_file in md_files:
+            source = md_file.relative_to(kb_dir).as_posix()
             
             with open(md_file, 'r', encoding='utf-8') as f:
                 content = f.read()
+            file_hash = self.content_hash(content)
             
             # Split into chunks
             chunks = self.chunk_text(content)
             
             for i, chunk in enumerate(chunks):
-                documents.append(chunk)
-                metadatas.append({
-                    "source": str(md_file.relative_to(kb_dir)),
-                    "category": md_file.parent.name,
+                chunk_hash = self.content_hash(chunk)
+                chunks_by_id[self.chunk_id(source, i, chunk_hash)] = (chunk, {
+                    "source": source,
+                    **path_metadata[source],
                     "filename": md_file.name,
                     "chunk_id": i,
-                    "total_chunks": len(chunks)
+                    "total_chunks": len(chunks),
+                    "file_hash": file_hash,
+                    "chunk_hash": chunk_hash
                 })
-                ids.append(f"doc_{doc_id}")
-                doc_id += 1
         
-        print(f"\n  [STATS] Total chunks: {len(documents)}")
-        print("  [EMBEDDING] Creating embeddings (this will take 2-3 minutes)...")
+        return chunks_by_id
+    
+    def index_knowledge_base(self):
+        """Index new and changed chunks, delete stale ones"""
+        print("\n[INDEXING] Processing knowledge base...")
+        
+        kb_dir = Path("knowledge-base")
+        chunks_by_id = self.collect_chunks(kb_dir)
+        existing = self.collection.get(include=["metadatas"])
+        existing_metadata = dict(zip(existing["ids"], existing["metadatas"]))
+        existing_ids = set(existing_metadata)
         
-        # Create embeddings
-        embeddings = self.embedder.encode(
-            documents,
-            show_progress_bar=True,
-            batch_size=32
-        )
+        new_ids = [chunk_id for chunk_id in chunks_by_id if chunk_id not in existing_ids]
+        stale_ids = sorted(existing_ids - set(chunks_by_id))
+        # Unchanged text whose derived metadata changed (e.g. a new milestone file shifts age ranges)
+        retag_ids = [
+            chunk_id for chunk_id in chunks_by_id
+            if chunk_id in existing_ids and existing_metadata[chunk_id] != chunks_by_id[chunk_id][1]
+        ]
         
-        print("  [STORING] Saving to vector database...")
+        print(f"  [STATS] {len(chunks_by_id)} chunks: {len(chunks_by_id) - len(new_ids)} unchanged, "
+              f"{len(new_ids)} new/changed, {len(stale_ids)} stale, {len(retag_ids)} metadata updates")
         
-        # Add to ChromaDB in batches
+        # Chunks of edited or removed files (and legacy doc_N IDs)
         batch_size = 100
-        for i in range(0, len(documents), batch_size):
-            end = min(i + batch_size, len(documents))
+        if stale_ids:
+            for i in range(0, len(stale_ids), batch_size):
+                self.collection.delete(ids=stale_ids[i:i + batch_size])
+            print(f"  [OK] Deleted {len(stale_ids)} stale chunks")
+        
+        if retag_ids:
+            for i in range(0, len(retag_ids), batch_size):
+                batch = retag_ids[i:i + batch_size]
+                self.collection.update(ids=batch, metadatas=[chunks_by_id[chunk_id][1] for chunk_id in batch])
+            print(f"  [OK] Updated metadata for {len(retag_ids)} chunks")
+        
+        if new_ids:
+            for source in sorted({chunks_by_id[chunk_id][1]["source"] for chunk_id in new_ids}):
+                print(f"  [FILE] {source}")
+            
+            documents = [chunks_by_id[chunk_id][0] for chunk_id in new_ids]
+            metadatas = [chunks_by_id[chunk_id][1] for chunk_id in new_ids]
             
-            self.collection.add(
-                documents=documents[i:end],
-                embeddings=embeddings[i:end].tolist(),
-                metadatas=metadatas[i:end],
-                ids=ids[i:end]
+            print(f"  [EMBEDDING] Creating embeddings for {len(documents)} chunks...")
+            
+            # Create embeddings
+            embeddings = self.embedder.encode(
+                documents,
+                show_progress_bar=True,
+                batch_size=32
             )
+            
+            print("  [STORING] Saving to vector database...")
+            
+            # Add to ChromaDB in batches
+            for i in range(0, len(documents), batch_size):
+                end = min(i + batch_size, len(documents))
+                
+                self.collection.add(
+                    documents=documents[i:end],
+                    embeddings=embeddings[i:end].tolist(),
+                    metadatas=metadatas[i:end],
+                    ids=new_ids[i:end]
+                )
         
-        print("  [OK] Vector database created!")
+        if new_ids or stale_ids or retag_ids or not Path(VECTOR_INDEX_PATH).exists():
+            print("  [OK] Vector database updated!")
+            self.export_vector_index()
+        else:
+            print("  [OK] Vector database is up to date")
+    
+    def export_vector_index(self):
+        """Write the whole collection as a memory-mappable vector index plus a BM25 index"""
+        data = self.collection.get(include=["embeddings", "documents", "metadatas"])
+        manifest = save_index(
+            VECTOR_INDEX_PATH,
+            data["embeddings"],
+            data["documents"],
+            data["metadatas"],
+            data["ids"],
+            model=MODEL_NAME,
+            dtype=VECTOR_INDEX_DTYPE
+        )
+        print(f"  [OK] Vector index written to {VECTOR_INDEX_PATH} ({manifest['dtype']}, hash {manifest['content_hash'][:12]})")
+        
+        # Lexical index over the same chunk IDs for hybrid retrieval
+        BM25Index.build(data["ids"], data["documents"], data["metadatas"]).save(VECTOR_INDEX_PATH)
+        print(f"  [OK] BM25 index written to {VECTOR_INDEX_PATH}")
     
     def test_retrieval(self):
         """Test the RAG system"""
@@ -137,7 +236,7 @@ class EmbeddingCreator:
                 print(f"       {doc[:80]}...")
             print()
     
-    def run_all(self):
+    def run_all(self, test: bool = True):
         """Run complete embedding creation"""
         print("=" * 60)
         print("CREATING VECTOR EMBEDDINGS FOR RAG")
@@ -146,7 +245,8 @@ class EmbeddingCreator:
         start_time = time.time()
         
         self.index_knowledge_base()
-        self.test_retrieval()
+        if test:
+            self.test_retrieval()
         
         elapsed = time.time() - start_time
         
@@ -154,12 +254,13 @@ class EmbeddingCreator:
         count = self.collection.count()
         
         print("=" * 60)
-        print(f"COMPLETE ({elapsed/60:.1f} minutes)")
+        print(f"COMPLETE ({elapsed:.1f} seconds)")
         print("=" * 60)
         print(f"\nVector Database Stats:")
         print(f"  - Total embeddings: {count}")
         print(f"  - Storage location: ./vector_db")
-        print(f"  - Embedding model: all-MiniLM-L6-v2")
+        print(f"  - Vector index: {VECTOR_INDEX_PATH} ({VECTOR_INDEX_DTYPE})")
+        print(f"  - Embedding model: {MODEL_NAME}")
         print(f"  - Dimensions: 384")
         
         print("\n[SUCCESS] Day 1 Complete! Your data is ready!")
@@ -170,8 +271,13 @@ class EmbeddingCreator:
 
 
 def main():
-    creator = EmbeddingCreator()
-    creator.run_all()
+    parser = argparse.ArgumentParser(description="Create vector embeddings for RAG")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the collection and re-embed everything")
+    parser.add_argument("--skip-test", action="store_true", help="Skip the retrieval test queries")
+    args = parser.parse_args()
+    
+    creator = EmbeddingCreator(rebuild=args.rebuild)
+    creator.run_all(test=not args.skip_test)
 
 
 if __name__ == "__main__":
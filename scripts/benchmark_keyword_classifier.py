@@ -0,0 +1,128 @@
+"""
+Micro-benchmark: legacy substring keyword scans vs the compiled keyword classifier.
+
+Runs the three keyword checks made for every inbound SMS (cancel intent,
+emergency, question type) over a set of sample messages and reports the
+per-message cost of each implementation, plus where their answers differ.
+
+Usage:
+    python scripts/benchmark_keyword_classifier.py [--iterations 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.keyword_classifier import KEYWORD_TABLE, QUESTION_CATEGORIES, KeywordClassifier
+
+
+SAMPLE_MESSAGES = [
+    "My 6 month old has a fever of 101, should I be worried?",
+    "When is the next vaccine due for Emma?",
+    "Is it normal that he isn't crawling yet at 9 months?",
+    "Any swimming classes for toddlers near me?",
+    "How do I pick a preschool?",
+    "I'm 20 weeks pregnant and feeling dizzy",
+    "How do I add another child to my account?",
+    "cancel",
+    "She can't breathe and is turning blue",
+    "What should a 2 year old be eating for breakfast?",
+    "Can you help me understand tummy time?",
+    "He keeps waking up at night, what can I do?",
+    "my baby stopped eating solids this week",
+    "Thanks so much!",
+    "Is it ok to give my toddler honey?",
+    "What are good bedtime routines for a newborn?",
+]
+
+
+def legacy_classify(question: str) -> str:
+    """Previous _classify_with_keywords: one substring scan per keyword."""
+    text_lower = question.lower()
+    for category in ["vaccine", "symptom", "development", "activity",
+                     "education", "pregnancy", "account_management"]:
+        if any(keyword in text_lower for keyword in KEYWORD_TABLE[category]):
+            return category
+    return "general"
+
+
+def legacy_emergency(text: str) -> bool:
+    """Previous check_emergency_keywords."""
+    text_lower = text.lower()
+    return any(keyword in text_lower for keyword in KEYWORD_TABLE["emergency"])
+
+
+def legacy_cancel(message: str) -> bool:
+    """Previous detect_cancel_intent."""
+    message_lower = message.lower().strip()
+    return any(keyword in message_lower for keyword in KEYWORD_TABLE["cancel"])
+
+
+def time_per_message(fn, messages, iterations: int) -> float:
+    """Return mean microseconds per message."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            fn(message)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword classification")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    uncached = KeywordClassifier(KEYWORD_TABLE, cache_size=0)
+    cached = KeywordClassifier(KEYWORD_TABLE)
+
+    def legacy_all(message):
+        legacy_cancel(message)
+        legacy_emergency(message)
+        legacy_classify(message)
+
+    def compiled_all(classifier):
+        def run(message):
+            classifier.has_category(message, "cancel")
+            classifier.has_category(message, "emergency")
+            classifier.classify(message)
+        return run
+
+    def compiled_single_scan(message):
+        categories = {match.category for match in uncached.find_all(message)}
+        "cancel" in categories
+        "emergency" in categories
+        next((c for c in QUESTION_CATEGORIES if c in categories), "general")
+
+    print(f"[BENCH] {len(SAMPLE_MESSAGES)} messages x {args.iterations} iterations")
+    print("[BENCH] cancel + emergency + category per message:")
+    legacy_us = time_per_message(legacy_all, SAMPLE_MESSAGES, args.iterations)
+    compiled_us = time_per_message(compiled_single_scan, SAMPLE_MESSAGES, args.iterations)
+    cached_us = time_per_message(compiled_all(cached), SAMPLE_MESSAGES, args.iterations)
+    print(f"  legacy substring scans:       {legacy_us:8.2f} us/message")
+    print(f"  compiled regex (one scan):    {compiled_us:8.2f} us/message")
+    print(f"  compiled regex (memoized):    {cached_us:8.2f} us/message")
+
+    # Expected differences are substring false positives that word
+    # boundaries remove, e.g. "hep" in "help" or "stop" in "stopped"
+    print("\n[BENCH] Differences (legacy -> compiled):")
+    differences = 0
+    for message in SAMPLE_MESSAGES:
+        before = (legacy_cancel(message), legacy_emergency(message), legacy_classify(message))
+        after = (
+            uncached.has_category(message, "cancel"),
+            uncached.has_category(message, "emergency"),
+            uncached.classify(message)
+        )
+        if before != after:
+            differences += 1
+            print(f"  {message!r}: cancel/emergency/category {before} -> {after}")
+    if not differences:
+        print("  none")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark RAG providers: load time, memory and query latency.
+
+Each provider is measured in a fresh subprocess so load time and resident
+memory are not skewed by the others. Query vectors are embedded once up
+front, so the numbers compare index/search cost only (chromadb and numpy
+receive the same vectors; bedrock_kb embeds server-side).
+
+Usage:
+    python scripts/benchmark_rag_providers.py [--providers numpy,chromadb,bedrock_kb] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+QUERIES = [
+    "My baby has a fever after vaccines",
+    "What can I buy during second trimester?",
+    "When should my toddler start swimming classes?",
+    "How do I choose a preschool?",
+    "2 month developmental milestones",
+    "Is the rotavirus vaccine safe?",
+    "18 month old not talking yet",
+    "What should I pack in my hospital bag?",
+]
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux /proc, falls back to peak RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(provider: str, repeat: int) -> dict:
+    """Measure one provider in this process."""
+    from src.services.rag_service import RAGService
+    from src.services.embedding_service import embedding_service
+
+    # Load the embedding model first so it is not counted against the index
+    embedding_service.encode(["warm up"])
+    baseline_mb = rss_mb()
+
+    start = time.perf_counter()
+    service = RAGService(provider=provider)
+    load_ms = (time.perf_counter() - start) * 1000
+    loaded_mb = rss_mb()
+
+    for query in QUERIES:
+        service.embed_query(query)  # fill the query vector cache
+
+    latencies = []
+    results = 0
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            results += len(service.search(query, n_results=5))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "provider": provider,
+        "chunks": service.get_collection_info().get("count", 0),
+        "load_ms": round(load_ms, 1),
+        "index_memory_mb": round(loaded_mb - baseline_mb, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAG providers")
+    parser.add_argument("--providers", default="numpy,chromadb")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.repeat)))
+        return
+
+    print(f"[BENCH] {len(QUERIES)} queries x {args.repeat} repeats, top-5")
+    print(f"  {'provider':<12}{'chunks':>8}{'load ms':>10}{'index MB':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for provider in args.providers.split(","):
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", provider, "--repeat", str(args.repeat)],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            error = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+            print(f"  {provider:<12} failed: {error}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"  {r['provider']:<12}{r['chunks']:>8}{r['load_ms']:>10}{r['index_memory_mb']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}")
+        if r["results"] == 0:
+            print(f"  {'':<12}(no results - is the index built?)")
+
+
+if __name__ == "__main__":
+    main()
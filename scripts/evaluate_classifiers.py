@@ -0,0 +1,151 @@
+"""
+Offline evaluation of the question classification tiers.
+
+Reports accuracy and per-question latency for:
+  1. Keyword tier (compiled keyword table)
+  2. Embedding tier (nearest centroid on all-MiniLM-L6-v2), k-fold so no
+     question is scored against a centroid built from itself
+  3. Keywords -> embeddings as wired in classify_question_type, including
+     how many questions would still escalate to Nova Lite
+  4. Nova Lite (only with --nova; needs Bedrock credentials)
+
+Usage:
+    python scripts/evaluate_classifiers.py [--folds 4] [--min-score 0.45] [--min-margin 0.05] [--nova]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.keyword_classifier import KeywordClassifier, KEYWORD_TABLE
+from src.services.embedding_classifier import EmbeddingClassifier
+from src.services.embedding_service import embedding_service
+
+
+def flatten(examples):
+    """Turn {category: [questions]} into a list of (question, category)."""
+    return [(q, label) for label, questions in examples.items() for q in questions]
+
+
+def report(name, correct, total, elapsed, extra=""):
+    accuracy = correct / total if total else 0.0
+    latency_ms = elapsed / total * 1000 if total else 0.0
+    print(f"  {name:<28} accuracy {accuracy:6.1%}  ({correct}/{total})  {latency_ms:8.2f} ms/question  {extra}")
+
+
+def evaluate_keywords(dataset):
+    classifier = KeywordClassifier(KEYWORD_TABLE, cache_size=0)
+    start = time.perf_counter()
+    predictions = [classifier.classify(q) for q, _ in dataset]
+    elapsed = time.perf_counter() - start
+    correct = sum(p == label for p, (_, label) in zip(predictions, dataset))
+    report("keywords", correct, len(dataset), elapsed)
+    return predictions
+
+
+def evaluate_embeddings(examples, folds, min_score, min_margin, keyword_predictions):
+    # Stratified folds: each category's questions are spread over the folds
+    rng = random.Random(42)
+    fold_of = {}
+    for label, questions in examples.items():
+        indices = list(range(len(questions)))
+        rng.shuffle(indices)
+        for position, index in enumerate(indices):
+            fold_of[(label, index)] = position % folds
+
+    dataset = [(q, label, fold_of[(label, i)]) for label, questions in examples.items() for i, q in enumerate(questions)]
+    predictions = [None] * len(dataset)
+    elapsed = 0.0
+
+    for fold in range(folds):
+        train = defaultdict(list)
+        for q, label, f in dataset:
+            if f != fold:
+                train[label].append(q)
+
+        classifier = EmbeddingClassifier(min_score=min_score, min_margin=min_margin)
+        if not classifier.fit(dict(train)):
+            print("  embedding model not available (pip install sentence-transformers)")
+            return
+
+        for i, (q, _, f) in enumerate(dataset):
+            if f == fold:
+                start = time.perf_counter()
+                predictions[i] = classifier.predict(q)
+                elapsed += time.perf_counter() - start
+
+    total = len(dataset)
+    correct = sum(p["category"] == label for p, (_, label, _) in zip(predictions, dataset))
+    report("embeddings (all)", correct, total, elapsed)
+
+    confident = [(p, label) for p, (_, label, _) in zip(predictions, dataset) if p["confident"]]
+    confident_correct = sum(p["category"] == label for p, label in confident)
+    report(
+        "embeddings (confident only)", confident_correct, len(confident), elapsed * len(confident) / total,
+        f"coverage {len(confident) / total:.1%}"
+    )
+
+    # Tiered: keyword hit wins, otherwise a confident embedding prediction,
+    # otherwise the question escalates to Nova Lite
+    tiered_correct = 0
+    escalated = 0
+    for keyword_prediction, prediction, (_, label, _) in zip(keyword_predictions, predictions, dataset):
+        if keyword_prediction != "general":
+            tiered_correct += keyword_prediction == label
+        elif prediction["confident"]:
+            tiered_correct += prediction["category"] == label
+        else:
+            escalated += 1
+    answered = total - escalated
+    report(
+        "keywords -> embeddings", tiered_correct, answered, elapsed,
+        f"escalated to Nova Lite {escalated}/{total}"
+    )
+
+
+def evaluate_nova(dataset):
+    from src.services.ai_service import ai_service
+
+    async def run():
+        correct = 0
+        start = time.perf_counter()
+        for q, label in dataset:
+            correct += await ai_service._classify_with_nova_lite(q) == label
+        return correct, time.perf_counter() - start
+
+    correct, elapsed = asyncio.run(run())
+    report("nova lite", correct, len(dataset), elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate question classification tiers")
+    parser.add_argument("--examples", default="data/structured/classifier_examples.json")
+    parser.add_argument("--folds", type=int, default=4)
+    parser.add_argument("--min-score", type=float, default=0.45)
+    parser.add_argument("--min-margin", type=float, default=0.05)
+    parser.add_argument("--nova", action="store_true", help="Also evaluate Nova Lite (Bedrock)")
+    args = parser.parse_args()
+
+    examples = EmbeddingClassifier.load_examples(args.examples)
+    dataset = flatten(examples)
+    print(f"[EVAL] {len(dataset)} labeled questions, {len(examples)} categories")
+
+    keyword_predictions = evaluate_keywords(dataset)
+
+    if embedding_service.is_available():
+        evaluate_embeddings(examples, args.folds, args.min_score, args.min_margin, keyword_predictions)
+    else:
+        print("  embedding model not available (pip install sentence-transformers)")
+
+    if args.nova:
+        evaluate_nova(dataset)
+
+
+if __name__ == "__main__":
+    main()
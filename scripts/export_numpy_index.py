@@ -0,0 +1,46 @@
+"""
+Export the ChromaDB knowledge base collection to a NumPy vector index
+(plus the BM25 index used for hybrid retrieval).
+
+Reads every chunk (embedding, text, metadata) from ./vector_db and writes
+./vector_index for RAG_PROVIDER=numpy. Run after 03_create_embeddings.py.
+
+Usage:
+    python scripts/export_numpy_index.py [--vector-db ./vector_db] [--out ./vector_index] [--dtype float16]
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+
+from src.services.bm25_index import BM25Index
+from src.services.vector_index import save_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export ChromaDB collection to a NumPy index")
+    parser.add_argument("--vector-db", default="./vector_db")
+    parser.add_argument("--collection", default="coo_knowledge")
+    parser.add_argument("--out", default="./vector_index")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Model the collection was embedded with")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=args.vector_db)
+    collection = client.get_collection(args.collection)
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+
+    manifest = save_index(
+        args.out, data["embeddings"], data["documents"], data["metadatas"], data["ids"],
+        model=args.model, dtype=args.dtype
+    )
+    BM25Index.build(data["ids"], data["documents"], data["metadatas"]).save(args.out)
+    print(f"[OK] Exported {manifest['count']} chunks to {args.out} ({manifest['dtype']}, hash {manifest['content_hash'][:12]}) with BM25 index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Measure the input-token reduction from prompt caching, offline.
+
+Replays a question workload through AIService.answer_question on the
+local stub provider (AI_PROVIDER=stub), once with prompt caching off and
+once with it on, and compares billed input tokens. Context comes from a
+BM25 index built over knowledge-base/ and trimmed with the same token
+budgets as production, so no vector store, model or API key is needed.
+
+Popular questions repeat (Zipf-like), as they do in the SMS traffic, so
+the same chunks are retrieved again within the cache TTL.
+
+Usage:
+    python scripts/measure_prompt_caching.py [--requests 200] [--min-tokens 1024]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ["AI_PROVIDER"] = "stub"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"  # measure the model calls themselves
+
+
+QUESTIONS = [
+    "When does my baby get the DTaP vaccine?",
+    "What are the side effects of the rotavirus vaccine?",
+    "My baby has a fever after vaccines, what should I do?",
+    "When should I call the doctor about a fever?",
+    "What milestones should an 18 month old reach?",
+    "How can I treat my toddler's cold at home?",
+    "What should I buy during the second trimester?",
+    "What happens at 20 weeks pregnant?",
+    "How do I choose a preschool?",
+    "When should my toddler start swimming classes?",
+    "Is the MMR vaccine safe?",
+    "How much should my 6 month old eat?",
+]
+
+
+def load_index():
+    from src.services.bm25_index import BM25Index
+    from src.services.context_builder import ContextBuilder
+
+    kb_dir = Path(ROOT) / "knowledge-base"
+    ids, documents, metadatas = [], [], []
+    for md_file in sorted(kb_dir.rglob("*.md")):
+        source = md_file.relative_to(kb_dir).as_posix()
+        ids.append(source)
+        documents.append(" ".join(md_file.read_text(encoding="utf-8").split()))
+        metadatas.append({"source": source, "category": md_file.parent.name, "chunk_id": 0})
+    return BM25Index.build(ids, documents, metadatas), ContextBuilder()
+
+
+async def replay(ai_service, workload, contexts, use_case, caching):
+    ai_service.prompt_caching = caching
+    ai_service.prompt_cache_stub.clear()
+    ai_service.prompt_cache_stats.clear()
+    for question in workload:
+        await ai_service.answer_question(question, context=contexts[question], use_case=use_case)
+    return ai_service.prompt_cache_stats.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure prompt caching savings with the local stub")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--min-tokens", type=int, default=1024, help="Provider minimum cacheable prefix")
+    args = parser.parse_args()
+
+    from src.services.ai_service import ai_service
+
+    ai_service.prompt_cache_stub.min_tokens = args.min_tokens
+    index, builder = load_index()
+
+    rng = random.Random(7)
+    weights = [1 / rank for rank in range(1, len(QUESTIONS) + 1)]
+    workload = rng.choices(QUESTIONS, weights=weights, k=args.requests)
+
+    print(f"[BENCH] {args.requests} requests over {len(QUESTIONS)} questions, min cacheable prefix {args.min_tokens} tokens")
+    print(f"  {'use case':<16}{'budget':>8}{'caching':>9}{'prompt tok':>12}{'cache read':>12}{'cache write':>13}{'rel. cost':>11}")
+    for use_case, budget_key in (("general", "general"), ("general", "sms"), ("vaccine_info", "vaccine_info")):
+        budget = ai_service.context_budgets.get(budget_key)
+        contexts = {
+            q: builder.build(q, index.search(q, n_results=5), token_budget=budget)["context"]
+            for q in QUESTIONS
+        }
+        for caching in (False, True):
+            stats = asyncio.run(replay(ai_service, workload, contexts, use_case, caching))
+            print(
+                f"  {use_case:<16}{budget or '-':>8}{'on' if caching else 'off':>9}{stats['prompt_tokens']:>12}"
+                f"{stats['cache_read_input_tokens']:>12}{stats['cache_creation_input_tokens']:>13}"
+                f"{stats['relative_input_cost']:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
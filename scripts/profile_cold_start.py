@@ -0,0 +1,145 @@
+"""
+Profile cold start: import time per module and first-use cost of lazy services.
+
+Imports the Lambda entry module in a fresh interpreter with
+`python -X importtime`, then reports total import time, the slowest
+modules (cumulative and self time) and, with --services, how long each
+lazily constructed service takes to build on first use. Use --max-ms to
+fail (exit 1) when the import exceeds a budget, e.g. in CI.
+
+Usage:
+    python scripts/profile_cold_start.py [--module src.lambda_handler] [--top 15] [--services] [--max-ms 1500] [--json out.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+LAZY_SERVICES = [
+    ("src.services.ai_service", "ai_service"),
+    ("src.services.rag_service", "rag_service"),
+    ("src.services.sms_service", "sms_service"),
+    ("src.services.workflow_service", "workflow_service"),
+    ("src.services.cache_service", "response_cache"),
+    ("src.services.sms_worker_pool", "sms_worker_pool"),
+]
+
+# Runs in the child interpreter: build each lazy service and time it
+SERVICE_PROBE = """
+import importlib, json, sys, time
+results = []
+for module_name, attr in json.loads(sys.argv[1]):
+    proxy = getattr(importlib.import_module(module_name), attr)
+    start = time.perf_counter()
+    try:
+        proxy._get()
+        results.append([attr, round((time.perf_counter() - start) * 1000, 1), None])
+    except Exception as e:
+        results.append([attr, round((time.perf_counter() - start) * 1000, 1), repr(e)])
+print("SERVICES " + json.dumps(results))
+"""
+
+
+def parse_importtime(stderr: str):
+    """Parse `-X importtime` output into (module, self_us, cumulative_us, depth) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_field, cumulative_field, raw_name = line.split("|", 2)
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        rows.append((raw_name.strip(), int(self_field.split(":")[1]), int(cumulative_field), depth))
+    return rows
+
+
+def entry_subtree(rows, module: str):
+    """
+    Keep only the rows imported by the entry module.
+
+    importtime lists children before their parent, so the entry's imports
+    are the rows just above its own depth-0 row. Interpreter start-up
+    imports (site, .pth hooks) are dropped. If the import failed there is
+    no entry row, and the trailing nested rows are used instead.
+    """
+    end = next((i + 1 for i, r in enumerate(rows) if r[0] == module and r[3] == 0), None)
+    if end is None:
+        end = len(rows)
+        while end > 0 and rows[end - 1][3] == 0:
+            end -= 1
+    start = end - 1 if end and rows[end - 1][0] == module else end
+    while start > 0 and rows[start - 1][3] > 0:
+        start -= 1
+    return rows[start:end]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile cold start import time")
+    parser.add_argument("--module", default="src.lambda_handler", help="Entry module to import")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--services", action="store_true", help="Also time first use of each lazy service")
+    parser.add_argument("--max-ms", type=float, help="Exit 1 if the import takes longer than this")
+    parser.add_argument("--json", help="Write the full report to this file")
+    args = parser.parse_args()
+
+    code = f"import {args.module}"
+    if args.services:
+        code += "\n" + SERVICE_PROBE
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code, json.dumps(LAZY_SERVICES)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+
+    rows = entry_subtree(parse_importtime(proc.stderr), args.module)
+    if proc.returncode != 0:
+        error = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        print(f"[BENCH] Import of {args.module} failed: {error[-1] if error else 'unknown error'}")
+
+    entry = rows[-1] if rows and rows[-1][0] == args.module else None
+    total_ms = (entry[2] if entry else sum(r[1] for r in rows)) / 1000
+    print(f"[BENCH] import {args.module}: {total_ms:.0f} ms, {len(rows)} modules")
+
+    own = sorted((r for r in rows if r[0].startswith("src")), key=lambda r: -r[2])
+    print(f"\n  Slowest project modules (cumulative, includes their imports):")
+    for name, self_us, cumulative_us, _ in own[:args.top]:
+        print(f"    {cumulative_us / 1000:9.1f} ms  {name}")
+
+    top_level = {}
+    for name, self_us, cumulative_us, depth in rows:
+        package = name.split(".")[0]
+        if not name.startswith("src"):
+            top_level[package] = top_level.get(package, 0) + self_us
+    print(f"\n  Slowest third-party packages (self time summed per package):")
+    for package, self_us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"    {self_us / 1000:9.1f} ms  {package}")
+
+    services = []
+    for line in proc.stdout.splitlines():
+        if line.startswith("SERVICES "):
+            services = json.loads(line[len("SERVICES "):])
+    if services:
+        print(f"\n  First use of lazy services:")
+        for name, ms, error in services:
+            print(f"    {ms:9.1f} ms  {name}{'  (failed: ' + error + ')' if error else ''}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "module": args.module,
+                "total_ms": round(total_ms, 1),
+                "modules": [{"name": n, "self_us": s, "cumulative_us": c} for n, s, c, _ in rows],
+                "services": [{"name": n, "ms": ms, "error": e} for n, ms, e in services]
+            }, f, indent=2)
+
+    if args.max_ms is not None and (total_ms > args.max_ms or proc.returncode != 0):
+        print(f"\n[FAIL] Cold start import {total_ms:.0f} ms exceeds budget {args.max_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 """AI reasoning and Q&A API routes."""
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from ...services.ai_service import ai_service
+from ...services.cache_service import classification_cache, response_cache
 
 
 router = APIRouter(prefix="/api/ai", tags=["AI Reasoning"])
@@ -33,7 +36,7 @@ async def ask_question(request: QuestionRequest):
     - symptom_triage: Medical symptom assessment
     - vaccine_info: Vaccine information and concerns
     """
-    result = ai_service.answer_question(
+    result = await ai_service.answer_question(
         question=request.question,
         use_case=request.use_case,
         max_tokens=request.max_tokens
@@ -45,6 +48,29 @@ async def ask_question(request: QuestionRequest):
     return result
 
 
+@router.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Ask a parenting question and stream the answer as it is generated.
+
+    Returns newline-delimited JSON (application/x-ndjson):
+    - {"type": "token", "step": null, "text": "..."} for each text delta
+    - {"type": "result", "data": {...}} with the same payload as /ask
+    - {"type": "error", "error": "..."} if generation fails
+    """
+    events = ai_service.stream_events(lambda: ai_service.answer_question(
+        question=request.question,
+        use_case=request.use_case,
+        max_tokens=request.max_tokens
+    ))
+
+    async def ndjson():
+        async for event in events:
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 @router.post("/triage")
 async def triage_symptoms(request: SymptomTriageRequest):
     """
@@ -70,7 +96,7 @@ async def triage_symptoms(request: SymptomTriageRequest):
             "emergency_detected": True
         }
 
-    result = ai_service.triage_symptoms(
+    result = await ai_service.triage_symptoms(
         symptom_description=request.symptoms,
         child_age_months=request.child_age_months
     )
@@ -78,6 +104,56 @@ async def triage_symptoms(request: SymptomTriageRequest):
     return result
 
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get response cache statistics.
+
+    Returns hit/miss counters, hit rate and current cache size.
+    """
+    return response_cache.get_stats()
+
+
+@router.delete("/cache")
+async def clear_cache():
+    """Clear all cached AI responses."""
+    response_cache.clear()
+    return {"message": "Response cache cleared"}
+
+
+@router.get("/cache/classification/stats")
+async def get_classification_cache_stats():
+    """
+    Get question classification cache statistics.
+
+    Returns hit/miss counters, hit rate, size and evictions for tuning the
+    TTL and capacity.
+    """
+    return classification_cache.get_stats()
+
+
+@router.delete("/cache/classification")
+async def clear_classification_cache():
+    """Clear all cached question classifications."""
+    classification_cache.clear()
+    return {"message": "Classification cache cleared"}
+
+
+@router.get("/cache/prompt/stats")
+async def get_prompt_cache_stats():
+    """
+    Get provider-side prompt caching statistics.
+
+    Returns prompt tokens split into uncached input, cache writes and cache
+    reads, plus the input cost relative to sending every prompt uncached.
+    """
+    return {
+        "enabled": ai_service.prompt_caching,
+        "provider": ai_service.provider,
+        **ai_service.prompt_cache_stats.get_stats()
+    }
+
+
 @router.get("/test")
 async def test_ai_service():
     """
@@ -94,7 +170,7 @@ async def test_ai_service():
 
     # Test with a simple question
     try:
-        result = ai_service.answer_question(
+        result = await ai_service.answer_question(
             question="What is a normal temperature for a baby?",
             max_tokens=50
         )
@@ -16,6 +16,7 @@ from ...services.auth_service import (
     is_verification_code_expired
 )
 from ...services.sms_service import SMSService
+from ...services.identity_cache import phone_identity_cache
 from ...config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
@@ -112,6 +113,7 @@ async def signup(family_data: FamilyCreate, db: Session = Depends(get_db)):
     # Update phone lookup with member ID
     phone_lookup.family_member_id = primary_member.id
     db.commit()
+    phone_identity_cache.set_phone(family_data.primary_phone, new_family.id, primary_member.id)
 
     # Send phone verification code
     try:
@@ -360,6 +362,7 @@ async def delete_account(
     family.deletion_final_at = datetime.utcnow() + timedelta(days=90)
     family.deletion_status = "pending"
     db.commit()
+    phone_identity_cache.invalidate_family(family_id)
 
     # Send confirmation SMS
     try:
@@ -408,6 +411,7 @@ async def restore_account(
     family.deletion_final_at = None
     family.deletion_status = "restored"
     db.commit()
+    phone_identity_cache.invalidate_family(family.id)
 
     # Send confirmation SMS
     try:
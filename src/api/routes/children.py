@@ -5,6 +5,7 @@ from datetime import date, datetime
 from ...database import get_db
 from ...models.models import Family, Child
 from ...schemas.schemas import ChildCreate, ChildResponse, ChildUpdate, ChildAgeResponse
+from ...services.identity_cache import phone_identity_cache
 from ...config import settings
 
 router = APIRouter(prefix="/api/children", tags=["Children"])
@@ -50,6 +51,7 @@ async def create_child(child: ChildCreate, db: Session = Depends(get_db)):
     db.add(db_child)
     db.commit()
     db.refresh(db_child)
+    phone_identity_cache.invalidate_family(db_child.family_id)
 
     return db_child
 
@@ -82,6 +84,7 @@ async def update_child(child_id: int, child_update: ChildUpdate, db: Session = D
 
     db.commit()
     db.refresh(child)
+    phone_identity_cache.invalidate_family(child.family_id)
 
     return child
 
@@ -93,8 +96,10 @@ async def delete_child(child_id: int, db: Session = Depends(get_db)):
     if not child:
         raise HTTPException(status_code=404, detail="Child not found")
 
+    family_id = child.family_id
     db.delete(child)
     db.commit()
+    phone_identity_cache.invalidate_family(family_id)
 
     return {"message": "Child deleted successfully"}
 
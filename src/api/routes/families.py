@@ -9,6 +9,7 @@ from ...schemas.schemas import (
     FamilyMemberResponse, FamilyMemberUpdate, FamilyWithMembersAndChildren
 )
 from ...services.sms_service import sms_service
+from ...services.identity_cache import phone_identity_cache
 from ...config import settings
 
 router = APIRouter(prefix="/api/families", tags=["Families"])
@@ -110,6 +111,7 @@ async def delete_family(family_id: int, db: Session = Depends(get_db)):
     # Delete family (cascade will delete members, children, messages, tasks)
     db.delete(family)
     db.commit()
+    phone_identity_cache.invalidate_family(family_id, include_phones=True)
 
     return {"message": "Family deleted successfully"}
 
@@ -212,7 +214,9 @@ async def remove_family_member(member_id: int, db: Session = Depends(get_db)):
     db.query(PhoneLookup).filter(PhoneLookup.phone == member.phone).delete()
 
     # Delete member
+    phone = member.phone
     db.delete(member)
     db.commit()
+    phone_identity_cache.invalidate_phone(phone)
 
     return {"message": "Family member removed successfully"}
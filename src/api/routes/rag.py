@@ -120,6 +120,17 @@ async def get_knowledge_base_info():
     return info
 
 
+@router.get("/metrics")
+async def get_retrieval_metrics():
+    """
+    Get retrieval metrics.
+
+    Returns query embedding cache hits/misses and average time spent
+    embedding queries vs searching the index.
+    """
+    return rag_service.get_metrics()
+
+
 @router.get("/context")
 async def get_context_for_question(
     question: str = Query(..., description="Question to get context for"),
@@ -1,7 +1,10 @@
 """Agentic AI workflow API routes."""
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
+from ...services.ai_service import ai_service
 from ...services.workflow_service import workflow_service
 
 
@@ -100,7 +103,8 @@ async def list_workflows():
             "Multi-step AI reasoning",
             "RAG-powered knowledge retrieval",
             "Personalized recommendations",
-            "Actionable plans and timelines"
+            "Actionable plans and timelines",
+            "Token streaming via POST /api/workflows/{name}/stream"
         ]
     }
 
@@ -125,7 +129,7 @@ async def pregnancy_workflow(request: PregnancyWorkflowRequest):
     ```
     """
     context = request.dict()
-    result = workflow_service.execute_workflow("pregnancy", context)
+    result = await workflow_service.execute_workflow("pregnancy", context)
 
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
@@ -155,7 +159,7 @@ async def vaccine_workflow(request: VaccineWorkflowRequest):
     ```
     """
     context = request.dict()
-    result = workflow_service.execute_workflow("vaccines", context)
+    result = await workflow_service.execute_workflow("vaccines", context)
 
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
@@ -184,7 +188,7 @@ async def milestone_workflow(request: MilestoneWorkflowRequest):
     ```
     """
     context = request.dict()
-    result = workflow_service.execute_workflow("milestones", context)
+    result = await workflow_service.execute_workflow("milestones", context)
 
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
@@ -214,7 +218,7 @@ async def activity_workflow(request: ActivityWorkflowRequest):
     ```
     """
     context = request.dict()
-    result = workflow_service.execute_workflow("activities", context)
+    result = await workflow_service.execute_workflow("activities", context)
 
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
@@ -244,7 +248,7 @@ async def preschool_workflow(request: PreschoolWorkflowRequest):
     ```
     """
     context = request.dict()
-    result = workflow_service.execute_workflow("preschool", context)
+    result = await workflow_service.execute_workflow("preschool", context)
 
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
@@ -252,6 +256,38 @@ async def preschool_workflow(request: PreschoolWorkflowRequest):
     return result
 
 
+@router.post("/{workflow_name}/stream")
+async def stream_workflow(workflow_name: str, context: Dict[str, Any]):
+    """
+    Execute a workflow and stream each step's text as it is generated.
+
+    The request body is the same context as the workflow's own endpoint.
+    Returns newline-delimited JSON (application/x-ndjson):
+    - {"type": "token", "step": "vaccine_plan", "text": "..."} for each text
+      delta, where step is the result field being generated
+    - {"type": "result", "data": {...}} with the full workflow result
+    - {"type": "error", "error": "..."} if execution fails
+
+    Example:
+    ```
+    POST /api/workflows/vaccines/stream
+    {"child_age_months": 6, "concerns": "Are vaccines safe?"}
+    ```
+    """
+    if workflow_name not in workflow_service.workflows:
+        raise HTTPException(status_code=404, detail=f"Unknown workflow: {workflow_name}")
+
+    events = ai_service.stream_events(
+        lambda: workflow_service.execute_workflow(workflow_name, context)
+    )
+
+    async def ndjson():
+        async for event in events:
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 @router.post("/execute")
 async def execute_generic_workflow(workflow_name: str, context: Dict[str, Any]):
     """
@@ -266,7 +302,7 @@ async def execute_generic_workflow(workflow_name: str, context: Dict[str, Any]):
     Returns:
         Workflow execution results
     """
-    result = workflow_service.execute_workflow(workflow_name, context)
+    result = await workflow_service.execute_workflow(workflow_name, context)
 
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
@@ -13,11 +13,32 @@ class Settings(BaseSettings):
     # Environment Mode: "local" or "aws"
     environment: str = os.getenv("ENVIRONMENT", "local")
 
-    # AI Provider: "anthropic" (local) or "bedrock" (aws)
+    # AI Provider: "anthropic" (local), "bedrock" (aws) or "stub" (offline, canned answers)
     ai_provider: str = os.getenv("AI_PROVIDER", "anthropic")
+    # Provider-side prompt caching (cache_control on system prompt and retrieved context)
+    prompt_caching_enabled: bool = os.getenv("PROMPT_CACHING_ENABLED", "true").lower() == "true"
+    prompt_cache_min_tokens: int = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
 
-    # RAG Provider: "chromadb" (local) or "bedrock_kb" (aws)
+    # RAG Provider: "chromadb" (local), "numpy" (in-memory index) or "bedrock_kb" (aws)
     rag_provider: str = os.getenv("RAG_PROVIDER", "chromadb")
+    vector_index_path: str = os.getenv("VECTOR_INDEX_PATH", "./vector_index")
+    vector_index_dtype: str = os.getenv("VECTOR_INDEX_DTYPE", "float16")
+    vector_index_mmap: bool = os.getenv("VECTOR_INDEX_MMAP", "true").lower() == "true"
+    rag_query_cache_max_entries: int = int(os.getenv("RAG_QUERY_CACHE_MAX_ENTRIES", "2048"))
+    # Hybrid retrieval: BM25 index stored in vector_index_path, fused by reciprocal rank
+    rag_hybrid_search: bool = os.getenv("RAG_HYBRID_SEARCH", "true").lower() == "true"
+    rag_hybrid_candidates: int = int(os.getenv("RAG_HYBRID_CANDIDATES", "15"))
+    rag_rrf_k: int = int(os.getenv("RAG_RRF_K", "60"))
+    # Answer questions the keyword classifier already categorized from BM25 alone
+    rag_bm25_for_keyword_hits: bool = os.getenv("RAG_BM25_FOR_KEYWORD_HITS", "false").lower() == "true"
+    # Pre-filter retrieval by question category and child age, relaxing below this many hits
+    rag_metadata_filters: bool = os.getenv("RAG_METADATA_FILTERS", "true").lower() == "true"
+    rag_filter_min_results: int = int(os.getenv("RAG_FILTER_MIN_RESULTS", "2"))
+    # Merge/de-duplicate retrieved chunks and trim context to a per-use-case token budget
+    rag_context_builder: bool = os.getenv("RAG_CONTEXT_BUILDER", "true").lower() == "true"
+    rag_context_token_budgets: str = os.getenv(
+        "RAG_CONTEXT_TOKEN_BUDGETS", "sms:400,general:1200,symptom_triage:600,vaccine_info:800,workflow:1000"
+    )
 
     # Anthropic API (for local development)
     anthropic_api_key: str = os.getenv("ANTHROPIC_API_KEY", "")
@@ -32,13 +53,82 @@ class Settings(BaseSettings):
     bedrock_classifier_model: str = os.getenv("BEDROCK_CLASSIFIER_MODEL", "amazon.nova-lite-v1:0")
     use_llm_classification: bool = os.getenv("USE_LLM_CLASSIFICATION", "true").lower() == "true"
 
+    # Local embedding classifier tier (between keywords and Nova Lite)
+    use_embedding_classification: bool = os.getenv("USE_EMBEDDING_CLASSIFICATION", "true").lower() == "true"
+    embedding_classifier_examples: str = os.getenv("EMBEDDING_CLASSIFIER_EXAMPLES", "./data/structured/classifier_examples.json")
+    embedding_classifier_min_score: float = float(os.getenv("EMBEDDING_CLASSIFIER_MIN_SCORE", "0.45"))
+    embedding_classifier_min_margin: float = float(os.getenv("EMBEDDING_CLASSIFIER_MIN_MARGIN", "0.05"))
+
+    # Shared connection pool size for model calls (max in-flight requests per worker)
+    llm_max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+
+    # Local embedding model (same model used to build the knowledge base)
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+    # Response cache for repeated questions
+    response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    response_cache_backend: str = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # "memory" or "sqlite"
+    response_cache_path: str = os.getenv("RESPONSE_CACHE_PATH", "./response_cache.db")
+    response_cache_ttl_seconds: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+    response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+    response_cache_semantic: bool = os.getenv("RESPONSE_CACHE_SEMANTIC", "false").lower() == "true"
+    response_cache_similarity_threshold: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0.92"))
+    # Use cases where a near-duplicate answer is unsafe: exact matches only
+    response_cache_semantic_exclude: str = os.getenv("RESPONSE_CACHE_SEMANTIC_EXCLUDE", "symptom_triage,emergency")
+
+    # Question classification memo (in-process LRU + TTL)
+    classification_cache_enabled: bool = os.getenv("CLASSIFICATION_CACHE_ENABLED", "true").lower() == "true"
+    classification_cache_ttl_seconds: int = int(os.getenv("CLASSIFICATION_CACHE_TTL_SECONDS", "21600"))
+    classification_cache_max_entries: int = int(os.getenv("CLASSIFICATION_CACHE_MAX_ENTRIES", "5000"))
+
     # Twilio
     twilio_account_sid: str = os.getenv("TWILIO_ACCOUNT_SID", "")
     twilio_auth_token: str = os.getenv("TWILIO_AUTH_TOKEN", "")
     twilio_phone_number: str = os.getenv("TWILIO_PHONE_NUMBER", "")
 
+    # Inbound SMS processing: "background" acknowledges the webhook right after
+    # persisting the message and replies from a worker pool; "inline" replies
+    # before returning (default on Lambda, which freezes once the response is sent)
+    sms_processing_mode: str = os.getenv(
+        "SMS_PROCESSING_MODE",
+        "inline" if os.getenv("ENVIRONMENT", "local") == "aws" else "background"
+    )
+    sms_worker_concurrency: int = int(os.getenv("SMS_WORKER_CONCURRENCY", "8"))
+    sms_queue_backend: str = os.getenv("SMS_QUEUE_BACKEND", "memory")  # "memory" or "sqlite"
+    sms_queue_path: str = os.getenv("SMS_QUEUE_PATH", "./sms_queue.db")
+    sms_queue_max_pending: int = int(os.getenv("SMS_QUEUE_MAX_PENDING", "1000"))
+    # SQLite queue: attempts before a job is parked as failed, and how long failed jobs are kept
+    sms_queue_max_attempts: int = int(os.getenv("SMS_QUEUE_MAX_ATTEMPTS", "3"))
+    sms_queue_failed_retention_hours: int = int(os.getenv("SMS_QUEUE_FAILED_RETENTION_HOURS", "168"))
+    # A reply claim older than this is treated as left by a crashed worker and taken over
+    sms_reply_claim_timeout_seconds: int = int(os.getenv("SMS_REPLY_CLAIM_TIMEOUT_SECONDS", "120"))
+
+    # Phone -> family identity cache (per process; bounded staleness across workers)
+    phone_identity_cache_ttl_seconds: int = int(os.getenv("PHONE_IDENTITY_CACHE_TTL_SECONDS", "300"))
+    phone_identity_cache_max_entries: int = int(os.getenv("PHONE_IDENTITY_CACHE_MAX_ENTRIES", "10000"))
+
     # Database
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./coo.db")
+    # Apply pending migrations at start-up (local only; AWS deploys invoke the function with {"action": "migrate"})
+    db_auto_migrate: bool = os.getenv(
+        "DB_AUTO_MIGRATE", "false" if os.getenv("ENVIRONMENT", "local") == "aws" else "true"
+    ).lower() == "true"
+    # Where the "schema verified" marker is written (Lambda: the only writable dir)
+    schema_marker_dir: str = os.getenv("SCHEMA_MARKER_DIR", "/tmp")
+    # AWS connection strategy: "lambda" (1 reused connection), "proxy" (RDS Proxy/PgBouncer) or "nullpool"
+    db_pool_mode: str = os.getenv("DB_POOL_MODE", "lambda")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "1"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "2"))
+    db_pool_timeout_seconds: int = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    db_pool_recycle_seconds: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "300"))
+    db_connect_timeout_seconds: int = int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "5"))
+    db_statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+    # Async sessions (asyncpg / aiosqlite) for the SMS webhook and message routes.
+    # Off in AWS: Lambda runs one request per container, so there is nothing to
+    # overlap and a second engine would hold a second connection.
+    async_db_enabled: bool = os.getenv(
+        "ASYNC_DB_ENABLED", "false" if os.getenv("ENVIRONMENT", "local") == "aws" else "true"
+    ).lower() == "true"
 
     # App settings
     app_name: str = "Coo - AI Parenting Companion"
@@ -1,26 +1,151 @@
 """Database connection and session management."""
+from contextlib import asynccontextmanager
+from typing import Any, Callable
+import threading
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 from .config import settings
 
-# Create engine with appropriate settings
-# For AWS Lambda, use NullPool to avoid connection pooling issues
-if settings.environment == "aws":
-    engine = create_engine(
-        settings.database_url,
-        poolclass=NullPool,
-        echo=False
+
+def create_db_engine(
+    database_url: str,
+    environment: str = "local",
+    pool_mode: str = "lambda",
+    statement_timeout_ms: int = 0,
+    echo: bool = False
+):
+    """
+    Create the SQLAlchemy engine for a deployment environment.
+
+    AWS (Lambda) pool modes:
+        "lambda": keep one connection per warm container (pool_size=1) and
+            reuse it across invocations, with a liveness pre-ping and
+            recycling before idle timeouts on RDS / NAT drop it.
+        "proxy": same pooling, but no per-connection startup options, which
+            RDS Proxy would pin and PgBouncer rejects. Set
+            statement_timeout on the proxy (init query) or the DB role.
+        "nullpool": open and close a connection per session (old behaviour).
+
+    Args:
+        database_url: SQLAlchemy database URL
+        environment: "local" or "aws"
+        pool_mode: "lambda", "proxy" or "nullpool" (aws only)
+        statement_timeout_ms: Server-side statement timeout, 0 for none (PostgreSQL)
+        echo: Log SQL statements
+
+    Returns:
+        SQLAlchemy Engine
+    """
+    if environment != "aws":
+        # For local development
+        return create_engine(
+            database_url,
+            connect_args={"check_same_thread": False} if "sqlite" in database_url else {},
+            echo=echo
+        )
+
+    if pool_mode == "nullpool":
+        return create_engine(database_url, poolclass=NullPool, echo=echo)
+
+    connect_args = {}
+    if database_url.startswith("postgresql"):
+        connect_args["connect_timeout"] = settings.db_connect_timeout_seconds
+        if pool_mode == "lambda" and statement_timeout_ms:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+
+    return create_engine(
+        database_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+        echo=echo
     )
-else:
-    # For local development
-    engine = create_engine(
-        settings.database_url,
-        connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
-        echo=True
+
+
+def to_async_url(database_url: str) -> str:
+    """
+    Map a sync database URL to its asyncio driver.
+
+    Args:
+        database_url: SQLAlchemy URL (postgresql://, postgresql+psycopg2://, sqlite://)
+
+    Returns:
+        URL using asyncpg (PostgreSQL) or aiosqlite (SQLite)
+    """
+    scheme, sep, rest = database_url.partition("://")
+    if scheme.startswith("postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return database_url
+
+
+def create_async_db_engine(
+    database_url: str,
+    environment: str = "local",
+    pool_mode: str = "lambda",
+    statement_timeout_ms: int = 0,
+    echo: bool = False
+):
+    """
+    Create the asyncio engine; mirrors create_db_engine's pool modes.
+
+    asyncpg takes `timeout` and `server_settings` instead of libpq's
+    connect_timeout and options.
+
+    Args:
+        database_url: Sync SQLAlchemy database URL (converted with to_async_url)
+        environment: "local" or "aws"
+        pool_mode: "lambda", "proxy" or "nullpool" (aws only)
+        statement_timeout_ms: Server-side statement timeout, 0 for none (PostgreSQL)
+        echo: Log SQL statements
+
+    Returns:
+        SQLAlchemy AsyncEngine
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async_url = to_async_url(database_url)
+    # Pool sizing only applies to PostgreSQL; aiosqlite's default pool rejects it
+    if environment != "aws" or async_url.startswith("sqlite"):
+        return create_async_engine(async_url, echo=echo)
+
+    if pool_mode == "nullpool":
+        return create_async_engine(async_url, poolclass=NullPool, echo=echo)
+
+    connect_args = {}
+    if async_url.startswith("postgresql"):
+        connect_args["timeout"] = settings.db_connect_timeout_seconds
+        if pool_mode == "lambda" and statement_timeout_ms:
+            connect_args["server_settings"] = {"statement_timeout": str(statement_timeout_ms)}
+
+    return create_async_engine(
+        async_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+        echo=echo
     )
 
+
+# Create engine with appropriate settings
+# For AWS Lambda, one pooled connection is reused for the life of a warm container
+engine = create_db_engine(
+    settings.database_url,
+    environment=settings.environment,
+    pool_mode=settings.db_pool_mode,
+    statement_timeout_ms=settings.db_statement_timeout_ms,
+    echo=settings.environment != "aws"
+)
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -37,7 +162,115 @@ def get_db():
         db.close()
 
 
+_async_session_factory = None
+_async_lock = threading.Lock()
+
+
+def async_session_factory():
+    """
+    Get the AsyncSession factory, creating the async engine on first use.
+
+    Created lazily so cold start does not import the async driver unless
+    an async route is hit. Sessions don't expire objects on commit, so
+    attributes stay readable after commit without another round trip.
+
+    Returns:
+        async_sessionmaker bound to the async engine
+    """
+    global _async_session_factory
+    if _async_session_factory is None:
+        with _async_lock:
+            if _async_session_factory is None:
+                from sqlalchemy.ext.asyncio import async_sessionmaker
+
+                async_engine = create_async_db_engine(
+                    settings.database_url,
+                    environment=settings.environment,
+                    pool_mode=settings.db_pool_mode,
+                    statement_timeout_ms=settings.db_statement_timeout_ms,
+                    echo=settings.environment != "aws"
+                )
+                _async_session_factory = async_sessionmaker(
+                    bind=async_engine, autoflush=False, expire_on_commit=False
+                )
+    return _async_session_factory
+
+
+async def get_async_db():
+    """Dependency for FastAPI routes to get an async database session."""
+    async with async_session_factory()() as db:
+        yield db
+
+
+@asynccontextmanager
+async def route_session():
+    """
+    Open the session used by the async hot paths (SMS webhook, message routes).
+
+    Yields an AsyncSession when ASYNC_DB_ENABLED is on, otherwise a sync
+    Session; use db_execute / db_run_sync so callers work with either.
+    """
+    if settings.async_db_enabled:
+        async with async_session_factory()() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def get_route_db():
+    """Dependency for the async hot-path routes (see route_session)."""
+    async with route_session() as db:
+        yield db
+
+
+def is_async_session(db) -> bool:
+    """Return True if db is an AsyncSession."""
+    return hasattr(db, "run_sync")
+
+
+async def db_execute(db, statement):
+    """
+    Execute a statement on a Session or AsyncSession.
+
+    Args:
+        db: Session or AsyncSession
+        statement: SQLAlchemy executable (e.g. select())
+
+    Returns:
+        Result
+    """
+    if is_async_session(db):
+        return await db.execute(statement)
+    return db.execute(statement)
+
+
+async def db_run_sync(db, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run sync ORM code (a function taking db=Session) on either session type.
+
+    With an AsyncSession the function runs through AsyncSession.run_sync:
+    its queries go over the async driver, so the event loop keeps serving
+    other requests while they wait on the database.
+
+    Args:
+        db: Session or AsyncSession
+        fn: Function accepting a `db` keyword argument
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        fn's return value
+    """
+    if is_async_session(db):
+        return await db.run_sync(lambda sync_db: fn(*args, db=sync_db, **kwargs))
+    return fn(*args, db=db, **kwargs)
+
+
 def init_db():
-    """Initialize database tables."""
-    from .models import models  # Import models to register them
-    Base.metadata.create_all(bind=engine)
+    """Create or migrate database tables (explicit step; see src/migrations.py)."""
+    from .migrations import upgrade
+    upgrade()
@@ -1,10 +1,32 @@
 """Lambda handler for AWS deployment using Mangum."""
 from mangum import Mangum
 from src.main import app
-from src.database import init_db
+from src.migrations import check_schema, get_current_version, upgrade
 
-# Initialize database tables on Lambda cold start
-init_db()
+# Mangum wraps FastAPI for AWS Lambda
+asgi_handler = Mangum(app, lifespan="off")
 
-# Lambda entry point - Mangum wraps FastAPI for AWS Lambda
-handler = Mangum(app, lifespan="off")
+_schema_checked = False
+
+
+def handler(event, context):
+    """
+    Lambda entry point.
+
+    A {"action": "migrate"} event (sent by the deploy scripts) applies
+    pending migrations. Every other event is an API Gateway request; the
+    first one in a container verifies the schema version (one query,
+    skipped once /tmp has the marker) and fails the request with
+    SchemaVersionError if migrations were not applied.
+    """
+    global _schema_checked
+
+    if isinstance(event, dict) and event.get("action") == "migrate":
+        applied = upgrade()
+        return {"applied": applied, "version": get_current_version()}
+
+    if not _schema_checked:
+        check_schema()
+        _schema_checked = True
+
+    return asgi_handler(event, context)
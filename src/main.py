@@ -3,7 +3,7 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from .database import init_db
+from .migrations import check_schema
 from .config import settings
 from .api.routes import sms, families, children, messages, tasks, rag, ai, workflows, auth, demo
 import os
@@ -39,8 +39,8 @@ app.include_router(demo.router)  # Demo endpoint with token protection
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup."""
-    init_db()
+    """Verify the database schema on startup (migrates locally, see src/migrations.py)."""
+    check_schema()
 
     # Seed demo data if SKIP_AUTH is enabled
     if os.getenv("SKIP_AUTH", "false").lower() == "true":
@@ -56,6 +56,18 @@ async def startup_event():
     print(f"[DB] Database: {settings.database_url}")
     print(f"[SMS] Twilio configured: {bool(settings.twilio_account_sid)}")
 
+    if settings.sms_processing_mode == "background":
+        from .services.sms_worker_pool import sms_worker_pool
+        await sms_worker_pool.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Let background SMS workers finish their current job."""
+    if settings.sms_processing_mode == "background":
+        from .services.sms_worker_pool import sms_worker_pool
+        await sms_worker_pool.stop()
+
 
 @app.get("/")
 async def root():
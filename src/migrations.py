@@ -0,0 +1,231 @@
+"""
+Versioned schema migrations.
+
+Schema changes are applied by an explicit step, not on every cold start:
+
+    python -m src.migrations upgrade     # apply pending migrations
+    python -m src.migrations status      # show current and latest version
+
+Applied versions are recorded in the schema_version table. At start-up the
+app only runs check_schema(), a single SELECT (skipped entirely once a
+marker file for this version and database exists, e.g. in Lambda's /tmp).
+In AWS the deploy scripts apply migrations by invoking the function with
+{"action": "migrate"} (see src/lambda_handler.py).
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional
+import argparse
+import hashlib
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from .database import Base, engine
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema is older than the code and may not be migrated automatically."""
+
+
+class Migration(NamedTuple):
+    """One schema change; upgrade must be safe to re-run on an existing table."""
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+# Kept out of Base.metadata so model create_all never touches it
+version_metadata = MetaData()
+schema_version_table = Table(
+    "schema_version",
+    version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+def _load_models():
+    """Import every model module so its tables are registered on Base.metadata."""
+    from .models import models, conversation_turn, indexes, sms_reply  # noqa: F401
+
+
+def _create_base_tables(conn: Connection):
+    _load_models()
+    tables = [t for t in Base.metadata.sorted_tables if t.name != "conversation_turns"]
+    Base.metadata.create_all(bind=conn, tables=tables)
+
+
+def _create_conversation_turns(conn: Connection):
+    from .models.conversation_turn import ConversationTurn
+    ConversationTurn.__table__.create(bind=conn, checkfirst=True)
+
+
+def _create_query_indexes(conn: Connection):
+    from .models.indexes import QUERY_INDEXES
+    for index in QUERY_INDEXES:
+        index.create(bind=conn, checkfirst=True)
+
+
+def _create_sms_replies(conn: Connection):
+    from .models.sms_reply import SMSReply
+    SMSReply.__table__.create(bind=conn, checkfirst=True)
+
+
+def _create_unique_twilio_sid(conn: Connection):
+    from .models.indexes import UNIQUE_INDEXES
+    from .models.models import Message
+
+    # Retries stored before the index existed: keep the SID on the first copy only
+    messages = Message.__table__
+    first_ids = select(func.min(messages.c.id)).where(
+        messages.c.twilio_sid.isnot(None)
+    ).group_by(messages.c.twilio_sid)
+    conn.execute(messages.update().where(
+        messages.c.twilio_sid.isnot(None), messages.c.id.notin_(first_ids)
+    ).values(twilio_sid=None))
+
+    for index in UNIQUE_INDEXES:
+        index.create(bind=conn, checkfirst=True)
+
+
+def _create_unknown_sender_replies(conn: Connection):
+    from .models.sms_reply import UnknownSenderReply
+    UnknownSenderReply.__table__.create(bind=conn, checkfirst=True)
+
+
+# Append new migrations here; never renumber or edit an applied one
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Baseline tables (families, children, messages, ...)", _create_base_tables),
+    Migration(2, "Append-only conversation_turns table", _create_conversation_turns),
+    Migration(3, "Composite indexes for hot queries (messages, tasks, lookups)", _create_query_indexes),
+    Migration(4, "sms_replies table (one reply per inbound message)", _create_sms_replies),
+    Migration(5, "Unique index on messages.twilio_sid", _create_unique_twilio_sid),
+    Migration(6, "sms_unknown_sender_replies table", _create_unknown_sender_replies),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def get_current_version(bind: Engine = engine) -> int:
+    """
+    Read the applied schema version with a single query.
+
+    Args:
+        bind: Engine to query
+
+    Returns:
+        Highest applied version, or 0 if the schema_version table is missing
+
+    Raises:
+        SQLAlchemyError: The database is unreachable or the query failed
+            (only a missing table counts as version 0)
+    """
+    with bind.connect() as conn:
+        if not inspect(conn).has_table(schema_version_table.name):
+            return 0
+        return conn.execute(select(func.max(schema_version_table.c.version))).scalar() or 0
+
+
+def upgrade(target: Optional[int] = None, bind: Engine = engine) -> List[int]:
+    """
+    Apply pending migrations in order, each in its own transaction.
+
+    Args:
+        target: Stop after this version (default: latest)
+        bind: Engine to migrate
+
+    Returns:
+        Versions applied by this call
+    """
+    target = SCHEMA_VERSION if target is None else target
+    version_metadata.create_all(bind=bind)
+    current = get_current_version(bind)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if current < migration.version <= target:
+            with bind.begin() as conn:
+                migration.upgrade(conn)
+                conn.execute(schema_version_table.insert().values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.utcnow()
+                ))
+            print(f"[DB] Applied migration {migration.version}: {migration.description}")
+            applied.append(migration.version)
+    return applied
+
+
+def _marker_path() -> Path:
+    """Marker file for this schema version and database URL."""
+    from .config import settings
+
+    url_hash = hashlib.sha256(settings.database_url.encode()).hexdigest()[:12]
+    return Path(settings.schema_marker_dir) / f"coo-schema-v{SCHEMA_VERSION}-{url_hash}"
+
+
+def check_schema(bind: Engine = engine) -> bool:
+    """
+    Verify the database is at the latest schema version.
+
+    A marker file short-circuits the check for warm containers and later
+    cold starts on the same host; otherwise one SELECT is issued. If the
+    schema is behind and DB_AUTO_MIGRATE is on (local development), the
+    pending migrations are applied.
+
+    Args:
+        bind: Engine to check
+
+    Returns:
+        True if the schema is current
+
+    Raises:
+        SchemaVersionError: Schema is behind and DB_AUTO_MIGRATE is off, so
+            requests would fail on missing tables or columns
+    """
+    from .config import settings
+
+    marker = _marker_path()
+    if marker.exists():
+        return True
+
+    current = get_current_version(bind)
+    if current < SCHEMA_VERSION:
+        if not settings.db_auto_migrate:
+            raise SchemaVersionError(
+                f"Schema version {current} < {SCHEMA_VERSION}; run: python -m src.migrations upgrade "
+                f"(AWS: invoke the function with {{\"action\": \"migrate\"}})"
+            )
+        upgrade(bind=bind)
+
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+    except OSError as e:
+        print(f"[DB] Could not write schema marker {marker}: {e}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coo database migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="Apply pending migrations")
+    upgrade_parser.add_argument("--target", type=int, help="Stop after this version")
+    subparsers.add_parser("status", help="Show applied and pending migrations")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = upgrade(target=args.target)
+        print(f"[DB] Schema at version {get_current_version()} ({len(applied)} applied)")
+    else:
+        current = get_current_version()
+        print(f"[DB] Schema version {current} (latest {SCHEMA_VERSION})")
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version <= current else "pending"
+            print(f"  {migration.version:>3}  {state:<8} {migration.description}")
+
+
+if __name__ == "__main__":
+    main()
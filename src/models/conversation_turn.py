@@ -0,0 +1,28 @@
+"""Append-only conversation turn storage."""
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from datetime import datetime
+from ..database import Base
+
+
+class ConversationTurn(Base):
+    """
+    One message in an SMS conversation.
+
+    Turns are only ever inserted; history is read as the last N rows for a
+    (family_id, phone) pair. Conversation metadata (active child, flow
+    state) stays on ConversationContext.
+    """
+
+    __tablename__ = "conversation_turns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    family_id = Column(Integer, nullable=False)
+    phone = Column(String, nullable=False)
+    role = Column(String(16), nullable=False)  # "user" or "assistant"
+    content = Column(Text, nullable=False)
+    turn_metadata = Column("metadata", JSON, nullable=True)  # question_type, child_id
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_conversation_turns_family_phone_id", "family_id", "phone", "id"),
+    )
@@ -0,0 +1,32 @@
+"""Composite indexes for the access paths the services query."""
+from sqlalchemy import Index
+from .models import ConversationContext, Family, Message, PhoneLookup, ScheduledTask
+
+
+# Each index is named after the query it serves. Declaring them here
+# attaches them to the model tables, so create_all (migration 1 on a fresh
+# database) builds them too; migration 3 adds them to existing databases.
+QUERY_INDEXES = [
+    # ConversationSession load: family_id = ? AND phone = ?
+    Index("ix_conversation_context_family_phone", ConversationContext.family_id, ConversationContext.phone),
+    # Message history and stats: family_id = ? ORDER BY created_at DESC
+    Index("ix_message_family_created_at", Message.family_id, Message.created_at),
+    # Conversation by phone: from_phone = ? OR to_phone = ? ORDER BY created_at DESC
+    Index("ix_message_from_phone_created_at", Message.from_phone, Message.created_at),
+    Index("ix_message_to_phone_created_at", Message.to_phone, Message.created_at),
+    # Due tasks: status = 'pending' AND scheduled_for <= now ORDER BY scheduled_for
+    Index("ix_scheduled_task_status_scheduled_for", ScheduledTask.status, ScheduledTask.scheduled_for),
+    # Tasks for a child / family ORDER BY scheduled_for
+    Index("ix_scheduled_task_child_scheduled_for", ScheduledTask.child_id, ScheduledTask.scheduled_for),
+    Index("ix_scheduled_task_family_scheduled_for", ScheduledTask.family_id, ScheduledTask.scheduled_for),
+    # Webhook sender lookup (identity cache miss)
+    Index("ix_phone_lookup_phone", PhoneLookup.phone),
+    # Signup duplicate checks and login
+    Index("ix_family_primary_email", Family.primary_email),
+    Index("ix_family_primary_phone", Family.primary_phone),
+]
+
+# Webhook deduplication relies on inserts of a repeated MessageSid failing
+UNIQUE_INDEXES = [
+    Index("uq_message_twilio_sid", Message.twilio_sid, unique=True),
+]
@@ -0,0 +1,38 @@
+"""Record of inbound SMS messages that have been answered."""
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from ..database import Base
+
+
+class SMSReply(Base):
+    """
+    Claim on answering one inbound message.
+
+    The reply pipeline inserts the row ("processing") before it starts and
+    sets the outcome status once the reply is sent, so a requeued job, a
+    Twilio retry or a concurrent worker never sends a second reply. A
+    failed run deletes its claim so a retry can answer; a claim left by a
+    crashed worker can be taken over once it is stale.
+    """
+
+    __tablename__ = "sms_replies"
+
+    message_id = Column(Integer, primary_key=True)  # inbound Message.id
+    family_id = Column(Integer, nullable=False)
+    status = Column(String(32), nullable=False)  # "processing" or the pipeline outcome status
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class UnknownSenderReply(Base):
+    """
+    Inbound SMS from an unregistered phone that got the welcome message.
+
+    Unknown senders' messages are not stored in messages, so this is what
+    lets a Twilio retry on another container see the SID was handled.
+    """
+
+    __tablename__ = "sms_unknown_sender_replies"
+
+    message_sid = Column(String(64), primary_key=True)
+    phone = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,10 +1,29 @@
 """AI service for intelligent question answering and symptom triage using Claude API."""
-from anthropic import Anthropic
-from typing import Dict, Optional, List
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, List
 from ..config import settings
 from .rag_service import rag_service
-import os
+from .llm_client import AsyncBedrockRuntime, create_async_anthropic_client
+from .cache_service import classification_cache, content_digest, response_cache
+from .keyword_classifier import keyword_classifier
+from .embedding_classifier import embedding_classifier
+from .retrieval_filters import build_retrieval_filters
+from .context_builder import parse_budgets
+from .lazy import LazyService
+from .prompt_cache import LocalPromptCacheStub, PromptCacheStats, normalize_usage, system_blocks, user_content
+import asyncio
 import json
+import re
+
+
+# Async callback receiving text deltas while a streaming request is active
+token_sink: ContextVar[Optional[Callable[[str], Awaitable[None]]]] = ContextVar("token_sink", default=None)
+
+# Label attached to streamed tokens (e.g. the workflow step producing them)
+stream_step: ContextVar[Optional[str]] = ContextVar("stream_step", default=None)
+
+# Stands in for the child's name in cached SMS answers so they can be shared
+CHILD_NAME_PLACEHOLDER = "{child_name}"
 
 
 class AIService:
@@ -14,21 +33,33 @@ class AIService:
         """Initialize AI service with Claude API or AWS Bedrock."""
         self.client = None
         self.bedrock_runtime = None
+        self.prompt_cache_stub = None
         self.provider = settings.ai_provider
+        self.prompt_caching = settings.prompt_caching_enabled
+        self.prompt_cache_stats = PromptCacheStats()
 
         if self.provider == "anthropic":
             if settings.anthropic_api_key:
-                self.client = Anthropic(api_key=settings.anthropic_api_key)
+                self.client = create_async_anthropic_client(
+                    api_key=settings.anthropic_api_key,
+                    max_connections=settings.llm_max_connections
+                )
         elif self.provider == "bedrock":
             try:
-                import boto3
-                self.bedrock_runtime = boto3.client(
-                    'bedrock-runtime',
-                    region_name=settings.aws_region
+                self.bedrock_runtime = AsyncBedrockRuntime(
+                    region_name=settings.aws_region,
+                    max_connections=settings.llm_max_connections
                 )
             except Exception as e:
                 print(f"[AI] Error initializing Bedrock: {e}")
 
+        elif self.provider == "stub":
+            # Offline provider for measuring prompt caching (no network, canned answers)
+            self.prompt_cache_stub = LocalPromptCacheStub(min_tokens=settings.prompt_cache_min_tokens)
+
+        # Context token budget per use case (None: no trimming)
+        self.context_budgets = parse_budgets(settings.rag_context_token_budgets)
+
         # System prompts for different use cases
         self.system_prompts = {
             "general": """You are Coo, a helpful and empathetic AI parenting assistant.
@@ -56,18 +87,38 @@ Be clear and concise. Direct them to the web portal for account changes.
 Keep responses under 300 characters for SMS."""
         }
 
-    def _call_model(self, messages: List[Dict], system_prompt: str, max_tokens: int = 200) -> Dict:
+    async def _call_model(self, messages: List[Dict], system_prompt: str, max_tokens: int = 200) -> Dict:
         """
         Abstract model call - works with both Anthropic and Bedrock.
 
+        Both providers are awaited on shared connection pools, so a slow
+        model call never blocks the event loop. When a token sink is active
+        (see stream_events), the completion is streamed and each text delta
+        is forwarded to the sink as it arrives. With prompt caching on, the
+        system prompt carries a cache_control breakpoint (messages built with
+        prompt_cache.user_content carry their own), and cached-token usage is
+        recorded in prompt_cache_stats.
+
         Args:
             messages: List of message dicts with 'role' and 'content'
             system_prompt: System prompt for the model
             max_tokens: Maximum tokens to generate
 
         Returns:
-            Dict with response text and metadata
+            Dict with response text, metadata and token usage
         """
+        sink = token_sink.get()
+        system = system_blocks(system_prompt, self.prompt_caching)
+
+        if self.provider == "stub":
+            response_body = self.prompt_cache_stub.create(
+                model="stub", max_tokens=max_tokens, system=system, messages=messages
+            )
+            text = response_body["content"][0]["text"]
+            if sink:
+                await sink(text)
+            return self._with_usage({"text": text, "model": "stub", "provider": "stub"}, response_body["usage"])
+
         if self.provider == "anthropic":
             if not self.client:
                 return {
@@ -75,19 +126,29 @@ Keep responses under 300 characters for SMS."""
                     "error": "no_api_key"
                 }
 
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=max_tokens,
-                system=system_prompt,
-                messages=messages
-            )
+            if sink:
+                async with self.client.messages.stream(
+                    model="claude-3-5-sonnet-20241022",
+                    max_tokens=max_tokens,
+                    system=system,
+                    messages=messages
+                ) as stream:
+                    async for text in stream.text_stream:
+                        await sink(text)
+                    response = await stream.get_final_message()
+            else:
+                response = await self.client.messages.create(
+                    model="claude-3-5-sonnet-20241022",
+                    max_tokens=max_tokens,
+                    system=system,
+                    messages=messages
+                )
 
-            return {
+            return self._with_usage({
                 "text": response.content[0].text,
                 "model": "claude-3-5-sonnet-20241022",
-                "tokens": response.usage.output_tokens if hasattr(response, 'usage') else None,
                 "provider": "anthropic"
-            }
+            }, getattr(response, 'usage', None))
 
         elif self.provider == "bedrock":
             if not self.bedrock_runtime:
@@ -100,23 +161,23 @@ Keep responses under 300 characters for SMS."""
                 body = json.dumps({
                     "anthropic_version": "bedrock-2023-05-31",
                     "max_tokens": max_tokens,
-                    "system": system_prompt,
+                    "system": system,
                     "messages": messages
                 })
 
-                response = self.bedrock_runtime.invoke_model(
+                if sink:
+                    return await self._stream_bedrock(body, sink)
+
+                response_body = await self.bedrock_runtime.invoke_model(
                     modelId=settings.bedrock_model_id,
                     body=body
                 )
 
-                response_body = json.loads(response['body'].read())
-
-                return {
+                return self._with_usage({
                     "text": response_body['content'][0]['text'],
                     "model": settings.bedrock_model_id,
-                    "tokens": response_body.get('usage', {}).get('output_tokens'),
                     "provider": "bedrock"
-                }
+                }, response_body.get('usage'))
 
             except Exception as e:
                 return {
@@ -124,7 +185,89 @@ Keep responses under 300 characters for SMS."""
                     "error": str(e)
                 }
 
-    def answer_question(
+    async def _stream_bedrock(self, body: str, sink: Callable[[str], Awaitable[None]]) -> Dict:
+        """
+        Stream a Claude completion from Bedrock, forwarding text deltas to sink.
+
+        Args:
+            body: JSON-encoded Anthropic messages request
+            sink: Async callback receiving each text delta
+
+        Returns:
+            Dict with the full response text and metadata
+        """
+        parts = []
+        usage = {}
+
+        async for chunk in self.bedrock_runtime.invoke_model_stream(
+            modelId=settings.bedrock_model_id,
+            body=body
+        ):
+            if chunk.get("type") == "content_block_delta":
+                text = chunk.get("delta", {}).get("text", "")
+                if text:
+                    parts.append(text)
+                    await sink(text)
+            elif chunk.get("type") == "message_start":
+                # Input and cached-token counts arrive up front
+                usage.update(chunk.get("message", {}).get("usage", {}))
+            elif chunk.get("type") == "message_delta":
+                usage.update(chunk.get("usage", {}))
+
+        return self._with_usage({
+            "text": "".join(parts),
+            "model": settings.bedrock_model_id,
+            "provider": "bedrock"
+        }, usage)
+
+    def _with_usage(self, result: Dict, usage) -> Dict:
+        """Attach normalized token usage to a model result and record it."""
+        usage = normalize_usage(usage)
+        self.prompt_cache_stats.record(usage)
+        return {**result, "tokens": usage["output_tokens"], "usage": usage}
+
+    async def stream_events(self, run: Callable[[], Awaitable[Dict]]) -> AsyncIterator[Dict]:
+        """
+        Run a coroutine with token streaming enabled and yield its events.
+
+        Every model call made while run() executes streams its completion.
+        Events are dicts ready to be serialized as NDJSON:
+        {"type": "token", "step": ..., "text": ...} for each text delta,
+        then {"type": "result", "data": ...} or {"type": "error", "error": ...}.
+
+        Args:
+            run: Zero-argument coroutine factory (e.g. lambda: self.answer_question(...))
+
+        Yields:
+            Event dicts in arrival order
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def sink(text: str):
+            await queue.put({"type": "token", "step": stream_step.get(), "text": text})
+
+        async def runner():
+            token_sink.set(sink)
+            try:
+                await queue.put({"type": "result", "data": await run()})
+            except Exception as e:
+                await queue.put({"type": "error", "error": str(e)})
+            finally:
+                await queue.put(None)
+
+        task = asyncio.create_task(runner())
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            # Client went away mid-stream - stop generating
+            if not task.done():
+                task.cancel()
+
+    async def answer_question(
         self,
         question: str,
         context: Optional[str] = None,
@@ -143,27 +286,41 @@ Keep responses under 300 characters for SMS."""
         Returns:
             Dict with answer, sources used, and metadata
         """
-        if not self.client and not self.bedrock_runtime:
+        if not self.client and not self.bedrock_runtime and not self.prompt_cache_stub:
             return {
                 "answer": "AI service not configured. Please add ANTHROPIC_API_KEY to your .env file or configure Bedrock.",
                 "sources": 0,
                 "error": "no_api_key"
             }
 
+        # Answers generated from caller-supplied context are only shared
+        # with requests passing the same context
+        cache_scope = f"{use_case}:{max_tokens}"
+        if context:
+            cache_scope += f":ctx-{content_digest(context)}"
+        if settings.response_cache_enabled:
+            cached = await response_cache.get_async(question, cache_scope)
+            if cached is not None:
+                return {**cached, "cached": True}
+
         # Get context from RAG if not provided
         if not context:
-            context = rag_service.get_context_for_question(question, n_results=5)
+            context = await asyncio.to_thread(
+                rag_service.get_context_for_question, question, 5,
+                token_budget=self.context_budgets.get(use_case)
+            )
 
-        # Build the prompt
+        # Build the prompt (resources first so repeated retrievals share a cached prefix)
         if context:
-            user_message = f"""Based on the following trusted parenting resources, please answer this question:
+            user_message = user_content(
+                f"Trusted parenting resources:\n{context}",
+                f"""Based on the trusted parenting resources above, please answer this question:
 
 Question: {question}
 
-Resources:
-{context}
-
-Please provide a helpful, accurate answer based on these resources."""
+Please provide a helpful, accurate answer based on these resources.""",
+                self.prompt_caching
+            )
         else:
             user_message = f"""Question: {question}
 
@@ -171,7 +328,7 @@ Note: No specific resources found, but please provide general evidence-based par
 
         try:
             # Call model (works with both Anthropic and Bedrock)
-            result = self._call_model(
+            result = await self._call_model(
                 messages=[{"role": "user", "content": user_message}],
                 system_prompt=self.system_prompts.get(use_case, self.system_prompts["general"]),
                 max_tokens=max_tokens
@@ -184,7 +341,7 @@ Note: No specific resources found, but please provide general evidence-based par
                     "sources": 0
                 }
 
-            return {
+            response = {
                 "answer": result["text"],
                 "sources": len(context.split("[Source")) - 1 if context else 0,
                 "model": result.get("model"),
@@ -193,6 +350,11 @@ Note: No specific resources found, but please provide general evidence-based par
                 "provider": result.get("provider")
             }
 
+            if settings.response_cache_enabled:
+                await response_cache.set_async(question, cache_scope, response)
+
+            return response
+
         except Exception as e:
             return {
                 "answer": f"I'm having trouble processing your question right now. Please try again or consult your pediatrician.",
@@ -200,7 +362,7 @@ Note: No specific resources found, but please provide general evidence-based par
                 "sources": 0
             }
 
-    def triage_symptoms(self, symptom_description: str, child_age_months: Optional[int] = None) -> Dict:
+    async def triage_symptoms(self, symptom_description: str, child_age_months: Optional[int] = None) -> Dict:
         """
         Triage symptoms and provide urgency assessment.
 
@@ -212,9 +374,11 @@ Note: No specific resources found, but please provide general evidence-based par
             Dict with urgency level, recommended action, and explanation
         """
         # Get relevant symptom information from knowledge base
-        context = rag_service.get_context_for_question(
+        context = await asyncio.to_thread(
+            rag_service.get_context_for_question,
             f"symptoms: {symptom_description}",
-            n_results=3
+            3,
+            token_budget=self.context_budgets.get("symptom_triage")
         )
 
         age_context = f"\nChild's age: {child_age_months} months old" if child_age_months else ""
@@ -237,7 +401,7 @@ ACTION: [what to do]
 REASON: [why]"""
 
         try:
-            result = self._call_model(
+            result = await self._call_model(
                 messages=[{"role": "user", "content": user_message}],
                 system_prompt=self.system_prompts["symptom_triage"],
                 max_tokens=300
@@ -285,7 +449,7 @@ REASON: [why]"""
                 "sources": 0
             }
 
-    def generate_sms_response(
+    async def generate_sms_response(
         self,
         question: str,
         max_length: int = 300,
@@ -315,15 +479,39 @@ REASON: [why]"""
         }
         use_case = use_case_map.get(question_type, "general")
 
-        # Get RAG context - enhance query with child age if available
+        # Serve repeated questions from cache (keyed on age bucket, not the
+        # child); follow-ups depend on the conversation, so it is in the key
+        cache_age = child_context.get("age_months") if child_context else None
+        cache_name = child_context.get("name") if child_context else None
+        cache_scope = f"sms:{use_case}:{max_length}"
+        if conversation_history:
+            cache_scope += f":hist-{content_digest(conversation_history)}"
+        if settings.response_cache_enabled:
+            cached = await response_cache.get_async(question, cache_scope, cache_age)
+            if cached is not None:
+                return cached.replace(CHILD_NAME_PLACEHOLDER, cache_name or "your child")
+
+        # Get RAG context - restrict to the question's category and the child's
+        # age (relaxed when too few chunks match), else hint the age in the query
         enhanced_query = question
-        if child_context:
+        rag_filters = None
+        if settings.rag_metadata_filters:
+            rag_filters = build_retrieval_filters(question_type, child_context)
+        elif child_context:
             age_months = child_context.get("age_months")
-            name = child_context.get("name")
             if age_months is not None:
                 enhanced_query = f"child age {age_months} months: {question}"
 
-        context = rag_service.get_context_for_question(enhanced_query, n_results=5)
+        # Keyword-categorized questions contain the exact terms BM25 matches on,
+        # so they can skip the embedding model when configured
+        rag_mode = None
+        if settings.rag_bm25_for_keyword_hits and keyword_classifier.classify(question) != "general":
+            rag_mode = "bm25"
+
+        context = await asyncio.to_thread(
+            rag_service.get_context_for_question, enhanced_query, 5, rag_mode, rag_filters,
+            self.context_budgets.get("sms")
+        )
 
         # Build enhanced prompt with conversation history and child context
         context_parts = []
@@ -347,18 +535,19 @@ REASON: [why]"""
 
         context_prefix = "\n".join(context_parts)
 
-        # Build user message
+        # Build user message (resources first so repeated retrievals share a cached prefix)
         if context:
-            user_message = f"""Based on the following trusted parenting resources, please answer this question:
+            user_message = user_content(
+                f"Trusted parenting resources:\n{context}",
+                f"""Based on the trusted parenting resources above, please answer this question:
 
 {context_prefix}
 
 Current question: {question}
 
-Resources:
-{context}
-
-Please provide a helpful, accurate answer based on these resources. Keep it under {max_length} characters for SMS."""
+Please provide a helpful, accurate answer based on these resources. Keep it under {max_length} characters for SMS.""",
+                self.prompt_caching
+            )
         else:
             user_message = f"""{context_prefix}
 
@@ -367,7 +556,7 @@ Current question: {question}
 Note: No specific resources found, but please provide general evidence-based parenting guidance. Keep it under {max_length} characters for SMS."""
 
         try:
-            result = self._call_model(
+            result = await self._call_model(
                 messages=[{"role": "user", "content": user_message}],
                 system_prompt=self.system_prompts.get(use_case, self.system_prompts["general"]),
                 max_tokens=150
@@ -382,14 +571,21 @@ Note: No specific resources found, but please provide general evidence-based par
             if len(answer) > max_length:
                 answer = answer[:max_length-3] + "..."
 
+            if settings.response_cache_enabled:
+                shared_answer = answer
+                if cache_name:
+                    # Whole words only - "Al" must not rewrite "also"
+                    shared_answer = re.sub(rf"\b{re.escape(cache_name)}\b", CHILD_NAME_PLACEHOLDER, answer)
+                await response_cache.set_async(question, cache_scope, shared_answer, cache_age)
+
             return answer
 
         except Exception as e:
             return "I'm having trouble processing your question. Please try again or consult your pediatrician."
 
-    def classify_question_type(self, question: str, child_context: dict = None) -> str:
+    async def classify_question_type(self, question: str, child_context: dict = None) -> str:
         """
-        Hybrid classification: Keywords first, then Nova Lite fallback.
+        Tiered classification: keywords, then local embeddings, then Nova Lite.
 
         Args:
             question: User's question
@@ -400,13 +596,46 @@ Note: No specific resources found, but please provide general evidence-based par
         """
         # First try keyword-based classification (fast, free)
         category = self._classify_with_keywords(question)
+        if category != "general" or len(question) <= 10:
+            return category
 
-        # If no keywords matched and LLM classification is enabled, use Nova Lite
-        if category == "general" and settings.use_llm_classification and len(question) > 10:
-            category = self._classify_with_nova_lite(question, child_context)
+        # Repeated questions reuse the result of the slower tiers
+        age_months = child_context.get("age_months") if child_context else None
+        if settings.classification_cache_enabled:
+            cached = classification_cache.get(question, age_months)
+            if cached is not None:
+                return cached
+
+        category, cacheable = await self._classify_uncertain(question, child_context)
+
+        if settings.classification_cache_enabled and cacheable:
+            classification_cache.set(question, category, age_months)
 
         return category
 
+    async def _classify_uncertain(self, question: str, child_context: dict = None):
+        """
+        Classify a question the keyword table could not place.
+
+        Returns:
+            Tuple of (category, cacheable); results are not cacheable when
+            Nova Lite was needed but did not answer
+        """
+        # Local embedding classifier (a few ms, no network)
+        if settings.use_embedding_classification:
+            prediction = await asyncio.to_thread(embedding_classifier.predict, question)
+            if prediction and prediction["confident"]:
+                return prediction["category"], True
+
+        # Only uncertain questions escalate to Nova Lite
+        if settings.use_llm_classification:
+            category = await self._classify_with_nova_lite(question, child_context, default=None)
+            if category is None:
+                return "general", False
+            return category, True
+
+        return "general", True
+
     def _classify_with_keywords(self, question: str) -> str:
         """
         Keyword-based classification (Tier 1).
@@ -417,83 +646,23 @@ Note: No specific resources found, but please provide general evidence-based par
         Returns:
             Question type based on keyword matching
         """
-        text_lower = question.lower()
-
-        # Vaccine-related
-        vaccine_keywords = [
-            "vaccine", "vaccination", "shot", "immunization",
-            "dtap", "mmr", "pcv", "hep", "hepatitis", "varicella",
-            "rotavirus", "hib", "polio", "flu shot"
-        ]
-        if any(keyword in text_lower for keyword in vaccine_keywords):
-            return "vaccine"
-
-        # Symptom/health-related
-        symptom_keywords = [
-            "fever", "sick", "cough", "cold", "vomit", "diarrhea",
-            "rash", "pain", "hurt", "crying", "fussy", "won't eat",
-            "sleep", "temperature", "congested", "runny nose"
-        ]
-        if any(keyword in text_lower for keyword in symptom_keywords):
-            return "symptom"
-
-        # Development/milestones
-        development_keywords = [
-            "milestone", "development", "walking", "talking", "crawling",
-            "sit up", "stand", "words", "babbling", "delayed"
-        ]
-        if any(keyword in text_lower for keyword in development_keywords):
-            return "development"
-
-        # Activities/classes
-        activity_keywords = [
-            "class", "swimming", "music", "dance", "sport", "activity",
-            "lesson", "gym", "playgroup"
-        ]
-        if any(keyword in text_lower for keyword in activity_keywords):
-            return "activity"
-
-        # Education (preschool, kindergarten)
-        education_keywords = [
-            "preschool", "kindergarten", "school", "daycare", "pre-k"
-        ]
-        if any(keyword in text_lower for keyword in education_keywords):
-            return "education"
-
-        # Pregnancy
-        pregnancy_keywords = [
-            "pregnant", "pregnancy", "trimester", "due date", "ultrasound",
-            "prenatal", "expecting"
-        ]
-        if any(keyword in text_lower for keyword in pregnancy_keywords):
-            return "pregnancy"
-
-        # Account management
-        account_keywords = [
-            "add child", "add a child", "add another child", "register child",
-            "can i add", "how to add", "how do i add",
-            "new child", "new baby", "subscription", "upgrade", "account",
-            "profile", "add member", "family member", "change password",
-            "delete account", "cancel", "sign up", "register"
-        ]
-        if any(keyword in text_lower for keyword in account_keywords):
-            return "account_management"
-
-        return "general"
-
-    def _classify_with_nova_lite(self, question: str, child_context: dict = None) -> str:
+        return keyword_classifier.classify(question)
+
+    async def _classify_with_nova_lite(self, question: str, child_context: dict = None, default: Optional[str] = "general") -> Optional[str]:
         """
         AI-powered classification using Nova Lite (Tier 2 - fallback only).
 
         Args:
             question: User's question
             child_context: Optional child context (age, name)
+            default: Returned when Nova Lite is unavailable, fails or answers
+                with an unknown category
 
         Returns:
             Question type from AI classification
         """
         if self.provider != "bedrock" or not self.bedrock_runtime:
-            return "general"  # Fallback if Bedrock not available
+            return default  # Fallback if Bedrock not available
 
         # Build context string
         context_str = ""
@@ -521,13 +690,11 @@ Respond with ONLY the category name (one word, lowercase)."""
                 "top_p": 0.9
             })
 
-            response = self.bedrock_runtime.invoke_model(
+            result = await self.bedrock_runtime.invoke_model(
                 modelId=settings.bedrock_classifier_model,  # amazon.nova-lite-v1:0
                 body=body
             )
 
-            result = json.loads(response['body'].read())
-
             # Parse Nova Lite response format
             if 'output' in result and 'message' in result['output']:
                 category = result['output']['message']['content'][0]['text'].strip().lower()
@@ -546,12 +713,12 @@ Respond with ONLY the category name (one word, lowercase)."""
                 print(f"[AI] Nova Lite classified '{question[:30]}...' as: {category}")
                 return category
             else:
-                print(f"[AI] Nova Lite returned invalid category '{category}', defaulting to 'general'")
-                return "general"
+                print(f"[AI] Nova Lite returned invalid category '{category}', defaulting to '{default}'")
+                return default
 
         except Exception as e:
             print(f"[AI] Nova Lite classification error: {e}")
-            return "general"  # Fallback to general on error
+            return default  # Fallback on error
 
     def check_emergency_keywords(self, text: str) -> bool:
         """
@@ -563,16 +730,8 @@ Respond with ONLY the category name (one word, lowercase)."""
         Returns:
             True if emergency keywords detected
         """
-        emergency_keywords = [
-            "can't breathe", "not breathing", "unconscious", "unresponsive",
-            "severe bleeding", "seizure", "convulsion", "turning blue",
-            "severe pain", "chest pain", "head injury", "poisoning",
-            "allergic reaction", "swelling throat", "choking"
-        ]
-
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in emergency_keywords)
+        return keyword_classifier.has_category(text, "emergency")
 
 
-# Global AI service instance
-ai_service = AIService()
+# Global AI service instance (model clients are created on first use)
+ai_service = LazyService(AIService, "ai_service")
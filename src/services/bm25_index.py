@@ -0,0 +1,258 @@
+"""Lexical BM25 index over knowledge base chunks (pure Python, no model needed)."""
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import math
+import os
+import re
+
+
+BM25_FILE = "bm25.json"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Kept short on purpose: medical abbreviations ("hib", "mmr", "ipv") must survive
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in is it its "
+    "me my of on or our should so that the their them there these they this to was we "
+    "what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords ("DTaP" -> "dtap")."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def metadata_matches(metadata: Dict, where: Optional[Dict]) -> bool:
+    """
+    Evaluate a ChromaDB-style where clause against one metadata dict.
+
+    Supports the same operators as NumpyVectorIndex.build_mask.
+
+    Args:
+        metadata: Chunk metadata
+        where: Filter clause (None matches everything)
+
+    Returns:
+        True if the chunk passes the filter
+    """
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(metadata_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(metadata_matches(metadata, clause) for clause in condition):
+                return False
+        else:
+            conditions = condition if isinstance(condition, dict) else {"$eq": condition}
+            value = metadata.get(key)
+            for op, expected in conditions.items():
+                if not _compare(value, op, expected):
+                    return False
+    return True
+
+
+def _compare(value: Any, op: str, expected: Any) -> bool:
+    if op == "$eq":
+        return value == expected
+    if op == "$ne":
+        return value != expected
+    if op == "$in":
+        return value in expected
+    if op == "$nin":
+        return value not in expected
+    if value is None:
+        return False
+    if op == "$gt":
+        return value > expected
+    if op == "$gte":
+        return value >= expected
+    if op == "$lt":
+        return value < expected
+    if op == "$lte":
+        return value <= expected
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def reciprocal_rank_fusion(result_lists: Iterable[List[Dict]], n_results: int = 5, k: int = 60) -> List[Dict]:
+    """
+    Merge ranked result lists with reciprocal-rank fusion.
+
+    Each document scores sum(1 / (k + rank)) over the lists it appears in,
+    so rankings on incomparable scales (cosine distance, BM25) combine
+    without calibration.
+
+    Args:
+        result_lists: Ranked lists of result dicts with an "id" key
+        n_results: Number of results to return
+        k: RRF damping constant (60 is the usual default)
+
+    Returns:
+        Fused results, best first, each with an added "rrf_score"
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Dict] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, 1):
+            doc_id = doc.get("id")
+            if doc_id is None:
+                continue
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(doc_id, doc)
+
+    fused = sorted(scores, key=scores.get, reverse=True)[:n_results]
+    return [{**documents[doc_id], "rrf_score": round(scores[doc_id], 6)} for doc_id in fused]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk texts.
+
+    Catches exact terms parents text ("DTaP", "Hib", "Tdap") that sentence
+    embeddings blur together. The index is a JSON file stored next to the
+    vector index and carries the chunk texts itself, so lexical search
+    needs neither numpy nor the embedding model.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict],
+        term_freqs: List[Dict[str, int]],
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        """
+        Initialize index (use build() or load() rather than calling this directly).
+
+        Args:
+            ids: Chunk IDs
+            documents: Chunk texts
+            metadatas: Chunk metadata dicts
+            term_freqs: Per-chunk token counts
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.term_freqs = term_freqs
+        self.k1 = k1
+        self.b = b
+
+        self.doc_lengths = [sum(tf.values()) for tf in term_freqs]
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+        # Inverted index: term -> [(chunk position, tf)]
+        self.postings: Dict[str, List[tuple]] = {}
+        for position, tf in enumerate(term_freqs):
+            for term, count in tf.items():
+                self.postings.setdefault(term, []).append((position, count))
+
+        n = len(ids)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    @classmethod
+    def build(cls, ids: List[str], documents: List[str], metadatas: List[Dict], **params) -> "BM25Index":
+        """
+        Tokenize chunks and build an index.
+
+        Args:
+            ids: Chunk IDs
+            documents: Chunk texts
+            metadatas: Chunk metadata dicts
+            **params: k1 / b overrides
+
+        Returns:
+            BM25Index
+        """
+        term_freqs = [dict(Counter(tokenize(doc))) for doc in documents]
+        return cls(list(ids), list(documents), list(metadatas), term_freqs, **params)
+
+    def save(self, directory: str):
+        """
+        Write the index to <directory>/bm25.json (atomically).
+
+        Args:
+            directory: Index directory (normally the vector index directory)
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        data = {
+            "params": {"k1": self.k1, "b": self.b},
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+            "term_freqs": self.term_freqs
+        }
+        tmp = path / f".{BM25_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path / BM25_FILE)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["BM25Index"]:
+        """
+        Load an index written by save().
+
+        Args:
+            directory: Index directory
+
+        Returns:
+            BM25Index, or None if the directory has no BM25 index
+        """
+        path = Path(directory) / BM25_FILE
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["documents"], data["metadatas"], data["term_freqs"], **data.get("params", {}))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, n_results: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        """
+        Rank chunks by BM25 score.
+
+        Args:
+            query: Search query text
+            n_results: Number of results to return
+            where: Optional ChromaDB-style metadata filter
+
+        Returns:
+            List of documents with content, metadata, score and id, best
+            first (chunks sharing no term with the query are omitted)
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for position, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / self.avg_length)
+                scores[position] = scores.get(position, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        documents = []
+        for position in ranked:
+            if not metadata_matches(self.metadatas[position], where):
+                continue
+            documents.append({
+                "content": self.documents[position],
+                "metadata": self.metadatas[position],
+                "score": round(scores[position], 4),
+                "id": self.ids[position]
+            })
+            if len(documents) >= n_results:
+                break
+        return documents
@@ -0,0 +1,497 @@
+"""Response caching for repeated parenting questions."""
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from .embedding_service import embedding_service
+from .lazy import LazyService
+
+
+# Upper bounds (in months) of the age buckets used in cache keys
+AGE_BUCKETS = [3, 6, 12, 24, 36, 60]
+
+
+# Punctuation dropped from cache keys; a decimal point between digits is kept
+# so "100.4" and "100 4" (or "1004") stay different questions
+PUNCTUATION = re.compile(r"(?!(?<=\d)\.(?=\d))[^\w\s]")
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize question text for cache keys.
+
+    Lowercases, drops punctuation (but not decimal points) and collapses
+    whitespace so that "Normal temperature for a baby?" and "normal
+    temperature for a baby" share a key.
+    """
+    text = PUNCTUATION.sub(" ", text.lower())
+    return " ".join(text.split())
+
+
+def content_digest(text: str) -> str:
+    """
+    Short hash of text that changes an answer (context, conversation history).
+
+    Added to a cache scope so answers are only shared between requests
+    that sent the model the same extra content.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def age_bucket(age_months: Optional[int]) -> str:
+    """
+    Map a child's age to a coarse bucket for cache keys.
+
+    Args:
+        age_months: Child age in months (None if unknown)
+
+    Returns:
+        Bucket label such as "0-3m", "13-24m" or "any"
+    """
+    if age_months is None:
+        return "any"
+
+    lower = 0
+    for upper in AGE_BUCKETS:
+        if age_months <= upper:
+            return f"{lower}-{upper}m"
+        lower = upper + 1
+    return f"{lower}m+"
+
+
+class InMemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1000):
+        """
+        Initialize in-memory backend.
+
+        Args:
+            max_entries: Maximum entries before least-recently-used eviction
+        """
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        """Store value with a TTL, evicting the oldest entries when full."""
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        """Remove a key if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    SQLite-backed cache with the same get/set/delete surface as Redis.
+
+    Stands in for a shared cache so several local workers see the same
+    entries; values must be JSON-serializable.
+    """
+
+    def __init__(self, path: str = "./response_cache.db", max_entries: int = 1000):
+        """
+        Initialize SQLite backend.
+
+        Args:
+            path: SQLite database file
+            max_entries: Maximum entries before least-recently-used eviction
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            if row[1] < now:
+                self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                return None
+
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        """Store value with a TTL, evicting the oldest entries when full."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl_seconds, now)
+            )
+            overflow = len(self) - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN ("
+                    "SELECT key FROM cache_entries ORDER BY accessed_at LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+
+    def delete(self, key: str):
+        """Remove a key if present."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Cache of AI answers keyed on normalized question, use case and age bucket.
+
+    Exact matches are looked up in the backend. When semantic matching is
+    enabled, near-duplicate questions within the same use case and age bucket
+    are matched by cosine similarity of their MiniLM embeddings.
+
+    Semantic matching is deliberately conservative:
+    - Questions only match if they mention the same numbers ("fever of
+      101" never returns the answer cached for "fever of 104").
+    - Use cases where a near-miss answer is unsafe (semantic_exclude, by
+      default symptom triage and emergencies) only get exact matches.
+    - Embeddings are kept in process memory, so with the SQLite backend
+      other workers share exact hits but not semantic ones.
+    """
+
+    def __init__(
+        self,
+        backend,
+        ttl_seconds: int = 86400,
+        semantic: bool = False,
+        similarity_threshold: float = 0.92,
+        min_words: int = 3,
+        semantic_exclude: Iterable[str] = ("symptom_triage", "emergency")
+    ):
+        """
+        Initialize response cache.
+
+        Args:
+            backend: InMemoryCacheBackend or SQLiteCacheBackend
+            ttl_seconds: Time-to-live for cached answers
+            semantic: Enable embedding-similarity lookup for near-duplicates
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            min_words: Questions shorter than this are not cached (too
+                dependent on conversation history)
+            semantic_exclude: Use cases that never get semantic matches
+                (any ":"-separated part of the cache scope)
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.min_words = min_words
+        self.semantic_exclude = set(semantic_exclude)
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "skipped": 0}
+        # scope -> OrderedDict(cache key -> (embedding, numbers)), bounded like the backend
+        self._vectors: Dict[str, "OrderedDict[str, Any]"] = {}
+        self._lock = threading.Lock()
+
+    def _scope(self, use_case: str, age_months: Optional[int]) -> str:
+        return f"{use_case}|{age_bucket(age_months)}"
+
+    def _key(self, normalized: str, scope: str) -> str:
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+        return f"resp:{scope}:{digest}"
+
+    def _cacheable(self, normalized: str) -> bool:
+        return len(normalized.split()) >= self.min_words
+
+    def _semantic_allowed(self, use_case: str) -> bool:
+        return self.semantic and not self.semantic_exclude.intersection(use_case.split(":"))
+
+    def get(self, question: str, use_case: str, age_months: Optional[int] = None) -> Optional[Any]:
+        """
+        Look up a cached answer.
+
+        Args:
+            question: Raw question text
+            use_case: Use case the answer was generated for
+            age_months: Child age in months (bucketed)
+
+        Returns:
+            Cached value or None on miss
+        """
+        normalized = normalize_text(question)
+        if not self._cacheable(normalized):
+            self.stats["skipped"] += 1
+            return None
+
+        scope = self._scope(use_case, age_months)
+        value = self.backend.get(self._key(normalized, scope))
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+
+        if self._semantic_allowed(use_case):
+            value = self._semantic_get(normalized, scope)
+            if value is not None:
+                self.stats["semantic_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, question: str, use_case: str, value: Any, age_months: Optional[int] = None):
+        """
+        Store an answer.
+
+        Args:
+            question: Raw question text
+            use_case: Use case the answer was generated for
+            value: JSON-serializable answer payload
+            age_months: Child age in months (bucketed)
+        """
+        normalized = normalize_text(question)
+        if not self._cacheable(normalized):
+            return
+
+        scope = self._scope(use_case, age_months)
+        key = self._key(normalized, scope)
+        self.backend.set(key, value, self.ttl_seconds)
+        self.stats["stores"] += 1
+
+        if self._semantic_allowed(use_case):
+            vectors = embedding_service.encode([normalized])
+            if vectors is not None:
+                with self._lock:
+                    scoped = self._vectors.setdefault(scope, OrderedDict())
+                    scoped[key] = (vectors[0], NUMBER.findall(normalized))
+                    while len(scoped) > self.backend.max_entries:
+                        scoped.popitem(last=False)
+
+    async def get_async(self, question: str, use_case: str, age_months: Optional[int] = None) -> Optional[Any]:
+        """
+        Look up a cached answer from async code.
+
+        With semantic matching on, the lookup embeds the question, so it
+        runs in a worker thread to keep the event loop free.
+        """
+        if not self._semantic_allowed(use_case):
+            return self.get(question, use_case, age_months)
+        return await asyncio.to_thread(self.get, question, use_case, age_months)
+
+    async def set_async(self, question: str, use_case: str, value: Any, age_months: Optional[int] = None):
+        """Store an answer from async code (embedding runs in a worker thread)."""
+        if not self._semantic_allowed(use_case):
+            self.set(question, use_case, value, age_months)
+            return
+        await asyncio.to_thread(self.set, question, use_case, value, age_months)
+
+    def _semantic_get(self, normalized: str, scope: str) -> Optional[Any]:
+        """Find the most similar cached question in the same scope with the same numbers."""
+        numbers = NUMBER.findall(normalized)
+        with self._lock:
+            scoped = self._vectors.get(scope)
+            if not scoped:
+                return None
+            entries = [(key, vector) for key, (vector, key_numbers) in scoped.items() if key_numbers == numbers]
+        if not entries:
+            return None
+        keys = [key for key, _ in entries]
+        candidates = [vector for _, vector in entries]
+
+        query = embedding_service.encode([normalized])
+        if query is None:
+            return None
+
+        import numpy as np
+        similarities = np.stack(candidates) @ query[0]
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        value = self.backend.get(keys[best])
+        if value is None:
+            # Expired or evicted from the backend - forget the vector too
+            with self._lock:
+                scoped.pop(keys[best], None)
+        return value
+
+    def clear(self):
+        """Remove all cached answers."""
+        self.backend.clear()
+        with self._lock:
+            self._vectors.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache hit/miss counters.
+
+        Returns:
+            Dict with counters, hit rate and backend size
+        """
+        lookups = self.stats["hits"] + self.stats["semantic_hits"] + self.stats["misses"]
+        hits = self.stats["hits"] + self.stats["semantic_hits"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self.backend),
+            "evictions": self.backend.evictions,
+            "backend": type(self.backend).__name__,
+            "semantic": self.semantic
+        }
+
+
+class ClassificationCache:
+    """
+    LRU + TTL memo of question type keyed on normalized question and age bucket.
+
+    Only holds results of the slower classification tiers (embeddings and
+    Nova Lite); keyword matches are cheaper than a lookup.
+    """
+
+    def __init__(self, ttl_seconds: int = 21600, max_entries: int = 5000):
+        """
+        Initialize classification cache.
+
+        Args:
+            ttl_seconds: Time-to-live for cached categories
+            max_entries: Maximum entries before least-recently-used eviction
+        """
+        self.backend = InMemoryCacheBackend(max_entries=max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    def _key(self, question: str, age_months: Optional[int]) -> str:
+        return f"cls:{age_bucket(age_months)}:{normalize_text(question)}"
+
+    def get(self, question: str, age_months: Optional[int] = None) -> Optional[str]:
+        """
+        Look up a cached category.
+
+        Args:
+            question: Raw question text
+            age_months: Child age in months (bucketed)
+
+        Returns:
+            Category or None on miss
+        """
+        category = self.backend.get(self._key(question, age_months))
+        self.stats["hits" if category is not None else "misses"] += 1
+        return category
+
+    def set(self, question: str, category: str, age_months: Optional[int] = None):
+        """Store the final category for a question."""
+        self.backend.set(self._key(question, age_months), category, self.ttl_seconds)
+        self.stats["stores"] += 1
+
+    def clear(self):
+        """Remove all cached categories."""
+        self.backend.clear()
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache hit/miss counters.
+
+        Returns:
+            Dict with counters, hit rate and cache size
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self.backend),
+            "max_entries": self.backend.max_entries,
+            "evictions": self.backend.evictions,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+def _create_response_cache() -> ResponseCache:
+    """Build the response cache configured in settings."""
+    from ..config import settings
+
+    if settings.response_cache_backend == "sqlite":
+        backend = SQLiteCacheBackend(
+            path=settings.response_cache_path,
+            max_entries=settings.response_cache_max_entries
+        )
+    else:
+        backend = InMemoryCacheBackend(max_entries=settings.response_cache_max_entries)
+
+    return ResponseCache(
+        backend=backend,
+        ttl_seconds=settings.response_cache_ttl_seconds,
+        semantic=settings.response_cache_semantic,
+        similarity_threshold=settings.response_cache_similarity_threshold,
+        semantic_exclude=[u.strip() for u in settings.response_cache_semantic_exclude.split(",") if u.strip()]
+    )
+
+
+def _create_classification_cache() -> ClassificationCache:
+    """Build the classification cache configured in settings."""
+    from ..config import settings
+
+    return ClassificationCache(
+        ttl_seconds=settings.classification_cache_ttl_seconds,
+        max_entries=settings.classification_cache_max_entries
+    )
+
+
+# Global response cache instance (built on first use)
+response_cache = LazyService(_create_response_cache, "response_cache")
+
+# Global classification cache instance
+classification_cache = _create_classification_cache()
@@ -0,0 +1,201 @@
+"""Token-budgeted context assembly from retrieved knowledge base chunks."""
+from typing import Dict, List, Optional
+import math
+import re
+
+from .bm25_index import tokenize
+
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9#*\-\"(])")
+
+# Longest chunk overlap to look for when merging neighbours (indexer uses 50 words)
+MAX_OVERLAP_WORDS = 100
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (~4 characters per token for English text)."""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def parse_budgets(spec: str) -> Dict[str, int]:
+    """
+    Parse a "use_case:tokens,..." budget setting.
+
+    Args:
+        spec: e.g. "sms:400,general:1200"
+
+    Returns:
+        Dict of use case -> token budget
+    """
+    budgets = {}
+    for item in spec.split(","):
+        if ":" in item:
+            name, value = item.split(":", 1)
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+def _strip_overlap(previous: str, current: str) -> str:
+    """
+    Drop the words at the start of `current` that repeat the end of `previous`.
+
+    Words are compared on whitespace boundaries, but the rest of `current`
+    keeps its original spacing, newlines and markdown list markers.
+    """
+    previous_words = previous.split()
+    # Alternating [whitespace, word, whitespace, word, ...]
+    tokens = re.split(r"(\S+)", current)
+    current_words = tokens[1::2]
+    limit = min(MAX_OVERLAP_WORDS, len(previous_words), len(current_words))
+    for size in range(limit, 0, -1):
+        if previous_words[-size:] == current_words[:size]:
+            return "".join(tokens[2 * size:])
+    return current
+
+
+class ContextBuilder:
+    """
+    Builds a compact context string from ranked retrieval results.
+
+    1. Chunks from the same file are grouped; consecutive chunk_ids are
+       merged with the word overlap the indexer adds removed, and exact
+       duplicates are dropped.
+    2. The merged passages are split into sentences, and sentences are
+       ranked by how many distinct query terms they contain (ties go to
+       the better-ranked source, then document order).
+    3. Sentences are taken in that order until the token budget is
+       spent (a passage's "[Source i - category]" header is charged with
+       its first selected sentence), then printed back in document order
+       under those headers. Passages with no selected sentence get no
+       header.
+    """
+
+    def merge_chunks(self, results: List[Dict]) -> List[Dict]:
+        """
+        Group results by source file and merge adjacent chunks.
+
+        Args:
+            results: Search results (content, metadata), best first
+
+        Returns:
+            One passage per source: {"source", "category", "text", "rank"},
+            in order of the source's best result
+        """
+        groups: Dict[str, Dict] = {}
+        for rank, doc in enumerate(results):
+            metadata = doc.get("metadata") or {}
+            source = metadata.get("source") or doc.get("id") or f"result_{rank}"
+            group = groups.setdefault(source, {
+                "source": source,
+                "category": metadata.get("category", "general"),
+                "rank": rank,
+                "chunks": {}
+            })
+            chunk_id = metadata.get("chunk_id", rank)
+            group["chunks"].setdefault(chunk_id, doc["content"])
+
+        passages = []
+        for group in groups.values():
+            text = ""
+            previous_id = None
+            for chunk_id in sorted(group["chunks"]):
+                chunk = group["chunks"][chunk_id]
+                if previous_id is None:
+                    text = chunk.strip()
+                elif chunk_id == previous_id + 1:
+                    rest = _strip_overlap(text, chunk)
+                    if rest.strip():
+                        # The whitespace left in front of `rest` is the original
+                        # separator after the overlapping words
+                        text += rest.rstrip() if rest[:1].isspace() else " " + rest.strip()
+                else:
+                    # Gap between chunks: keep the passages apart
+                    text = text + "\n" + chunk.strip()
+                previous_id = chunk_id
+            passages.append({
+                "source": group["source"],
+                "category": group["category"],
+                "text": text.strip(),
+                "rank": group["rank"]
+            })
+        return passages
+
+    def _header_tokens(self, number: int, passage: Dict) -> int:
+        """Tokens for a passage's "[Source i - category]" line and its separator."""
+        return estimate_tokens(f"[Source {number} - {passage['category']}]\n") + 1
+
+    def build(self, query: str, results: List[Dict], token_budget: Optional[int] = None) -> Dict:
+        """
+        Assemble context for a question within a token budget.
+
+        Args:
+            query: User's question
+            results: Search results, best first
+            token_budget: Maximum context tokens (None: merge and de-duplicate only)
+
+        Returns:
+            Dict with context, tokens, raw_tokens (verbatim concatenation),
+            saved_tokens and sources
+        """
+        raw_tokens = sum(
+            estimate_tokens(f"[Source {i} - {doc.get('metadata', {}).get('category', 'general')}]\n{doc['content']}\n")
+            for i, doc in enumerate(results, 1)
+        )
+        passages = self.merge_chunks(results)
+        query_terms = set(tokenize(query))
+
+        # (passage index, position, sentence, score)
+        sentences = []
+        seen = set()
+        for p, passage in enumerate(passages):
+            for position, sentence in enumerate(SENTENCE_SPLIT.split(passage["text"])):
+                key = sentence.strip().lower()
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                score = len(query_terms.intersection(tokenize(sentence)))
+                sentences.append((p, position, sentence.strip(), score))
+
+        # A passage's header is charged when its first sentence is selected
+        selected = set()
+        opened = set()
+        used = 0
+        ranked = sorted(sentences, key=lambda s: (-s[3], passages[s[0]]["rank"], s[1]))
+        for p, position, sentence, _ in ranked:
+            cost = estimate_tokens(sentence) + 1
+            if p not in opened:
+                cost += self._header_tokens(len(opened) + 1, passages[p])
+            if token_budget is not None and used + cost > token_budget:
+                continue
+            selected.add((p, position))
+            opened.add(p)
+            used += cost
+
+        # Budget smaller than any single sentence: keep the start of the best
+        # one, if its header leaves room for some of it
+        if not selected and sentences and token_budget:
+            p, position, sentence, _ = ranked[0]
+            chars = (token_budget - self._header_tokens(1, passages[p])) * 4
+            if chars > 0:
+                sentences[sentences.index(ranked[0])] = (p, position, sentence[:chars], 0)
+                selected.add((p, position))
+
+        context_parts = []
+        for p, passage in enumerate(passages):
+            kept = [s for (sp, position, s, _) in sentences if sp == p and (sp, position) in selected]
+            if kept:
+                context_parts.append(f"[Source {len(context_parts) + 1} - {passage['category']}]\n{' '.join(kept)}\n")
+
+        context = "\n".join(context_parts)
+        tokens = estimate_tokens(context)
+        return {
+            "context": context,
+            "tokens": tokens,
+            "raw_tokens": raw_tokens,
+            "saved_tokens": max(0, raw_tokens - tokens),
+            "sources": len(context_parts)
+        }
+
+
+# Global context builder instance
+context_builder = ContextBuilder()
@@ -2,57 +2,389 @@
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
+from sqlalchemy.orm.attributes import flag_modified
+from ..database import db_run_sync
 from ..models.models import ConversationContext, Child
-import json
+from ..models.conversation_turn import ConversationTurn
+from .identity_cache import phone_identity_cache
+import copy
 
 
-class ConversationService:
-    """Manages conversation context and history for multi-turn dialogues."""
+def _empty_context_data() -> Dict:
+    return {"metadata": {}}
 
-    def __init__(self):
-        """Initialize conversation service."""
-        self.max_messages = 50  # Keep last 50 messages
-        self.context_timeout_hours = 24  # Reset context after 24 hours of inactivity
 
-    def get_or_create_context(self, family_id: int, phone: str, db: Session) -> ConversationContext:
+def _turn_to_message(turn: ConversationTurn) -> Dict:
+    return {
+        "role": turn.role,
+        "content": turn.content,
+        "timestamp": turn.created_at.isoformat(),
+        "metadata": turn.turn_metadata or {}
+    }
+
+
+class ConversationSession:
+    """
+    Request-scoped view of one conversation.
+
+    The ConversationContext row (conversation metadata) is read once when
+    the session is opened, and history is read lazily as the last N
+    ConversationTurn rows. New messages are appended as turn rows, so
+    save() costs one INSERT per message plus one small UPDATE of the
+    context row regardless of conversation length.
+
+    Contexts written before turns existed keep their messages inside
+    context_data; these are served as history and moved into turn rows on
+    the first save.
+    """
+
+    def __init__(self, family_id: int, phone: str, db: Session, max_messages: int, context_timeout_hours: int):
         """
-        Get existing conversation context or create new one.
+        Load (or prepare) the conversation context.
 
         Args:
             family_id: Family ID
             phone: Phone number
             db: Database session
-
-        Returns:
-            ConversationContext object
+            max_messages: Maximum number of messages returned as history
+            context_timeout_hours: Inactivity after which the context is reset
         """
-        context = db.query(ConversationContext).filter(
+        self.family_id = family_id
+        self.phone = phone
+        self.db = db
+        self.max_messages = max_messages
+        self._dirty = False
+        self._reset_at: Optional[datetime] = None
+        self._pending: List[ConversationTurn] = []
+        self._recent: Optional[List[Dict]] = None
+        self._recent_limit = 0
+        self._is_new = False
+
+        self.context = db.query(ConversationContext).filter(
             ConversationContext.family_id == family_id,
             ConversationContext.phone == phone
         ).first()
 
-        if not context:
-            context = ConversationContext(
+        if not self.context:
+            self.context = ConversationContext(
                 family_id=family_id,
                 phone=phone,
                 message_count=0,
-                context_data={"messages": [], "metadata": {}}
+                context_data=_empty_context_data()
             )
-            db.add(context)
-            db.commit()
-            db.refresh(context)
+            self._is_new = True
+            self._dirty = True
+            self._recent = []
+            self._recent_limit = max_messages
+
+        self.data = copy.deepcopy(self.context.context_data) if self.context.context_data else _empty_context_data()
+        self.data.setdefault("metadata", {})
+        # Messages stored in the blob by older versions, if any
+        self._legacy_messages: Optional[List[Dict]] = self.data.pop("messages", None) or None
 
         # Check if context should be reset (24 hours of inactivity)
-        elif context.updated_at:
-            time_since_update = datetime.utcnow() - context.updated_at
-            if time_since_update > timedelta(hours=self.context_timeout_hours):
-                # Reset old context
-                context.context_data = {"messages": [], "metadata": {}}
-                context.message_count = 0
-                context.last_context_reset = datetime.utcnow()
-                db.commit()
+        if not self._dirty and self.context.updated_at:
+            time_since_update = datetime.utcnow() - self.context.updated_at
+            if time_since_update > timedelta(hours=context_timeout_hours):
+                self.clear()
+
+    @property
+    def metadata(self) -> Dict:
+        return self.data["metadata"]
+
+    def add_message(self, role: str, content: str, metadata: Optional[Dict] = None):
+        """
+        Add a message to the conversation.
+
+        Args:
+            role: "user" or "assistant"
+            content: Message content
+            metadata: Optional small metadata (child_id, question_type, etc.)
+        """
+        self._pending.append(ConversationTurn(
+            family_id=self.family_id,
+            phone=self.phone,
+            role=role,
+            content=content,
+            turn_metadata=metadata if metadata else {},
+            created_at=datetime.utcnow()
+        ))
+        self._dirty = True
+
+    def _stored_history(self, last_n: int) -> List[Dict]:
+        """Last N messages already persisted (one bounded query per request)."""
+        if self._legacy_messages is not None:
+            return self._legacy_messages[-last_n:]
+
+        if self._recent is None or (self._recent_limit < last_n and len(self._recent) >= self._recent_limit):
+            query = self.db.query(ConversationTurn).filter(
+                ConversationTurn.family_id == self.family_id,
+                ConversationTurn.phone == self.phone
+            )
+            if self.context.last_context_reset:
+                query = query.filter(ConversationTurn.created_at >= self.context.last_context_reset)
+            turns = query.order_by(ConversationTurn.id.desc()).limit(last_n).all()
+            self._recent = [_turn_to_message(turn) for turn in reversed(turns)]
+            self._recent_limit = last_n
+
+        return self._recent[-last_n:]
+
+    def get_history(self, last_n: int = 10) -> List[Dict]:
+        """Get the last N messages, including ones added in this session."""
+        last_n = min(last_n, self.max_messages)
+        if last_n <= 0:
+            return []
+
+        pending = [_turn_to_message(turn) for turn in self._pending]
+        if len(pending) >= last_n:
+            return pending[-last_n:]
+
+        return self._stored_history(last_n - len(pending)) + pending
+
+    def format_for_ai(self, last_n: int = 5) -> str:
+        """Format the last N exchanges as conversation history for the model."""
+        history = self.get_history(last_n * 2)
+
+        if not history:
+            return ""
+
+        formatted = "Previous conversation:\n"
+        for msg in history:
+            role = "Parent" if msg["role"] == "user" else "Coo"
+            content = msg["content"]
+            formatted += f"{role}: {content}\n"
+
+        return formatted
+
+    def get_active_child(self) -> Optional[Dict]:
+        """Get the child the parent is currently asking about."""
+        return self.metadata.get("active_child")
+
+    def set_active_child(
+        self,
+        child_id: int,
+        child_name: str,
+        child_age_months: int,
+        pregnancy_week: Optional[int] = None
+    ):
+        """
+        Set the active child.
+
+        Args:
+            child_id: Child's database ID
+            child_name: Child's name
+            child_age_months: Child's age in months
+            pregnancy_week: Current pregnancy week (pregnancies only)
+        """
+        self.metadata["active_child"] = {
+            "child_id": child_id,
+            "name": child_name,
+            "age_months": child_age_months,
+            "pregnancy_week": pregnancy_week,
+            "set_at": datetime.utcnow().isoformat()
+        }
+        self._dirty = True
+
+    def get_state(self) -> Optional[str]:
+        """Get current conversation state (for multi-turn flows)."""
+        return self.metadata.get("conversation_state")
+
+    def get_state_data(self) -> Optional[Dict]:
+        """Get data stored with current conversation state."""
+        return self.metadata.get("state_data")
+
+    def set_state(self, state: Optional[str], state_data: Optional[Dict] = None):
+        """
+        Set conversation state for multi-turn flows.
+
+        Args:
+            state: State name (e.g., "adding_child_name") or None to clear
+            state_data: Optional data to store with state
+        """
+        if state:
+            self.metadata["conversation_state"] = state
+            if state_data:
+                self.metadata["state_data"] = state_data
+        else:
+            # Clear state
+            self.metadata.pop("conversation_state", None)
+            self.metadata.pop("state_data", None)
+        self._dirty = True
+
+    def clear(self):
+        """
+        Reset history and metadata.
+
+        Turn rows are kept; history only includes turns after the reset.
+        """
+        self.data = _empty_context_data()
+        self._legacy_messages = None
+        self._pending = []
+        self._recent = []
+        self._recent_limit = self.max_messages
+        self._reset_at = datetime.utcnow()
+        self._dirty = True
+
+    def save(self):
+        """Write all changes made in this session with one commit (no-op if unchanged)."""
+        if not self._dirty:
+            return
+
+        if self._legacy_messages is not None:
+            # Move blob messages into turn rows once; the blob keeps metadata only
+            self.db.add_all([
+                ConversationTurn(
+                    family_id=self.family_id,
+                    phone=self.phone,
+                    role=msg.get("role", "user"),
+                    content=msg.get("content", ""),
+                    turn_metadata=msg.get("metadata") or {},
+                    created_at=datetime.fromisoformat(msg["timestamp"]) if msg.get("timestamp") else datetime.utcnow()
+                )
+                for msg in self._legacy_messages
+            ])
+            self._recent = list(self._legacy_messages)
+            self._recent_limit = len(self._recent)
+            self._legacy_messages = None
+
+        if self._is_new:
+            self.db.add(self.context)
+            self._is_new = False
+        self.db.add_all(self._pending)
+
+        self.context.context_data = self.data
+        flag_modified(self.context, "context_data")
+        if self._reset_at:
+            self.context.last_context_reset = self._reset_at
+            self.context.message_count = 0
+        self.context.message_count = (self.context.message_count or 0) + len(self._pending)
+        self.context.updated_at = datetime.utcnow()
+
+        saved = [_turn_to_message(turn) for turn in self._pending]
+        self.db.commit()
+
+        # The rows were just written - keep working on private copies
+        if self._recent is not None:
+            self._recent.extend(saved)
+            self._recent_limit += len(saved)
+        self.data = copy.deepcopy(self.data)
+        self._pending = []
+        self._dirty = False
+        self._reset_at = None
+
+
+class AsyncConversationSession:
+    """
+    Async front for a ConversationSession used by the SMS pipeline.
+
+    The wrapped session's queries (lazy history load, save) run through
+    db_run_sync, so with an AsyncSession they don't block the event loop.
+    In-memory methods (add_message, get_state, set_active_child, ...) are
+    passed through unchanged. Pass `session` to sync code that expects a
+    ConversationSession, inside db_run_sync.
+    """
+
+    def __init__(self, session: ConversationSession, db):
+        """
+        Initialize wrapper.
+
+        Args:
+            session: Loaded ConversationSession bound to db's sync session
+            db: Session or AsyncSession the conversation was opened on
+        """
+        self.session = session
+        self.db = db
+
+    def __getattr__(self, name: str):
+        return getattr(self.session, name)
+
+    async def get_history(self, last_n: int = 10) -> List[Dict]:
+        """Get the last N messages, including ones added in this session."""
+        return await db_run_sync(self.db, lambda db: self.session.get_history(last_n))
 
-        return context
+    async def format_for_ai(self, last_n: int = 5) -> str:
+        """Format the last N exchanges as conversation history for the model."""
+        return await db_run_sync(self.db, lambda db: self.session.format_for_ai(last_n))
+
+    async def save(self):
+        """Write all changes made in this session with one commit (no-op if unchanged)."""
+        await db_run_sync(self.db, lambda db: self.session.save())
+
+
+class ConversationService:
+    """Manages conversation context and history for multi-turn dialogues."""
+
+    def __init__(self):
+        """Initialize conversation service."""
+        self.max_messages = 50  # Keep last 50 messages
+        self.context_timeout_hours = 24  # Reset context after 24 hours of inactivity
+
+    def open_session(self, family_id: int, phone: str, db: Session) -> ConversationSession:
+        """
+        Load a conversation once for the duration of a request.
+
+        Call save() on the returned session to persist its changes.
+
+        Args:
+            family_id: Family ID
+            phone: Phone number
+            db: Database session
+
+        Returns:
+            ConversationSession for the family/phone pair
+        """
+        return ConversationSession(
+            family_id=family_id,
+            phone=phone,
+            db=db,
+            max_messages=self.max_messages,
+            context_timeout_hours=self.context_timeout_hours
+        )
+
+    async def open_session_async(self, family_id: int, phone: str, db) -> AsyncConversationSession:
+        """
+        Async version of open_session.
+
+        Args:
+            family_id: Family ID
+            phone: Phone number
+            db: Session or AsyncSession
+
+        Returns:
+            AsyncConversationSession for the family/phone pair
+        """
+        session = await db_run_sync(db, self.open_session, family_id, phone)
+        return AsyncConversationSession(session, db)
+
+    async def extract_child_from_message_async(self, message: str, family_id: int, db) -> Optional[Dict]:
+        """
+        Async version of extract_child_from_message.
+
+        Args:
+            message: User's message
+            family_id: Family ID
+            db: Session or AsyncSession (queried only on an identity cache miss)
+
+        Returns:
+            Dict with child info if identified, None otherwise
+        """
+        return await db_run_sync(db, self.extract_child_from_message, message, family_id)
+
+    def get_or_create_context(self, family_id: int, phone: str, db: Session) -> ConversationContext:
+        """
+        Get existing conversation context or create new one.
+
+        Args:
+            family_id: Family ID
+            phone: Phone number
+            db: Database session
+
+        Returns:
+            ConversationContext object
+        """
+        session = self.open_session(family_id, phone, db)
+        session.save()
+        return session.context
 
     def add_message_to_context(
         self,
@@ -74,32 +406,9 @@ class ConversationService:
             db: Database session
             metadata: Optional metadata (child_id, question_type, etc.)
         """
-        context = self.get_or_create_context(family_id, phone, db)
-
-        # Get current context data
-        context_data = context.context_data if context.context_data else {"messages": [], "metadata": {}}
-        messages = context_data.get("messages", [])
-
-        # Add new message
-        message_entry = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.utcnow().isoformat(),
-            "metadata": metadata if metadata else {}
-        }
-        messages.append(message_entry)
-
-        # Keep only last N messages
-        if len(messages) > self.max_messages:
-            messages = messages[-self.max_messages:]
-
-        # Update context
-        context_data["messages"] = messages
-        context.context_data = context_data
-        context.message_count = len(messages)
-        context.updated_at = datetime.utcnow()
-
-        db.commit()
+        session = self.open_session(family_id, phone, db)
+        session.add_message(role, content, metadata)
+        session.save()
 
     def get_conversation_history(
         self,
@@ -120,18 +429,7 @@ class ConversationService:
         Returns:
             List of messages in format: [{"role": "user", "content": "..."}, ...]
         """
-        context = db.query(ConversationContext).filter(
-            ConversationContext.family_id == family_id,
-            ConversationContext.phone == phone
-        ).first()
-
-        if not context or not context.context_data:
-            return []
-
-        messages = context.context_data.get("messages", [])
-
-        # Return last N messages
-        return messages[-last_n:] if messages else []
+        return self.open_session(family_id, phone, db).get_history(last_n)
 
     def get_active_child_context(
         self,
@@ -183,21 +481,9 @@ class ConversationService:
             child_age_months: Child's age in months
             db: Database session
         """
-        context = self.get_or_create_context(family_id, phone, db)
-
-        context_data = context.context_data if context.context_data else {"messages": [], "metadata": {}}
-        metadata = context_data.get("metadata", {})
-
-        metadata["active_child"] = {
-            "child_id": child_id,
-            "name": child_name,
-            "age_months": child_age_months,
-            "set_at": datetime.utcnow().isoformat()
-        }
-
-        context_data["metadata"] = metadata
-        context.context_data = context_data
-        db.commit()
+        session = self.open_session(family_id, phone, db)
+        session.set_active_child(child_id, child_name, child_age_months)
+        session.save()
 
     def extract_child_from_message(
         self,
@@ -222,8 +508,8 @@ class ConversationService:
         Returns:
             Dict with child info if identified, None otherwise
         """
-        # Get all children for this family
-        children = db.query(Child).filter(Child.family_id == family_id).all()
+        # Get all children for this family (cached)
+        children = phone_identity_cache.get_children(family_id, db)
 
         if not children:
             return None
@@ -238,6 +524,7 @@ class ConversationService:
                     "child_id": child.id,
                     "name": child.name,
                     "age_months": age_months,
+                    "pregnancy_week": self._calculate_pregnancy_week(child),
                     "match_type": "name"
                 }
 
@@ -282,6 +569,7 @@ class ConversationService:
                 "child_id": child.id,
                 "name": child.name,
                 "age_months": self._calculate_age_months(child),
+                "pregnancy_week": self._calculate_pregnancy_week(child),
                 "match_type": "only_child"
             }
 
@@ -298,6 +586,14 @@ class ConversationService:
 
         return age_months
 
+    def _calculate_pregnancy_week(self, child: Child) -> Optional[int]:
+        """Calculate current pregnancy week from the due date (40 weeks at due)."""
+        if not child.is_pregnancy or not child.due_date:
+            return None
+
+        days_to_due = (child.due_date - datetime.utcnow().date()).days
+        return max(1, min(42, 40 - days_to_due // 7))
+
     def format_context_for_ai(
         self,
         family_id: int,
@@ -345,10 +641,9 @@ class ConversationService:
         ).first()
 
         if context:
-            context.context_data = {"messages": [], "metadata": {}}
-            context.message_count = 0
-            context.last_context_reset = datetime.utcnow()
-            db.commit()
+            session = self.open_session(family_id, phone, db)
+            session.clear()
+            session.save()
 
     def get_conversation_state(self, family_id: int, phone: str, db: Session) -> Optional[str]:
         """
@@ -391,23 +686,9 @@ class ConversationService:
             db: Database session
             state_data: Optional data to store with state
         """
-        context = self.get_or_create_context(family_id, phone, db)
-
-        context_data = context.context_data if context.context_data else {"messages": [], "metadata": {}}
-        metadata = context_data.get("metadata", {})
-
-        if state:
-            metadata["conversation_state"] = state
-            if state_data:
-                metadata["state_data"] = state_data
-        else:
-            # Clear state
-            metadata.pop("conversation_state", None)
-            metadata.pop("state_data", None)
-
-        context_data["metadata"] = metadata
-        context.context_data = context_data
-        db.commit()
+        session = self.open_session(family_id, phone, db)
+        session.set_state(state, state_data)
+        session.save()
 
     def get_state_data(self, family_id: int, phone: str, db: Session) -> Optional[Dict]:
         """
@@ -0,0 +1,138 @@
+"""Local nearest-centroid question classifier on MiniLM embeddings."""
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import threading
+
+from .embedding_service import embedding_service
+
+
+class EmbeddingClassifier:
+    """
+    Classifies questions by cosine similarity to per-category centroids.
+
+    Centroids are the normalized mean embeddings of labeled example
+    questions, built on first use with the same all-MiniLM-L6-v2 model as
+    the knowledge base. A prediction is only trusted when the best score
+    and its margin over the runner-up clear the configured thresholds;
+    otherwise the caller escalates to the next tier.
+    """
+
+    def __init__(
+        self,
+        examples_path: str = "./data/structured/classifier_examples.json",
+        min_score: float = 0.45,
+        min_margin: float = 0.05
+    ):
+        """
+        Initialize embedding classifier (centroids are built lazily).
+
+        Args:
+            examples_path: JSON file mapping category -> example questions
+            min_score: Minimum cosine similarity to the best centroid
+            min_margin: Minimum gap between the best and second-best scores
+        """
+        self.examples_path = examples_path
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.labels: List[str] = []
+        self._centroids = None
+        self._unavailable = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load_examples(path: str) -> Dict[str, List[str]]:
+        """Load labeled example questions (category -> questions)."""
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def fit(self, examples: Dict[str, List[str]]) -> bool:
+        """
+        Build centroids from labeled examples.
+
+        Args:
+            examples: Category -> example questions
+
+        Returns:
+            True if the embedding model was available
+        """
+        import numpy as np
+
+        labels = [label for label, questions in examples.items() if questions]
+        centroids = []
+        for label in labels:
+            vectors = embedding_service.encode(examples[label])
+            if vectors is None:
+                return False
+            centroid = vectors.mean(axis=0)
+            centroids.append(centroid / np.linalg.norm(centroid))
+
+        self.labels = labels
+        self._centroids = np.stack(centroids).astype("float32")
+        return True
+
+    def _ensure_fitted(self) -> bool:
+        if self._centroids is not None or self._unavailable:
+            return self._centroids is not None
+
+        with self._lock:
+            if self._centroids is None and not self._unavailable:
+                try:
+                    if not Path(self.examples_path).exists() or not self.fit(self.load_examples(self.examples_path)):
+                        self._unavailable = True
+                    else:
+                        print(f"[AI] Embedding classifier ready ({len(self.labels)} categories)")
+                except Exception as e:
+                    print(f"[AI] Embedding classifier not available: {e}")
+                    self._unavailable = True
+
+        return self._centroids is not None
+
+    def is_available(self) -> bool:
+        """Return True if centroids are (or can be) built."""
+        return self._ensure_fitted()
+
+    def predict(self, question: str) -> Optional[Dict]:
+        """
+        Score a question against every category centroid.
+
+        Args:
+            question: User's question
+
+        Returns:
+            Dict with category, score, margin and confident, or None if the
+            embedding model is unavailable
+        """
+        if not self._ensure_fitted():
+            return None
+
+        vectors = embedding_service.encode([question])
+        if vectors is None:
+            return None
+
+        scores = self._centroids @ vectors[0]
+        order = scores.argsort()[::-1]
+        best = float(scores[order[0]])
+        margin = best - float(scores[order[1]]) if len(order) > 1 else best
+
+        return {
+            "category": self.labels[int(order[0])],
+            "score": round(best, 4),
+            "margin": round(margin, 4),
+            "confident": best >= self.min_score and margin >= self.min_margin
+        }
+
+
+def _create_embedding_classifier() -> EmbeddingClassifier:
+    """Build the embedding classifier configured in settings."""
+    from ..config import settings
+
+    return EmbeddingClassifier(
+        examples_path=settings.embedding_classifier_examples,
+        min_score=settings.embedding_classifier_min_score,
+        min_margin=settings.embedding_classifier_min_margin
+    )
+
+
+# Global embedding classifier instance
+embedding_classifier = _create_embedding_classifier()
@@ -0,0 +1,67 @@
+"""Local sentence embeddings shared by caching, classification and retrieval."""
+from typing import List, Optional
+import threading
+
+
+class EmbeddingService:
+    """Lazily loads the all-MiniLM-L6-v2 model used to build the knowledge base."""
+
+    def __init__(self, model_name: Optional[str] = None):
+        """
+        Initialize embedding service (the model is loaded on first use).
+
+        Args:
+            model_name: SentenceTransformer model name (defaults to settings)
+        """
+        from ..config import settings
+
+        self.model_name = model_name or settings.embedding_model
+        self._model = None
+        self._unavailable = False
+        self._lock = threading.Lock()
+
+    def _load_model(self):
+        """Load the SentenceTransformer model once, thread-safely."""
+        if self._model is not None or self._unavailable:
+            return self._model
+
+        with self._lock:
+            if self._model is None and not self._unavailable:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+                    print(f"[EMBED] Loaded embedding model: {self.model_name}")
+                except Exception as e:
+                    print(f"[EMBED] Embedding model not available: {e}")
+                    self._unavailable = True
+
+        return self._model
+
+    def is_available(self) -> bool:
+        """Return True if the embedding model can be loaded."""
+        return self._load_model() is not None
+
+    def encode(self, texts: List[str]):
+        """
+        Embed texts into L2-normalized float32 vectors.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            numpy array of shape (len(texts), dim), or None if unavailable
+        """
+        model = self._load_model()
+        if model is None:
+            return None
+
+        return model.encode(
+            texts,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).astype("float32")
+
+
+# Global embedding service instance
+embedding_service = EmbeddingService()
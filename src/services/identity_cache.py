@@ -0,0 +1,204 @@
+"""In-process cache of who is texting: phone -> family, member, tier and children."""
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from ..models.models import Family, Child, PhoneLookup
+import threading
+import time
+
+
+class CachedChild(NamedTuple):
+    """Snapshot of the Child columns used when answering SMS."""
+    id: int
+    name: str
+    birth_date: Optional[date]
+    is_pregnancy: bool
+    due_date: Optional[date]
+
+
+class PhoneIdentityCache:
+    """
+    Write-through cache of phone -> (family_id, member_id) and
+    family_id -> (subscription tier, deletion status, children).
+
+    Entries expire after a TTL so that changes made by another worker
+    process are picked up; routes that change phone lookups, families or
+    children in this process update or invalidate entries immediately.
+    """
+
+    def __init__(self, ttl_seconds: int = 300, max_entries: int = 10000):
+        """
+        Initialize identity cache.
+
+        Args:
+            ttl_seconds: Time-to-live for entries
+            max_entries: Maximum phones and families kept (LRU eviction)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = {"phone_hits": 0, "phone_misses": 0, "family_hits": 0, "family_misses": 0}
+        self._phones: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._families: "OrderedDict[int, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_entry(self, entries: OrderedDict, key) -> Optional[Dict]:
+        with self._lock:
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+            return value
+
+    def _set_entry(self, entries: OrderedDict, key, value: Dict):
+        with self._lock:
+            entries[key] = (time.time() + self.ttl_seconds, value)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def get_phone(self, phone: str, db: Session) -> Optional[Dict]:
+        """
+        Resolve a phone number to its family and member.
+
+        Args:
+            phone: Phone number
+            db: Database session (used on a miss)
+
+        Returns:
+            Dict with family_id and family_member_id, or None if unregistered
+        """
+        identity = self._get_entry(self._phones, phone)
+        if identity is not None:
+            self.stats["phone_hits"] += 1
+            return identity
+
+        self.stats["phone_misses"] += 1
+        lookup = db.query(PhoneLookup).filter(PhoneLookup.phone == phone).first()
+        if not lookup:
+            return None
+
+        identity = {"family_id": lookup.family_id, "family_member_id": lookup.family_member_id}
+        self._set_entry(self._phones, phone, identity)
+        return identity
+
+    def get_family(self, family_id: int, db: Session) -> Optional[Dict]:
+        """
+        Get the family fields and children needed to answer SMS.
+
+        Args:
+            family_id: Family ID
+            db: Database session (used on a miss)
+
+        Returns:
+            Dict with family_id, subscription_tier, deletion_status and
+            children (list of CachedChild), or None if the family is gone
+        """
+        family_info = self._get_entry(self._families, family_id)
+        if family_info is not None:
+            self.stats["family_hits"] += 1
+            return family_info
+
+        self.stats["family_misses"] += 1
+        family = db.query(Family).filter(Family.id == family_id).first()
+        if not family:
+            return None
+
+        children = db.query(Child).filter(Child.family_id == family_id).all()
+        family_info = {
+            "family_id": family.id,
+            "subscription_tier": family.subscription_tier,
+            "deletion_status": family.deletion_status,
+            "children": [
+                CachedChild(
+                    id=child.id,
+                    name=child.name,
+                    birth_date=child.birth_date,
+                    is_pregnancy=bool(child.is_pregnancy),
+                    due_date=child.due_date
+                )
+                for child in children
+            ]
+        }
+        self._set_entry(self._families, family_id, family_info)
+        return family_info
+
+    def get_identity(self, phone: str, db: Session) -> Optional[Dict]:
+        """
+        Resolve a phone number to its full identity.
+
+        Args:
+            phone: Phone number
+            db: Database session (used on a miss)
+
+        Returns:
+            Dict with family_id, family_member_id, subscription_tier,
+            deletion_status and children, or None if unregistered
+        """
+        phone_info = self.get_phone(phone, db)
+        if phone_info is None:
+            return None
+
+        family_info = self.get_family(phone_info["family_id"], db)
+        if family_info is None:
+            self.invalidate_phone(phone)
+            return None
+
+        return {**family_info, **phone_info}
+
+    def get_children(self, family_id: int, db: Session) -> List[CachedChild]:
+        """Get a family's children (empty list if the family is gone)."""
+        family_info = self.get_family(family_id, db)
+        return family_info["children"] if family_info else []
+
+    def set_phone(self, phone: str, family_id: int, family_member_id: Optional[int]):
+        """Write-through a phone lookup that was just committed."""
+        self._set_entry(self._phones, phone, {"family_id": family_id, "family_member_id": family_member_id})
+
+    def invalidate_phone(self, phone: str):
+        """Forget a phone number (lookup changed or removed)."""
+        with self._lock:
+            self._phones.pop(phone, None)
+
+    def invalidate_family(self, family_id: int, include_phones: bool = False):
+        """
+        Forget a family's tier, status and children.
+
+        Args:
+            family_id: Family ID
+            include_phones: Also forget every phone mapped to the family
+                (family deleted)
+        """
+        with self._lock:
+            self._families.pop(family_id, None)
+            if include_phones:
+                for phone in [p for p, (_, v) in self._phones.items() if v["family_id"] == family_id]:
+                    del self._phones[phone]
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._phones.clear()
+            self._families.clear()
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters and current size."""
+        return {**self.stats, "phones": len(self._phones), "families": len(self._families)}
+
+
+def _create_phone_identity_cache() -> PhoneIdentityCache:
+    """Build the identity cache configured in settings."""
+    from ..config import settings
+
+    return PhoneIdentityCache(
+        ttl_seconds=settings.phone_identity_cache_ttl_seconds,
+        max_entries=settings.phone_identity_cache_max_entries
+    )
+
+
+# Global phone identity cache instance
+phone_identity_cache = _create_phone_identity_cache()
@@ -2,8 +2,10 @@
 from sqlalchemy.orm import Session
 from typing import Dict, Optional
 from datetime import datetime
-from ..models.models import Child, Family
-from .conversation_service import conversation_service
+from ..models.models import Child
+from .conversation_service import ConversationSession, conversation_service
+from .identity_cache import phone_identity_cache
+from .keyword_classifier import keyword_classifier
 import re
 
 
@@ -16,7 +18,8 @@ class IntentService:
         family_id: int,
         phone: str,
         db: Session,
-        current_state: Optional[str] = None
+        current_state: Optional[str] = None,
+        conversation: Optional[ConversationSession] = None
     ) -> Dict:
         """
         Handle conversational child registration flow.
@@ -32,12 +35,31 @@ class IntentService:
             phone: Phone number
             db: Database session
             current_state: Current conversation state
+            conversation: Conversation already loaded for this request (its
+                changes are saved by the caller); opened and saved here if None
 
         Returns:
             Dict with response and next_state
         """
+        if conversation is not None:
+            return self._handle_add_child(message, family_id, db, current_state, conversation)
+
+        conversation = conversation_service.open_session(family_id, phone, db)
+        result = self._handle_add_child(message, family_id, db, current_state, conversation)
+        conversation.save()
+        return result
+
+    def _handle_add_child(
+        self,
+        message: str,
+        family_id: int,
+        db: Session,
+        current_state: Optional[str],
+        conversation: ConversationSession
+    ) -> Dict:
+        """Run one step of the child registration state machine."""
         # Check child limit first
-        family = db.query(Family).filter(Family.id == family_id).first()
+        family = phone_identity_cache.get_family(family_id, db)
         if not family:
             return {
                 "response": "Sorry, I couldn't find your account. Please contact support.",
@@ -45,13 +67,13 @@ class IntentService:
                 "success": False
             }
 
-        child_count = db.query(Child).filter(Child.family_id == family_id).count()
+        child_count = len(family["children"])
         tier_limits = {"FREE": 1, "FAMILY": 3, "PREMIUM": 3}
-        max_children = tier_limits.get(family.subscription_tier, 1)
+        max_children = tier_limits.get(family["subscription_tier"], 1)
 
         if child_count >= max_children:
             return {
-                "response": f"You've reached the limit of {max_children} children for your {family.subscription_tier} tier. Upgrade to add more!",
+                "response": f"You've reached the limit of {max_children} children for your {family['subscription_tier']} tier. Upgrade to add more!",
                 "next_state": None,
                 "success": False
             }
@@ -59,13 +81,7 @@ class IntentService:
         # State machine
         if current_state is None:
             # Initial state - ask for name
-            conversation_service.set_conversation_state(
-                family_id=family_id,
-                phone=phone,
-                state="ADDING_CHILD_NAME",
-                db=db,
-                state_data={}
-            )
+            conversation.set_state("ADDING_CHILD_NAME", state_data={})
             return {
                 "response": "I'd be happy to help you add a child! What's their name?",
                 "next_state": "ADDING_CHILD_NAME",
@@ -85,13 +101,7 @@ class IntentService:
                 }
 
             # Store name and ask for birthdate
-            conversation_service.set_conversation_state(
-                family_id=family_id,
-                phone=phone,
-                state="ADDING_CHILD_BIRTHDATE",
-                db=db,
-                state_data={"child_name": name}
-            )
+            conversation.set_state("ADDING_CHILD_BIRTHDATE", state_data={"child_name": name})
 
             return {
                 "response": f"Thanks! When was {name} born? Please use format MM/DD/YYYY (e.g., 03/15/2022)",
@@ -101,10 +111,10 @@ class IntentService:
 
         elif current_state == "ADDING_CHILD_BIRTHDATE":
             # Get stored name
-            state_data = conversation_service.get_state_data(family_id, phone, db)
+            state_data = conversation.get_state_data()
             if not state_data or "child_name" not in state_data:
                 # Something went wrong, restart
-                conversation_service.set_conversation_state(family_id, phone, None, db)
+                conversation.set_state(None)
                 return {
                     "response": "Sorry, something went wrong. Let's start over. What's your child's name?",
                     "next_state": None,
@@ -151,6 +161,7 @@ class IntentService:
                 db.add(new_child)
                 db.commit()
                 db.refresh(new_child)
+                phone_identity_cache.invalidate_family(family_id)
 
                 # Calculate age for response
                 age_months = age_days // 30
@@ -162,16 +173,13 @@ class IntentService:
                     age_str = f"{age_months} month{'s' if age_months != 1 else ''} old"
 
                 # Clear state
-                conversation_service.set_conversation_state(family_id, phone, None, db)
+                conversation.set_state(None)
 
                 # Set as active child
-                conversation_service.set_active_child(
-                    family_id=family_id,
-                    phone=phone,
+                conversation.set_active_child(
                     child_id=new_child.id,
                     child_name=child_name,
-                    child_age_months=age_months,
-                    db=db
+                    child_age_months=age_months
                 )
 
                 return {
@@ -183,7 +191,8 @@ class IntentService:
                 }
 
             except Exception as e:
-                conversation_service.set_conversation_state(family_id, phone, None, db)
+                db.rollback()
+                conversation.set_state(None)
                 return {
                     "response": f"Sorry, I couldn't add {child_name}. Please try again or use the web portal.",
                     "next_state": None,
@@ -247,9 +256,7 @@ class IntentService:
         Returns:
             True if cancel intent detected
         """
-        cancel_keywords = ["cancel", "stop", "nevermind", "never mind", "quit", "exit"]
-        message_lower = message.lower().strip()
-        return any(keyword in message_lower for keyword in cancel_keywords)
+        return keyword_classifier.has_category(message, "cancel")
 
 
 # Global intent service instance
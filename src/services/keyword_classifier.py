@@ -0,0 +1,198 @@
+"""Compiled keyword matching for question classification, emergencies and cancel intent."""
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import re
+
+
+# Declarative keyword table: category -> keywords (lowercase, plain text).
+# Matching is case-insensitive, anchored at a word start and tolerant of
+# common suffixes ("vaccine" matches "vaccines", "cough" matches "coughing").
+KEYWORD_TABLE: Dict[str, List[str]] = {
+    "emergency": [
+        "can't breathe", "not breathing", "unconscious", "unresponsive",
+        "severe bleeding", "seizure", "convulsion", "turning blue",
+        "severe pain", "chest pain", "head injury", "poisoning",
+        "allergic reaction", "swelling throat", "choking"
+    ],
+    "vaccine": [
+        "vaccine", "vaccination", "shot", "immunization",
+        "dtap", "mmr", "pcv", "hep", "hepatitis", "varicella",
+        "rotavirus", "hib", "polio", "flu shot", "vaccinated"
+    ],
+    "symptom": [
+        "fever", "sick", "cough", "cold", "vomit", "diarrhea",
+        "rash", "pain", "hurt", "crying", "fussy", "won't eat",
+        "sleep", "asleep", "temperature", "congested", "runny nose"
+    ],
+    "development": [
+        "milestone", "development", "walking", "talking", "crawling",
+        "sit up", "stand", "words", "babbling", "delayed"
+    ],
+    "activity": [
+        "class", "swimming", "music", "dance", "sport", "activity",
+        "lesson", "gym", "gymnastics", "playgroup"
+    ],
+    "education": [
+        "preschool", "kindergarten", "school", "homeschool", "daycare", "pre-k"
+    ],
+    "pregnancy": [
+        "pregnant", "pregnancy", "trimester", "due date", "ultrasound",
+        "prenatal", "expecting"
+    ],
+    "account_management": [
+        "add child", "add a child", "add another child", "register child",
+        "can i add", "how to add", "how do i add",
+        "new child", "new baby", "subscription", "upgrade", "account",
+        "profile", "add member", "family member", "change password",
+        "delete account", "cancel", "cancelled", "cancellation", "sign up", "register"
+    ],
+    "cancel": [
+        "cancel", "stop", "nevermind", "never mind", "quit", "exit"
+    ]
+}
+
+# Question types in priority order (first matched category wins)
+QUESTION_CATEGORIES = [
+    "vaccine", "symptom", "development", "activity",
+    "education", "pregnancy", "account_management"
+]
+
+# Suffixes accepted after a keyword before the closing word boundary
+# ("feverish", "painful", "painfully", "sleepless", "dancer", "preschoolers",
+# "musical", "sickly")
+KEYWORD_SUFFIXES = [
+    "s", "es", "ed", "d", "ing", "y", "ies", "ness", "ation", "ations",
+    "ish", "ful", "fully", "less", "r", "rs", "er", "ers", "al", "ally", "ly"
+]
+
+
+class KeywordMatch(NamedTuple):
+    """One keyword hit in a message (positions index the lowercased text)."""
+    category: str
+    keyword: str
+    start: int
+    end: int
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and fold typographic apostrophes so "can’t" matches "can't"."""
+    return text.lower().replace("’", "'").replace("‘", "'")
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Build a regex alternation factored into a prefix trie.
+
+    Python's re tries alternatives one by one; factoring shared prefixes
+    ("pre" -> "pregnan(t|cy)", "prenatal", "preschool") lets a failed
+    position be rejected after a character or two.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+
+    return build(trie)
+
+
+class KeywordClassifier:
+    """
+    Multi-pattern keyword matcher built once from a keyword table.
+
+    All keywords are compiled into a single trie-shaped regex, so one scan
+    of a message reports every keyword hit with its categories and
+    position. A phrase that contains another keyword as whole words
+    ("severe pain" contains "pain") reports both keywords' categories.
+    """
+
+    def __init__(self, table: Dict[str, List[str]], suffixes: Optional[List[str]] = None, cache_size: int = 1024):
+        """
+        Compile the keyword table.
+
+        Args:
+            table: Category -> keywords
+            suffixes: Word endings accepted after a keyword
+            cache_size: Recent messages whose matches are memoized (the SMS
+                path checks cancel, emergency and category on the same text)
+        """
+        self.table = table
+        self._categories_by_keyword: Dict[str, Tuple[str, ...]] = {}
+
+        keywords = sorted({kw.lower() for kws in table.values() for kw in kws})
+        for keyword in keywords:
+            padded = f" {keyword} "
+            self._categories_by_keyword[keyword] = tuple(
+                category for category, kws in table.items()
+                if any(f" {kw} " in padded for kw in kws)
+            )
+
+        suffix_group = "|".join(re.escape(s) for s in sorted(suffixes or KEYWORD_SUFFIXES, key=len, reverse=True))
+        self._pattern = re.compile(
+            rf"(?<![\w'-])(?P<kw>{_trie_pattern(keywords)})(?P<suffix>{suffix_group})?(?!\w)"
+        )
+        self._find_cached = lru_cache(maxsize=cache_size)(self._find_all)
+
+    def _find_all(self, text: str) -> Tuple[KeywordMatch, ...]:
+        matches = []
+        for m in self._pattern.finditer(_normalize(text)):
+            keyword = m.group("kw")
+            for category in self._categories_by_keyword[keyword]:
+                matches.append(KeywordMatch(category, keyword, m.start(), m.end()))
+        return tuple(matches)
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """
+        Find every keyword in a message in one pass.
+
+        Args:
+            text: Message text
+
+        Returns:
+            List of KeywordMatch ordered by position
+        """
+        return list(self._find_cached(text))
+
+    def categories(self, text: str) -> List[str]:
+        """Get the distinct matched categories in order of first occurrence."""
+        seen = []
+        for match in self._find_cached(text):
+            if match.category not in seen:
+                seen.append(match.category)
+        return seen
+
+    def has_category(self, text: str, category: str) -> bool:
+        """Return True if any keyword of the category occurs in the text."""
+        return any(match.category == category for match in self._find_cached(text))
+
+    def classify(self, text: str, priority: Optional[List[str]] = None, default: str = "general") -> str:
+        """
+        Pick the highest-priority matched category.
+
+        Args:
+            text: Message text
+            priority: Categories in priority order (defaults to question types)
+            default: Category returned when nothing matches
+
+        Returns:
+            Category name
+        """
+        matched = {match.category for match in self._find_cached(text)}
+        for category in priority or QUESTION_CATEGORIES:
+            if category in matched:
+                return category
+        return default
+
+
+# Global keyword classifier instance
+keyword_classifier = KeywordClassifier(KEYWORD_TABLE)
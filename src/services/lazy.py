@@ -0,0 +1,55 @@
+"""Lazily constructed, thread-safe service singletons."""
+from typing import Any, Callable
+import threading
+
+
+class LazyService:
+    """
+    Stands in for a module-level service instance until it is first used.
+
+    Importing a service module creates only this proxy, so cold start does
+    not pay for clients, connections or models that a request may never
+    touch. The first attribute access builds the real instance exactly
+    once (double-checked under a lock) and every later access goes
+    straight to it, so `from .ai_service import ai_service` keeps working
+    unchanged for callers.
+    """
+
+    __slots__ = ("_factory", "_name", "_instance", "_lock")
+
+    def __init__(self, factory: Callable[[], Any], name: str):
+        """
+        Initialize proxy.
+
+        Args:
+            factory: Zero-argument callable returning the real instance
+            name: Service name for logs and repr
+        """
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _get(self) -> Any:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def is_initialized(self) -> bool:
+        """Return True once the real instance has been built."""
+        return object.__getattribute__(self, "_instance") is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._get(), name, value)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self.is_initialized() else "not initialized"
+        return f"<LazyService {object.__getattribute__(self, '_name')} ({state})>"
@@ -0,0 +1,149 @@
+"""Async model clients backed by shared, size-bounded connection pools."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict
+import asyncio
+import json
+import threading
+
+
+# Marks the end of a Bedrock response stream on the bridge queue
+_STREAM_END = object()
+
+
+def create_async_anthropic_client(api_key: str, max_connections: int):
+    """
+    Create an AsyncAnthropic client with a bounded HTTP connection pool.
+
+    Args:
+        api_key: Anthropic API key
+        max_connections: Maximum concurrent connections kept by the pool
+
+    Returns:
+        AsyncAnthropic client shared by all in-flight requests
+    """
+    import httpx
+    from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+    )
+    return AsyncAnthropic(api_key=api_key, http_client=http_client)
+
+
+class AsyncBedrockRuntime:
+    """
+    Awaitable adapter around a boto3 bedrock-runtime client.
+
+    boto3 clients are thread-safe, so one client whose urllib3 pool matches
+    the executor size serves every concurrent call without blocking the
+    event loop.
+    """
+
+    def __init__(self, region_name: str, max_connections: int):
+        """
+        Initialize the Bedrock client and its worker threads.
+
+        Args:
+            region_name: AWS region for Bedrock
+            max_connections: Pool size and maximum in-flight calls
+        """
+        import boto3
+        from botocore.config import Config
+
+        self.client = boto3.client(
+            'bedrock-runtime',
+            region_name=region_name,
+            config=Config(max_pool_connections=max_connections)
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_connections,
+            thread_name_prefix="bedrock"
+        )
+
+    async def invoke_model(self, modelId: str, body: str) -> Dict:
+        """
+        Invoke a Bedrock model without blocking the event loop.
+
+        Args:
+            modelId: Bedrock model ID
+            body: JSON-encoded request body
+
+        Returns:
+            Decoded JSON response body
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._invoke_model_sync, modelId, body)
+
+    def _invoke_model_sync(self, model_id: str, body: str) -> Dict:
+        """Run invoke_model and read the streaming body on a worker thread."""
+        response = self.client.invoke_model(modelId=model_id, body=body)
+        return json.loads(response['body'].read())
+
+    async def invoke_model_stream(self, modelId: str, body: str) -> AsyncIterator[Dict]:
+        """
+        Stream a Bedrock model response without blocking the event loop.
+
+        The blocking event stream is read on a worker thread and bridged to
+        the event loop through a queue. If the consumer stops early
+        (cancelled, or closed the generator) the event stream is closed and
+        the worker thread stops reading, so it does not hold an executor
+        slot and a pooled connection until the model finishes.
+
+        Args:
+            modelId: Bedrock model ID
+            body: JSON-encoded request body
+
+        Yields:
+            Decoded JSON chunks (content_block_delta, message_delta, ...)
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        streams = []
+
+        def put(item):
+            if not stop.is_set():
+                try:
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+                except RuntimeError:
+                    # Event loop already closed
+                    stop.set()
+
+        def produce():
+            stream = None
+            try:
+                response = self.client.invoke_model_with_response_stream(modelId=modelId, body=body)
+                stream = response['body']
+                streams.append(stream)
+                for event in stream:
+                    if stop.is_set():
+                        break
+                    chunk = event.get('chunk')
+                    if chunk:
+                        put(json.loads(chunk['bytes']))
+            except Exception as e:
+                put(e)
+            finally:
+                if stream is not None:
+                    stream.close()
+                put(_STREAM_END)
+
+        producer = loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not producer.done():
+                # Consumer gone: unblock the worker's read and let it exit
+                stop.set()
+                for stream in streams:
+                    stream.close()
+        await producer
@@ -0,0 +1,218 @@
+"""Provider-side prompt caching: cache_control breakpoints, usage accounting and a local stub."""
+from typing import Any, Dict, List, Optional, Union
+import hashlib
+import threading
+import time
+
+from .context_builder import estimate_tokens
+
+
+# Anthropic and Bedrock (Claude) both accept this marker on text blocks
+CACHE_CONTROL = {"type": "ephemeral"}
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+# Relative input prices: cache writes cost 25% more, cache reads 90% less
+CACHE_WRITE_PRICE = 1.25
+CACHE_READ_PRICE = 0.1
+
+
+def system_blocks(system_prompt: str, cache: bool) -> Union[str, List[Dict]]:
+    """
+    Build the system parameter, with a cache breakpoint when caching is on.
+
+    Args:
+        system_prompt: System prompt text
+        cache: Whether to mark the prompt for caching
+
+    Returns:
+        Plain string, or a single text block carrying cache_control
+    """
+    if not cache:
+        return system_prompt
+    return [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+
+
+def user_content(stable_text: Optional[str], text: str, cache: bool) -> Union[str, List[Dict]]:
+    """
+    Build user message content with the stable part first.
+
+    Retrieved knowledge goes before the per-request text so that requests
+    retrieving the same chunks share a cacheable prefix.
+
+    Args:
+        stable_text: Content likely to repeat across requests (retrieved knowledge)
+        text: Per-request content (question, child context, instructions)
+        cache: Whether to put a cache breakpoint after the stable part
+
+    Returns:
+        Plain string, or text blocks with cache_control on the stable block
+    """
+    if not stable_text:
+        return text
+    if not cache:
+        return f"{stable_text}\n\n{text}"
+    return [
+        {"type": "text", "text": stable_text, "cache_control": CACHE_CONTROL},
+        {"type": "text", "text": text}
+    ]
+
+
+def normalize_usage(usage: Any) -> Dict[str, int]:
+    """
+    Read token usage from an SDK object or a Bedrock response dict.
+
+    Args:
+        usage: anthropic Usage object, dict, or None
+
+    Returns:
+        Dict with all USAGE_FIELDS (missing values are 0)
+    """
+    if usage is None:
+        return {field: 0 for field in USAGE_FIELDS}
+    if isinstance(usage, dict):
+        return {field: int(usage.get(field) or 0) for field in USAGE_FIELDS}
+    return {field: int(getattr(usage, field, 0) or 0) for field in USAGE_FIELDS}
+
+
+class PromptCacheStats:
+    """Running totals of prompt tokens by how they were billed."""
+
+    def __init__(self):
+        """Initialize counters."""
+        self._lock = threading.Lock()
+        self.clear()
+
+    def record(self, usage: Dict[str, int]):
+        """
+        Add one call's usage.
+
+        Args:
+            usage: Normalized usage dict (see normalize_usage)
+        """
+        with self._lock:
+            self.calls += 1
+            for field in USAGE_FIELDS:
+                self.totals[field] += usage.get(field, 0)
+
+    def clear(self):
+        """Reset counters."""
+        self.calls = 0
+        self.totals = {field: 0 for field in USAGE_FIELDS}
+
+    def get_stats(self) -> Dict:
+        """
+        Get prompt caching statistics.
+
+        Returns:
+            Dict with token totals, the share of prompt tokens read from
+            cache and the input cost relative to sending every prompt
+            uncached
+        """
+        uncached = self.totals["input_tokens"]
+        written = self.totals["cache_creation_input_tokens"]
+        read = self.totals["cache_read_input_tokens"]
+        prompt_tokens = uncached + written + read
+        billed = uncached + written * CACHE_WRITE_PRICE + read * CACHE_READ_PRICE
+        return {
+            "calls": self.calls,
+            **self.totals,
+            "prompt_tokens": prompt_tokens,
+            "cache_read_ratio": round(read / prompt_tokens, 3) if prompt_tokens else 0.0,
+            "relative_input_cost": round(billed / prompt_tokens, 3) if prompt_tokens else 1.0
+        }
+
+
+class LocalPromptCacheStub:
+    """
+    Offline stand-in for the Anthropic Messages API with prompt caching.
+
+    Follows the provider's accounting: the prompt prefix up to each
+    cache_control breakpoint is cached once it reaches min_tokens, a
+    request reuses the longest cached prefix (billed as
+    cache_read_input_tokens), the remainder up to the last breakpoint is
+    written (cache_creation_input_tokens) and everything after it is
+    plain input. Entries expire ttl_seconds after their last use. Tokens
+    are estimated, so the absolute numbers are approximate but the ratios
+    are representative.
+    """
+
+    def __init__(self, min_tokens: int = 1024, ttl_seconds: int = 300):
+        """
+        Initialize stub.
+
+        Args:
+            min_tokens: Shortest prefix the provider will cache
+            ttl_seconds: Cache entry lifetime, refreshed on every hit
+        """
+        self.min_tokens = min_tokens
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _blocks(system: Union[str, List[Dict]], messages: List[Dict]) -> List[Dict]:
+        """Flatten system and message content into text blocks in prompt order."""
+        blocks = [{"type": "text", "text": system}] if isinstance(system, str) else list(system)
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                blocks.append({"type": "text", "text": f"{message['role']}: {content}"})
+            else:
+                blocks.extend(content)
+        return blocks
+
+    def create(self, model: str, max_tokens: int, system: Union[str, List[Dict]], messages: List[Dict]) -> Dict:
+        """
+        Simulate a messages call.
+
+        Args:
+            model: Model ID (part of the cache key, as on the real API)
+            max_tokens: Maximum tokens to generate
+            system: System prompt (string or blocks)
+            messages: Messages (string or block content)
+
+        Returns:
+            Anthropic-style response dict with content and usage
+        """
+        now = time.monotonic()
+        digest = hashlib.sha256(model.encode())
+        prefix_tokens = 0
+        breakpoints = []  # (prefix key, prefix tokens) at each cache_control block
+        for block in self._blocks(system, messages):
+            digest.update(block["text"].encode())
+            prefix_tokens += estimate_tokens(block["text"])
+            if block.get("cache_control"):
+                breakpoints.append((digest.hexdigest(), prefix_tokens))
+        total_tokens = prefix_tokens
+
+        with self._lock:
+            read = 0
+            for key, tokens in breakpoints:
+                expires = self._entries.get(key)
+                if expires and expires > now:
+                    read = tokens
+                    self._entries[key] = now + self.ttl_seconds
+
+            written = 0
+            for key, tokens in breakpoints:
+                if tokens >= self.min_tokens and tokens > read and self._entries.get(key, 0) <= now:
+                    self._entries[key] = now + self.ttl_seconds
+                    written = tokens - read
+
+        answer = "Stub answer: please consult your pediatrician for personal medical advice."
+        return {
+            "content": [{"type": "text", "text": answer}],
+            "model": model,
+            "usage": {
+                "input_tokens": total_tokens - read - written,
+                "output_tokens": min(max_tokens, estimate_tokens(answer)),
+                "cache_creation_input_tokens": written,
+                "cache_read_input_tokens": read
+            }
+        }
+
+    def clear(self):
+        """Drop all cached prefixes."""
+        with self._lock:
+            self._entries.clear()
@@ -1,44 +1,67 @@
-"""RAG (Retrieval-Augmented Generation) service using ChromaDB or Bedrock Knowledge Base."""
+"""RAG (Retrieval-Augmented Generation) service using ChromaDB, a NumPy index or Bedrock Knowledge Base,
+optionally fused with a lexical BM25 index."""
 from typing import List, Dict, Optional
 import os
+import time
 
-# Lazy import chromadb only when needed
-try:
-    import chromadb
-    from chromadb.config import Settings
-    CHROMADB_AVAILABLE = True
-except ImportError:
-    CHROMADB_AVAILABLE = False
-    chromadb = None
-    Settings = None
+from .bm25_index import BM25Index, reciprocal_rank_fusion
+from .cache_service import InMemoryCacheBackend, normalize_text
+from .context_builder import context_builder, estimate_tokens
+from .embedding_service import embedding_service
+from .lazy import LazyService
+
+# Lifetime of cached query embeddings (eviction is normally by LRU size)
+QUERY_VECTOR_TTL_SECONDS = 7 * 24 * 3600
 
 
 class RAGService:
-    """Service for semantic search using ChromaDB or Bedrock Knowledge Base."""
+    """Service for semantic search using ChromaDB, a NumPy index or Bedrock Knowledge Base."""
 
-    def __init__(self, persist_directory: str = "./vector_db"):
+    def __init__(self, persist_directory: str = "./vector_db", provider: Optional[str] = None):
         """
-        Initialize RAG service with ChromaDB or Bedrock KB.
+        Initialize RAG service with ChromaDB, a NumPy index or Bedrock KB.
 
         Args:
             persist_directory: Path to ChromaDB persistence directory
+            provider: RAG provider (defaults to settings.rag_provider)
         """
         from ..config import settings
 
         self.persist_directory = persist_directory
-        self.provider = settings.rag_provider
+        self.provider = provider or settings.rag_provider
         self.client = None
         self.collection = None
+        self.vector_index = None
+        self.bm25_index = None
         self.bedrock_agent = None
         self.kb_id = None
+        # Query text -> embedding (LRU; vectors never go stale for a given model)
+        self.query_cache = InMemoryCacheBackend(max_entries=settings.rag_query_cache_max_entries)
+        self.metrics = {
+            "searches": 0,
+            "hybrid_searches": 0,
+            "bm25_searches": 0,
+            "filtered_searches": 0,
+            "filter_fallbacks": 0,
+            "contexts_built": 0,
+            "context_tokens_raw_total": 0,
+            "context_tokens_total": 0,
+            "query_cache_hits": 0,
+            "query_cache_misses": 0,
+            "embed_ms_total": 0.0,
+            "search_ms_total": 0.0
+        }
         self._initialize_client()
 
     def _initialize_client(self):
-        """Initialize ChromaDB or Bedrock Knowledge Base client."""
+        """Initialize ChromaDB, NumPy index or Bedrock Knowledge Base client."""
         from ..config import settings
 
         if self.provider == "chromadb":
-            if not CHROMADB_AVAILABLE:
+            # Imported here: chromadb pulls in onnxruntime/sqlite bindings (slow cold start)
+            try:
+                import chromadb
+            except ImportError:
                 print("[RAG] ChromaDB not available - RAG features disabled")
                 self.client = None
                 self.collection = None
@@ -64,6 +87,23 @@ class RAGService:
                 self.client = None
                 self.collection = None
 
+        elif self.provider == "numpy":
+            try:
+                from .vector_index import NumpyVectorIndex
+                self.vector_index = NumpyVectorIndex.load(
+                    settings.vector_index_path,
+                    mmap=settings.vector_index_mmap,
+                    expected_model=settings.embedding_model
+                )
+                manifest = self.vector_index.manifest
+                print(
+                    f"[RAG] Loaded NumPy vector index: {len(self.vector_index)} chunks"
+                    f" ({manifest.get('dtype', 'float32')}, {manifest.get('content_hash', 'no manifest')[:12]})"
+                )
+            except Exception as e:
+                print(f"[RAG] Error loading NumPy vector index from {settings.vector_index_path}: {e}")
+                self.vector_index = None
+
         elif self.provider == "bedrock_kb":
             try:
                 import boto3
@@ -77,29 +117,139 @@ class RAGService:
                 print(f"[RAG] Error initializing Bedrock KB: {e}")
                 self.bedrock_agent = None
 
-    def search(self, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None) -> List[Dict]:
+        # Lexical index over the same chunk IDs (Bedrock KB chunks have their own IDs)
+        if settings.rag_hybrid_search and self.provider != "bedrock_kb":
+            try:
+                self.bm25_index = BM25Index.load(settings.vector_index_path)
+                if self.bm25_index:
+                    print(f"[RAG] Loaded BM25 index: {len(self.bm25_index)} chunks")
+            except Exception as e:
+                print(f"[RAG] Error loading BM25 index from {settings.vector_index_path}: {e}")
+                self.bm25_index = None
+
+    def embed_query(self, query: str):
+        """
+        Embed a search query, reusing cached vectors for repeated queries.
+
+        Args:
+            query: Search query text
+
+        Returns:
+            L2-normalized float32 vector, or None if the embedding model is
+            unavailable
+        """
+        normalized = normalize_text(query)
+        vector = self.query_cache.get(normalized)
+        if vector is not None:
+            self.metrics["query_cache_hits"] += 1
+            return vector
+
+        self.metrics["query_cache_misses"] += 1
+        start = time.perf_counter()
+        vectors = embedding_service.encode([normalized])
+        self.metrics["embed_ms_total"] += (time.perf_counter() - start) * 1000
+        if vectors is None:
+            return None
+
+        self.query_cache.set(normalized, vectors[0], ttl_seconds=QUERY_VECTOR_TTL_SECONDS)
+        return vectors[0]
+
+    def get_metrics(self) -> Dict:
+        """
+        Get query embedding cache and timing metrics.
+
+        Returns:
+            Dict with counters, cache hit rate and average embed/search time
         """
-        Search for relevant documents using semantic similarity.
+        searches = self.metrics["searches"]
+        misses = self.metrics["query_cache_misses"]
+        lookups = self.metrics["query_cache_hits"] + misses
+        return {
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.metrics.items()},
+            "query_cache_hit_rate": round(self.metrics["query_cache_hits"] / lookups, 3) if lookups else 0.0,
+            "query_cache_entries": len(self.query_cache),
+            "context_token_savings": round(
+                1 - self.metrics["context_tokens_total"] / self.metrics["context_tokens_raw_total"], 3
+            ) if self.metrics["context_tokens_raw_total"] else 0.0,
+            "avg_embed_ms": round(self.metrics["embed_ms_total"] / misses, 2) if misses else 0.0,
+            "avg_search_ms": round(self.metrics["search_ms_total"] / searches, 2) if searches else 0.0,
+            "provider": self.provider,
+            "bm25_chunks": len(self.bm25_index) if self.bm25_index else 0
+        }
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        filter_metadata: Optional[Dict] = None,
+        mode: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Search for relevant documents.
+
+        Hybrid mode (the default when a BM25 index is loaded) runs vector
+        and BM25 search for a deeper candidate list each and merges them with
+        reciprocal-rank fusion. BM25 mode skips the embedding model entirely
+        and falls back to vector search if no chunk shares a term with the
+        query.
 
         Args:
             query: Search query text
             n_results: Number of results to return (default 5)
             filter_metadata: Optional metadata filter (e.g., {"category": "vaccines"})
+            mode: "hybrid", "vector" or "bm25" (defaults to hybrid if available)
 
         Returns:
-            List of relevant documents with metadata and distances
+            List of relevant documents with metadata and distances/scores
         """
+        from ..config import settings
+
+        if self.bm25_index is None:
+            return self._vector_search(query, n_results, filter_metadata)
+
+        mode = mode or "hybrid"
+        if mode == "bm25":
+            start = time.perf_counter()
+            documents = self.bm25_index.search(query, n_results=n_results, where=filter_metadata)
+            self._record_search(start)
+            self.metrics["bm25_searches"] += 1
+            if documents:
+                return documents
+            return self._vector_search(query, n_results, filter_metadata)
+
+        if mode == "hybrid":
+            candidates = max(n_results * 3, settings.rag_hybrid_candidates)
+            vector_results = self._vector_search(query, candidates, filter_metadata)
+            lexical_results = self.bm25_index.search(query, n_results=candidates, where=filter_metadata)
+            self.metrics["hybrid_searches"] += 1
+            return reciprocal_rank_fusion(
+                [vector_results, lexical_results], n_results=n_results, k=settings.rag_rrf_k
+            )
+
+        return self._vector_search(query, n_results, filter_metadata)
+
+    def _vector_search(self, query: str, n_results: int, filter_metadata: Optional[Dict]) -> List[Dict]:
+        """Semantic similarity search on the configured provider."""
         if self.provider == "chromadb":
             if not self.collection:
                 return []
 
             try:
+                # Embed the query ourselves (cached) so Chroma doesn't re-embed it
+                query_vector = self.embed_query(query)
+                query_args = (
+                    {"query_embeddings": [query_vector.tolist()]}
+                    if query_vector is not None else {"query_texts": [query]}
+                )
+
                 # Query ChromaDB collection
+                start = time.perf_counter()
                 results = self.collection.query(
-                    query_texts=[query],
                     n_results=n_results,
-                    where=filter_metadata if filter_metadata else None
+                    where=filter_metadata if filter_metadata else None,
+                    **query_args
                 )
+                self._record_search(start)
 
                 # Format ChromaDB results
                 documents = []
@@ -119,13 +269,32 @@ class RAGService:
                 print(f"[RAG] Error searching ChromaDB: {e}")
                 return []
 
+        elif self.provider == "numpy":
+            if not self.vector_index:
+                return []
+
+            try:
+                query_vector = self.embed_query(query)
+                if query_vector is None:
+                    return []
+
+                start = time.perf_counter()
+                documents = self.vector_index.search(query_vector, n_results=n_results, where=filter_metadata)
+                self._record_search(start)
+                return documents
+
+            except Exception as e:
+                print(f"[RAG] Error searching NumPy index: {e}")
+                return []
+
         elif self.provider == "bedrock_kb":
             if not self.bedrock_agent or not self.kb_id:
                 print("[RAG] Bedrock KB not configured")
                 return []
 
             try:
-                # Query Bedrock Knowledge Base
+                # Query Bedrock Knowledge Base (embeds the query server-side)
+                start = time.perf_counter()
                 response = self.bedrock_agent.retrieve(
                     knowledgeBaseId=self.kb_id,
                     retrievalQuery={'text': query},
@@ -135,6 +304,7 @@ class RAGService:
                         }
                     }
                 )
+                self._record_search(start)
 
                 # Format Bedrock KB results
                 documents = []
@@ -155,7 +325,11 @@ class RAGService:
 
         return []
 
-    def search_by_category(self, query: str, category: str, n_results: int = 3) -> List[Dict]:
+    def _record_search(self, start: float):
+        self.metrics["searches"] += 1
+        self.metrics["search_ms_total"] += (time.perf_counter() - start) * 1000
+
+    def search_by_category(self, query: str, category: str, n_results: int = 3, mode: Optional[str] = None) -> List[Dict]:
         """
         Search for documents in a specific category.
 
@@ -163,30 +337,119 @@ class RAGService:
             query: Search query text
             category: Category to search in (pregnancy, vaccines, development, etc.)
             n_results: Number of results to return
+            mode: Search mode (see search)
 
         Returns:
             List of relevant documents from the specified category
         """
         filter_metadata = {"category": category}
-        return self.search(query, n_results=n_results, filter_metadata=filter_metadata)
+        return self.search(query, n_results=n_results, filter_metadata=filter_metadata, mode=mode)
+
+    def search_with_filters(
+        self,
+        query: str,
+        filters: List[Optional[Dict]],
+        n_results: int = 5,
+        mode: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Search with metadata pre-filters, relaxing them until enough chunks match.
 
-    def get_context_for_question(self, question: str, n_results: int = 5) -> str:
+        Args:
+            query: Search query text
+            filters: Where clauses, strictest first (see build_retrieval_filters)
+            n_results: Number of results to return
+            mode: Search mode (see search)
+
+        Returns:
+            Results of the first filter that returns at least
+            settings.rag_filter_min_results chunks (or of the last filter)
         """
-        Get relevant context for answering a question.
+        from ..config import settings
+
+        if not filters:
+            return self.search(query, n_results=n_results, mode=mode)
+
+        self.metrics["filtered_searches"] += 1
+        results = []
+        for attempt, where in enumerate(filters):
+            results = self.search(query, n_results=n_results, filter_metadata=where, mode=mode)
+            if len(results) >= min(settings.rag_filter_min_results, n_results):
+                break
+        if attempt > 0:
+            self.metrics["filter_fallbacks"] += 1
+        return results
+
+    def build_context(
+        self,
+        question: str,
+        n_results: int = 5,
+        mode: Optional[str] = None,
+        filters: Optional[List[Optional[Dict]]] = None,
+        token_budget: Optional[int] = None
+    ) -> Dict:
+        """
+        Retrieve and assemble context for a question, reporting token savings.
 
         Args:
             question: User's question
             n_results: Number of documents to retrieve
+            mode: Search mode (see search)
+            filters: Optional metadata pre-filters, strictest first
+            token_budget: Maximum context tokens (None: no trimming)
 
         Returns:
-            Combined context string from relevant documents
+            Dict with context, tokens, raw_tokens, saved_tokens and sources
         """
-        results = self.search(question, n_results=n_results)
+        from ..config import settings
+
+        results = self.search_with_filters(question, filters, n_results=n_results, mode=mode)
 
         if not results:
-            return ""
+            return {"context": "", "tokens": 0, "raw_tokens": 0, "saved_tokens": 0, "sources": 0}
+
+        if settings.rag_context_builder:
+            built = context_builder.build(question, results, token_budget=token_budget)
+        else:
+            context = self._concatenate(results)
+            tokens = estimate_tokens(context)
+            built = {"context": context, "tokens": tokens, "raw_tokens": tokens, "saved_tokens": 0, "sources": len(results)}
+
+        self.metrics["contexts_built"] += 1
+        self.metrics["context_tokens_raw_total"] += built["raw_tokens"]
+        self.metrics["context_tokens_total"] += built["tokens"]
+        if built["saved_tokens"]:
+            print(
+                f"[RAG] Context {built['raw_tokens']} -> {built['tokens']} tokens "
+                f"(-{built['saved_tokens'] / built['raw_tokens']:.0%}, budget {token_budget})"
+            )
+        return built
+
+    def get_context_for_question(
+        self,
+        question: str,
+        n_results: int = 5,
+        mode: Optional[str] = None,
+        filters: Optional[List[Optional[Dict]]] = None,
+        token_budget: Optional[int] = None
+    ) -> str:
+        """
+        Get relevant context for answering a question.
+
+        Args:
+            question: User's question
+            n_results: Number of documents to retrieve
+            mode: Search mode (see search)
+            filters: Optional metadata pre-filters, strictest first
+            token_budget: Maximum context tokens (None: no trimming)
 
-        # Combine document contents
+        Returns:
+            Combined context string from relevant documents
+        """
+        return self.build_context(question, n_results, mode, filters, token_budget)["context"]
+
+    def _concatenate(self, results: List[Dict]) -> str:
+        """Verbatim context: every result under a [Source i - category] header."""
         context_parts = []
         for i, doc in enumerate(results, 1):
             category = doc['metadata'].get('category', 'general')
@@ -202,6 +465,16 @@ class RAGService:
         Returns:
             Dictionary with collection metadata
         """
+        if self.vector_index is not None:
+            from ..config import settings
+            return {
+                "status": "ready",
+                "count": len(self.vector_index),
+                "name": "numpy",
+                "index_path": settings.vector_index_path,
+                "manifest": self.vector_index.manifest
+            }
+
         if not self.collection:
             return {
                 "status": "not_initialized",
@@ -243,5 +516,5 @@ class RAGService:
         return categories
 
 
-# Global RAG service instance
-rag_service = RAGService()
+# Global RAG service instance (vector store is opened on first use)
+rag_service = LazyService(RAGService, "rag_service")
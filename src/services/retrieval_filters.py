@@ -0,0 +1,142 @@
+"""Structured knowledge base metadata and the retrieval pre-filters built on it."""
+from pathlib import PurePosixPath
+from typing import Dict, Iterable, List, Optional
+import re
+
+
+# Oldest child age the knowledge base covers (pregnancy through age 5)
+MAX_CHILD_AGE_MONTHS = 72
+MAX_PREGNANCY_WEEK = 42
+
+# Classified question type -> knowledge base directory
+CATEGORY_FOR_QUESTION_TYPE = {
+    "vaccine": "vaccines",
+    "symptom": "symptoms",
+    "development": "development",
+    "activity": "activities",
+    "education": "education",
+    "pregnancy": "pregnancy"
+}
+
+# development/18mo_milestones.md, development/2yr_milestones.md
+MILESTONE_PATTERN = re.compile(r"^(\d+)(mo|yr)_")
+# pregnancy/week_20.md
+PREGNANCY_WEEK_PATTERN = re.compile(r"^week_(\d+)")
+
+
+def _windows(points: Dict[str, int], lower: int, upper: int) -> Dict[str, tuple]:
+    """
+    Give each point the range from the previous point to the next one.
+
+    Neighbouring windows overlap, so an age between two milestone files
+    matches both (a 20 month old gets 18mo and 2yr milestones).
+    """
+    ordered = sorted(set(points.values()))
+    windows = {}
+    for source, value in points.items():
+        position = ordered.index(value)
+        start = ordered[position - 1] if position > 0 else lower
+        end = ordered[position + 1] if position + 1 < len(ordered) else upper
+        windows[source] = (start, end)
+    return windows
+
+
+def derive_path_metadata(sources: Iterable[str]) -> Dict[str, Dict]:
+    """
+    Derive category and age/pregnancy-week ranges from knowledge base paths.
+
+    Every chunk gets all four range fields so filters work on stores that
+    cannot test for a missing key (ChromaDB). Pregnancy articles get a
+    child age range of -1..-1 and child articles a pregnancy week range
+    of 0..0, so an age filter never matches prenatal content and a week
+    filter never matches child content.
+
+    Args:
+        sources: Paths relative to knowledge-base/ (e.g. "pregnancy/week_20.md")
+
+    Returns:
+        Dict of source -> {category, age_min_months, age_max_months,
+        pregnancy_week_min, pregnancy_week_max}
+    """
+    sources = list(sources)
+    milestone_ages = {}
+    pregnancy_weeks = {}
+    for source in sources:
+        path = PurePosixPath(source)
+        match = MILESTONE_PATTERN.match(path.name)
+        if match:
+            value = int(match.group(1))
+            milestone_ages[source] = value * 12 if match.group(2) == "yr" else value
+        match = PREGNANCY_WEEK_PATTERN.match(path.name)
+        if match and path.parent.name == "pregnancy":
+            pregnancy_weeks[source] = int(match.group(1))
+
+    age_windows = _windows(milestone_ages, 0, MAX_CHILD_AGE_MONTHS)
+    week_windows = _windows(pregnancy_weeks, 0, MAX_PREGNANCY_WEEK)
+
+    metadata = {}
+    for source in sources:
+        category = PurePosixPath(source).parent.name
+        if category == "pregnancy":
+            age_range = (-1, -1)
+            week_range = week_windows.get(source, (0, MAX_PREGNANCY_WEEK))
+        else:
+            age_range = age_windows.get(source, (0, MAX_CHILD_AGE_MONTHS))
+            week_range = (0, 0)
+
+        metadata[source] = {
+            "category": category,
+            "age_min_months": age_range[0],
+            "age_max_months": age_range[1],
+            "pregnancy_week_min": week_range[0],
+            "pregnancy_week_max": week_range[1]
+        }
+    return metadata
+
+
+def _combine(clauses: List[Dict]) -> Optional[Dict]:
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+def build_retrieval_filters(question_type: Optional[str], child_context: Optional[Dict] = None) -> List[Optional[Dict]]:
+    """
+    Build metadata pre-filters for a question, strictest first.
+
+    The caller tries each filter in turn until one returns enough results;
+    the list always ends with None (no filter).
+
+    Args:
+        question_type: Classified question type (vaccine, symptom, ...)
+        child_context: Active child dict with age_months and/or pregnancy_week
+
+    Returns:
+        List of ChromaDB-style where clauses, ending with None
+    """
+    category = CATEGORY_FOR_QUESTION_TYPE.get(question_type)
+    category_clause = {"category": category} if category else None
+
+    stage_clauses = []
+    age_months = child_context.get("age_months") if child_context else None
+    pregnancy_week = child_context.get("pregnancy_week") if child_context else None
+    if pregnancy_week is not None and category in (None, "pregnancy"):
+        stage_clauses = [
+            {"pregnancy_week_min": {"$lte": pregnancy_week}},
+            {"pregnancy_week_max": {"$gte": pregnancy_week}}
+        ]
+    elif age_months is not None and category != "pregnancy":
+        stage_clauses = [
+            {"age_min_months": {"$lte": age_months}},
+            {"age_max_months": {"$gte": age_months}}
+        ]
+
+    filters = []
+    for clauses in ([category_clause] + stage_clauses, [category_clause], stage_clauses):
+        where = _combine([clause for clause in clauses if clause])
+        if where and where not in filters:
+            filters.append(where)
+    filters.append(None)
+    return filters
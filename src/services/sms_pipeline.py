@@ -0,0 +1,276 @@
+"""Reply pipeline for inbound SMS: intents, classification, RAG answer and send."""
+from typing import Dict
+from ..database import db_run_sync, route_session
+from .sms_service import SMSSendError, sms_service
+from .ai_service import ai_service
+from .conversation_service import conversation_service
+from .intent_service import intent_service
+
+
+class SMSReplyPipeline:
+    """Generates and sends the reply for an inbound SMS that has been persisted."""
+
+    async def process_job(self, job: Dict) -> Dict:
+        """
+        Run the pipeline for a queued job with its own database session
+        (async when ASYNC_DB_ENABLED is on).
+
+        Args:
+            job: Job dict built by the webhook (see process)
+
+        Returns:
+            Pipeline result dict
+        """
+        async with route_session() as db:
+            return await self.process(job, db)
+
+    async def _send(self, to_phone: str, message: str, db, family_id: int = None) -> Dict:
+        """
+        Send an SMS without blocking the event loop on the Twilio request.
+
+        Raises:
+            SMSSendError: Twilio rejected the message, so the reply is not
+                marked as sent and a Twilio retry can answer again
+        """
+        result = await sms_service.send_sms_async(
+            to_phone=to_phone,
+            message=message,
+            db=db,
+            family_id=family_id
+        )
+        if not result.get("success"):
+            raise SMSSendError(f"SMS to {to_phone} failed: {result.get('error')}")
+        return result
+
+    async def process(self, job: Dict, db) -> Dict:
+        """
+        Build and send the reply for an inbound message.
+
+        The outcome is recorded against the message SID so Twilio retries
+        of the same message get the original outcome back. The message is
+        claimed in sms_replies before replying and skipped if the job runs
+        again (queue requeue, Twilio retry or another worker), so a message
+        is answered once. If the reply fails (including Twilio rejecting
+        the SMS) the claim, or the unknown-sender record, is released and a
+        "failed" outcome is recorded, so a Twilio retry runs it again.
+        Conversation turns are only saved after the reply was sent, so a
+        retried message is not stored twice.
+
+        Args:
+            job: Job dict (see _process)
+            db: Session or AsyncSession
+
+        Returns:
+            Dict describing the outcome
+        """
+        message_sid = job.get("message_sid")
+        message_id = job.get("message_id")
+        if message_id and not await db_run_sync(db, sms_service.replies.claim, message_id, job["family_id"]):
+            return {
+                "status": "already_replied",
+                "family_id": job.get("family_id"),
+                "message_id": message_id
+            }
+
+        try:
+            outcome = await self._process(job, db)
+        except Exception as e:
+            if message_id:
+                await db_run_sync(db, sms_service.replies.release, message_id)
+            elif not job.get("family_id") and message_sid:
+                await db_run_sync(db, sms_service.replies.forget_unknown_sender, message_sid)
+            sms_service.record_outcome(message_sid, {
+                "status": "failed",
+                "family_id": job.get("family_id"),
+                "message_id": message_id,
+                "error": str(e)
+            })
+            raise
+
+        if message_id:
+            await db_run_sync(db, sms_service.replies.finish, message_id, outcome["status"])
+        sms_service.record_outcome(message_sid, outcome)
+        return outcome
+
+    async def _process(self, job: Dict, db) -> Dict:
+        """
+        Build and send the reply for an inbound message.
+
+        Args:
+            job: Dict with from_phone, body, family_id (None for unknown
+                senders) and message_id of the persisted inbound message
+            db: Session or AsyncSession
+
+        Returns:
+            Dict describing the outcome (status, family_id, message_id, ...)
+        """
+        from_phone = job["from_phone"]
+        family_id = job.get("family_id")
+        message_id = job.get("message_id")
+
+        if not family_id:
+            # Unknown sender - send help message
+            await self._send(
+                to_phone=from_phone,
+                message="Welcome to Coo! Please sign up at our website to get started.",
+                db=db
+            )
+            return {"status": "unknown_sender", "message": "Help message sent"}
+
+        # Extract user's question
+        question = job["body"].strip()
+
+        # Load the conversation once; every change below is saved in one write
+        conversation = await conversation_service.open_session_async(family_id, from_phone, db)
+
+        # Check for cancel intent first
+        if intent_service.detect_cancel_intent(question):
+            if conversation.get_state():
+                response = "Ok, cancelled. How else can I help you?"
+                await self._send(to_phone=from_phone, message=response, db=db, family_id=family_id)
+                conversation.set_state(None)
+                await conversation.save()
+                return {
+                    "status": "cancelled",
+                    "family_id": family_id,
+                    "message_id": message_id,
+                    "response_sent": True
+                }
+
+        # Add user message to conversation context
+        conversation.add_message("user", question)
+
+        # Check if we're in a multi-turn conversation state
+        current_state = conversation.get_state()
+
+        # Handle multi-turn flows (child registration, etc.)
+        if current_state and current_state.startswith("ADDING_CHILD"):
+            # Continue child registration flow
+            result_intent = await db_run_sync(
+                db,
+                intent_service.handle_add_child_intent,
+                message=question,
+                family_id=family_id,
+                phone=from_phone,
+                current_state=current_state,
+                conversation=conversation.session
+            )
+
+            response = result_intent["response"]
+
+            # Send response, then store the exchange
+            await self._send(to_phone=from_phone, message=response, db=db, family_id=family_id)
+            conversation.add_message("assistant", response)
+            await conversation.save()
+
+            return {
+                "status": "intent_flow",
+                "family_id": family_id,
+                "message_id": message_id,
+                "response_sent": True,
+                "intent_state": result_intent.get("next_state"),
+                "child_created": result_intent.get("child_created", False)
+            }
+
+        # Classify question type
+        question_type = await ai_service.classify_question_type(question)
+
+        # Check if user wants to add a child (start new intent flow)
+        if question_type == "account_management" and any(keyword in question.lower() for keyword in ["add", "register", "new"]):
+            # Start child registration flow
+            result_intent = await db_run_sync(
+                db,
+                intent_service.handle_add_child_intent,
+                message=question,
+                family_id=family_id,
+                phone=from_phone,
+                current_state=None,  # Start new flow
+                conversation=conversation.session
+            )
+
+            response = result_intent["response"]
+
+            # Send response, then store the exchange
+            await self._send(to_phone=from_phone, message=response, db=db, family_id=family_id)
+            conversation.add_message("assistant", response)
+            await conversation.save()
+
+            return {
+                "status": "intent_started",
+                "family_id": family_id,
+                "message_id": message_id,
+                "response_sent": True,
+                "intent_state": result_intent.get("next_state"),
+                "question_type": question_type
+            }
+
+        # Regular conversation flow (not in multi-turn intent)
+        # Try to extract child context from message
+        child_context = await conversation_service.extract_child_from_message_async(
+            message=question,
+            family_id=family_id,
+            db=db
+        )
+
+        # If child identified, set as active child in conversation
+        if child_context:
+            conversation.set_active_child(
+                child_id=child_context["child_id"],
+                child_name=child_context["name"],
+                child_age_months=child_context.get("age_months", 0),
+                pregnancy_week=child_context.get("pregnancy_week")
+            )
+        else:
+            # Try to get previously active child from context
+            child_context = conversation.get_active_child()
+
+        # Get conversation history (last 3 exchanges)
+        conversation_history = await conversation.format_for_ai(last_n=3)
+
+        # Check for emergency keywords first
+        if ai_service.check_emergency_keywords(question):
+            response = "⚠️ EMERGENCY: If this is a medical emergency, CALL 911 immediately or go to the nearest emergency room. For urgent concerns, contact your pediatrician's emergency line."
+            urgency = "EMERGENCY"
+        else:
+            # Generate AI-powered response using RAG context with conversation history
+            response = await ai_service.generate_sms_response(
+                question=question,
+                max_length=300,
+                conversation_history=conversation_history,
+                child_context=child_context,
+                question_type=question_type
+            )
+            urgency = "answered"
+
+        # Send response back to the sender only (not all family members)
+        await self._send(
+            to_phone=from_phone,
+            message=response,
+            db=db,
+            family_id=family_id
+        )
+
+        # Store the exchange once the reply is out
+        conversation.add_message(
+            "assistant",
+            response,
+            metadata={
+                "question_type": question_type,
+                "child_id": child_context.get("child_id") if child_context else None
+            }
+        )
+        await conversation.save()
+
+        return {
+            "status": urgency,
+            "family_id": family_id,
+            "message_id": message_id,
+            "response_sent": True,
+            "ai_powered": True,
+            "question_type": question_type,
+            "child_identified": child_context is not None
+        }
+
+
+# Global SMS reply pipeline instance
+sms_reply_pipeline = SMSReplyPipeline()
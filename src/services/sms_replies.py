@@ -0,0 +1,168 @@
+"""Bookkeeping that keeps each inbound SMS answered exactly once."""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import threading
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.sms_reply import SMSReply, UnknownSenderReply
+
+
+# SMSReply.status while a worker is answering the message
+REPLY_PROCESSING = "processing"
+# Outcome replayed to Twilio retries of a message from an unregistered phone
+UNKNOWN_SENDER_OUTCOME = {"status": "unknown_sender", "message": "Help message sent"}
+
+
+class RecentMessageSids:
+    """Bounded map of recently seen Twilio MessageSids to their webhook outcome."""
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize recent SID map.
+
+        Args:
+            max_entries: Maximum SIDs remembered (oldest are forgotten first)
+        """
+        self.max_entries = max_entries
+        self._outcomes: "OrderedDict[str, Optional[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, sid: str) -> bool:
+        """Return True if this SID was already received by this process."""
+        with self._lock:
+            return sid in self._outcomes
+
+    def add(self, sid: str, outcome: Optional[Dict] = None):
+        """Remember a SID and, once known, the outcome returned for it."""
+        with self._lock:
+            if outcome is not None or sid not in self._outcomes:
+                self._outcomes[sid] = outcome
+            self._outcomes.move_to_end(sid)
+            while len(self._outcomes) > self.max_entries:
+                self._outcomes.popitem(last=False)
+
+    def get_outcome(self, sid: str) -> Optional[Dict]:
+        """Get the recorded outcome for a SID, if any."""
+        with self._lock:
+            return self._outcomes.get(sid)
+
+
+class ReplyLedger:
+    """
+    Durable record of inbound messages that are being or have been answered.
+
+    Registered senders: the reply pipeline claims the message in
+    sms_replies before replying and finishes the claim once the reply is
+    sent, so a requeued job, a Twilio retry or a concurrent worker never
+    sends a second reply. A failed reply releases its claim so a retry
+    can answer; a claim left by a crashed worker is taken over once stale.
+
+    Unknown senders have no stored message, so their SID is recorded in
+    sms_unknown_sender_replies before the welcome is sent and removed
+    again if sending fails.
+    """
+
+    def __init__(self, claim_timeout_seconds: int = 120):
+        """
+        Initialize ledger.
+
+        Args:
+            claim_timeout_seconds: Age after which a "processing" claim is
+                treated as abandoned and can be taken over
+        """
+        self.claim_timeout_seconds = claim_timeout_seconds
+
+    def claim(self, message_id: int, family_id: int, db: Session) -> bool:
+        """
+        Claim the right to answer an inbound message.
+
+        Args:
+            message_id: Inbound Message ID
+            family_id: Family ID
+            db: Database session
+
+        Returns:
+            False if the message was already answered or another worker is
+            answering it; True if the caller should reply
+        """
+        reply = db.get(SMSReply, message_id)
+        if reply is not None:
+            stale_before = datetime.utcnow() - timedelta(seconds=self.claim_timeout_seconds)
+            if reply.status != REPLY_PROCESSING or reply.created_at > stale_before:
+                return False
+            reply.created_at = datetime.utcnow()
+            db.commit()
+            return True
+
+        db.add(SMSReply(message_id=message_id, family_id=family_id, status=REPLY_PROCESSING))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker claimed it first
+            db.rollback()
+            return False
+        return True
+
+    def finish(self, message_id: int, status: str, db: Session):
+        """
+        Mark a claimed message as answered.
+
+        Args:
+            message_id: Inbound Message ID
+            status: Pipeline outcome status
+            db: Database session
+        """
+        reply = db.get(SMSReply, message_id)
+        if reply is not None:
+            reply.status = status
+            db.commit()
+
+    def release(self, message_id: int, db: Session):
+        """
+        Drop the claim after a failed reply so a retry can answer.
+
+        Args:
+            message_id: Inbound Message ID
+            db: Database session
+        """
+        db.rollback()
+        db.query(SMSReply).filter(
+            SMSReply.message_id == message_id,
+            SMSReply.status == REPLY_PROCESSING
+        ).delete()
+        db.commit()
+
+    def record_unknown_sender(self, message_sid: str, phone: str, db: Session) -> bool:
+        """
+        Record that an unregistered phone's message is being welcomed.
+
+        Args:
+            message_sid: Twilio message SID
+            phone: Sender phone number
+            db: Database session
+
+        Returns:
+            False if the SID was already recorded (a retry)
+        """
+        db.add(UnknownSenderReply(message_sid=message_sid, phone=phone))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        return True
+
+    def forget_unknown_sender(self, message_sid: str, db: Session):
+        """
+        Remove an unknown-sender record after the welcome failed to send.
+
+        Args:
+            message_sid: Twilio message SID
+            db: Database session
+        """
+        db.rollback()
+        db.query(UnknownSenderReply).filter(UnknownSenderReply.message_sid == message_sid).delete()
+        db.commit()
@@ -1,11 +1,19 @@
 """Twilio SMS service for sending and receiving messages."""
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
-from typing import List, Optional
+from typing import Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from ..config import settings
+from ..database import db_run_sync
 from ..models.models import Family, FamilyMember, Message, PhoneLookup, MessageDirection, MessageStatus
+from .identity_cache import phone_identity_cache
+from .lazy import LazyService
+from .sms_replies import UNKNOWN_SENDER_OUTCOME, RecentMessageSids, ReplyLedger
 from datetime import datetime
+import asyncio
+
+
+class SMSSendError(RuntimeError):
+    """Twilio did not accept an outgoing SMS."""
 
 
 class SMSService:
@@ -15,8 +23,11 @@ class SMSService:
         """Initialize Twilio client."""
         self.client = None
         if settings.twilio_account_sid and settings.twilio_auth_token:
+            from twilio.rest import Client
             self.client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
         self.from_number = settings.twilio_phone_number
+        self.recent_sids = RecentMessageSids()
+        self.replies = ReplyLedger(claim_timeout_seconds=settings.sms_reply_claim_timeout_seconds)
 
     def send_sms(self, to_phone: str, message: str, db: Session = None, family_id: Optional[int] = None) -> dict:
         """
@@ -49,6 +60,8 @@ class SMSService:
                 "sid": "TEST_SID_" + str(datetime.now().timestamp())
             }
 
+        from twilio.base.exceptions import TwilioRestException
+
         try:
             # Check for Twilio test numbers
             # +15005550006 = valid test number (always succeeds)
@@ -68,17 +81,7 @@ class SMSService:
 
             # Log message if family_id provided
             if family_id:
-                db_message = Message(
-                    family_id=family_id,
-                    from_phone=self.from_number,
-                    to_phone=to_phone,
-                    direction=MessageDirection.OUTBOUND,
-                    content=message,
-                    twilio_sid=twilio_message.sid,
-                    status=MessageStatus.SENT
-                )
-                db.add(db_message)
-                db.commit()
+                self.log_outbound(to_phone, message, twilio_message.sid, family_id, db=db)
 
             return {
                 "success": True,
@@ -94,6 +97,50 @@ class SMSService:
                 "sid": None
             }
 
+    def log_outbound(self, to_phone: str, message: str, sid: str, family_id: int, db: Session):
+        """
+        Store a sent SMS in the message log.
+
+        Args:
+            to_phone: Recipient phone number
+            message: Message content
+            sid: Twilio message SID
+            family_id: Family ID
+            db: Database session
+        """
+        db.add(Message(
+            family_id=family_id,
+            from_phone=self.from_number,
+            to_phone=to_phone,
+            direction=MessageDirection.OUTBOUND,
+            content=message,
+            twilio_sid=sid,
+            status=MessageStatus.SENT
+        ))
+        db.commit()
+
+    async def send_sms_async(self, to_phone: str, message: str, db=None, family_id: Optional[int] = None) -> dict:
+        """
+        Send SMS without blocking the event loop.
+
+        The Twilio request runs in a thread; the message is then logged on
+        the caller's session (Session or AsyncSession), which never leaves
+        the event loop thread.
+
+        Args:
+            to_phone: Recipient phone number
+            message: Message content
+            db: Session or AsyncSession (optional for test mode)
+            family_id: Optional family ID for message logging
+
+        Returns:
+            dict with success status and message info (see send_sms)
+        """
+        result = await asyncio.to_thread(self.send_sms, to_phone=to_phone, message=message)
+        if family_id and self.client and result["success"]:
+            await db_run_sync(db, self.log_outbound, to_phone, message, result["sid"], family_id)
+        return result
+
     def send_to_family(self, family_id: int, message: str, db: Session, send_to_all: bool = True) -> dict:
         """
         Send SMS to family members.
@@ -172,24 +219,46 @@ class SMSService:
             db: Database session
 
         Returns:
-            dict with processing result and family info
+            dict with processing result and family info. Twilio retries of a
+            message already received return {"duplicate": True, ...} without
+            storing it again.
         """
-        # Lookup family by phone
-        lookup = db.query(PhoneLookup).filter(PhoneLookup.phone == from_phone).first()
-
-        if not lookup:
-            # Unknown sender
+        # Twilio retries webhooks on timeout - short-circuit SIDs already received
+        if message_sid and self.recent_sids.seen(message_sid):
+            return self._duplicate(message_sid)
+
+        if message_sid:
+            existing = db.query(Message).filter(Message.twilio_sid == message_sid).first()
+            if existing:
+                self.recent_sids.add(message_sid)
+                return {
+                    "success": True,
+                    "duplicate": True,
+                    "message_sid": message_sid,
+                    "family_id": existing.family_id,
+                    "message_id": existing.id
+                }
+
+        # Lookup family by phone (cached; no queries for known senders)
+        identity = phone_identity_cache.get_identity(from_phone, db)
+
+        if not identity:
+            # Unknown sender - record the SID before the welcome is sent so
+            # retries (on this or another container) don't send it again
+            if message_sid:
+                if not self.replies.record_unknown_sender(message_sid, from_phone, db):
+                    self.recent_sids.add(message_sid, UNKNOWN_SENDER_OUTCOME)
+                    return self._duplicate(message_sid)
+                self.recent_sids.add(message_sid, UNKNOWN_SENDER_OUTCOME)
             return {
                 "success": False,
                 "error": "Phone number not registered",
                 "from_phone": from_phone
             }
 
-        family = db.query(Family).filter(Family.id == lookup.family_id).first()
-
         # Log incoming message
         db_message = Message(
-            family_id=lookup.family_id,
+            family_id=identity["family_id"],
             from_phone=from_phone,
             to_phone=to_phone,
             direction=MessageDirection.INBOUND,
@@ -198,17 +267,84 @@ class SMSService:
             status=MessageStatus.DELIVERED
         )
         db.add(db_message)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent retry inserted the same twilio_sid first
+            db.rollback()
+            self.recent_sids.add(message_sid)
+            return self._duplicate(message_sid)
+
+        if message_sid:
+            self.recent_sids.add(message_sid)
 
         return {
             "success": True,
-            "family_id": lookup.family_id,
-            "family_member_id": lookup.family_member_id,
+            "family_id": identity["family_id"],
+            "family_member_id": identity["family_member_id"],
             "message_id": db_message.id,
             "content": message_body,
-            "family": family
+            "identity": identity
+        }
+
+    async def process_incoming_sms_async(self, from_phone: str, to_phone: str, message_body: str,
+                                         message_sid: str, db) -> dict:
+        """
+        Async version of process_incoming_sms for the webhook.
+
+        Retries already seen by this process are answered from memory;
+        everything else runs process_incoming_sms through db_run_sync, so
+        with an AsyncSession the duplicate check, identity lookup and insert
+        don't block the event loop.
+
+        Args:
+            from_phone: Sender phone number
+            to_phone: Recipient phone number (our Twilio number)
+            message_body: Message content
+            message_sid: Twilio message SID
+            db: Session or AsyncSession
+
+        Returns:
+            dict with processing result and family info (see process_incoming_sms)
+        """
+        if message_sid and self.recent_sids.seen(message_sid):
+            return self._duplicate(message_sid)
+
+        return await db_run_sync(
+            db,
+            self.process_incoming_sms,
+            from_phone=from_phone,
+            to_phone=to_phone,
+            message_body=message_body,
+            message_sid=message_sid
+        )
+
+    def record_outcome(self, message_sid: str, outcome: Dict):
+        """
+        Record the webhook outcome for a message so retries can return it.
+
+        Args:
+            message_sid: Twilio message SID
+            outcome: Dict returned by the webhook for this message
+        """
+        if message_sid:
+            self.recent_sids.add(message_sid, outcome)
+
+    def _duplicate(self, message_sid: str) -> dict:
+        """Result for a SID already received, with the ids from its outcome if known."""
+        outcome = self.recent_sids.get_outcome(message_sid) or {}
+        return {
+            "success": True,
+            "duplicate": True,
+            "message_sid": message_sid,
+            "family_id": outcome.get("family_id"),
+            "message_id": outcome.get("message_id")
         }
 
+    def get_recorded_outcome(self, message_sid: str) -> Optional[Dict]:
+        """Get the outcome recorded for a message SID, if known to this process."""
+        return self.recent_sids.get_outcome(message_sid)
+
     def update_phone_lookup(self, phone: str, family_id: int, family_member_id: Optional[int], db: Session):
         """
         Update phone lookup table for fast lookups.
@@ -236,7 +372,8 @@ class SMSService:
             db.add(lookup)
 
         db.commit()
+        phone_identity_cache.set_phone(phone, family_id, family_member_id)
 
 
-# Global instance
-sms_service = SMSService()
+# Global instance (Twilio client is created on first use)
+sms_service = LazyService(SMSService, "sms_service")
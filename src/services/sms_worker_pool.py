@@ -0,0 +1,329 @@
+"""Background worker pool for SMS replies with per-phone ordering."""
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+from .lazy import LazyService
+
+
+class InProcessJobQueue:
+    """
+    Bounded in-memory job queue that keeps jobs from one phone in order.
+
+    A phone is handed to at most one worker at a time; its next job only
+    becomes claimable after the current one completes. Jobs are lost if the
+    process exits.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        """
+        Initialize in-process queue.
+
+        Args:
+            max_pending: Maximum queued + in-flight jobs before put() refuses
+        """
+        self.max_pending = max_pending
+        self._pending: Dict[str, Deque[Tuple[int, Dict]]] = {}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._size = 0
+        self._next_id = 0
+
+    async def put(self, job: Dict) -> bool:
+        """Enqueue a job; returns False if the queue is full."""
+        if self._size >= self.max_pending:
+            return False
+
+        self._next_id += 1
+        self._size += 1
+        phone = job["from_phone"]
+
+        if phone in self._pending:
+            # Phone already queued or in flight - run after its earlier jobs
+            self._pending[phone].append((self._next_id, job))
+        else:
+            self._pending[phone] = deque([(self._next_id, job)])
+            self._ready.put_nowait(phone)
+        return True
+
+    async def claim(self, timeout: float = 1.0) -> Optional[Tuple[int, Dict]]:
+        """Wait up to timeout for the next job whose phone is idle."""
+        try:
+            phone = await asyncio.wait_for(self._ready.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self._pending[phone][0]
+
+    async def complete(self, job_id: int, job: Dict, success: bool):
+        """Mark the phone's current job done and release its next job."""
+        phone = job["from_phone"]
+        jobs = self._pending[phone]
+        jobs.popleft()
+        self._size -= 1
+
+        if jobs:
+            self._ready.put_nowait(phone)
+        else:
+            del self._pending[phone]
+
+    def size(self) -> int:
+        """Number of queued + in-flight jobs."""
+        return self._size
+
+    def failed_count(self) -> int:
+        """Failed jobs are not kept in memory."""
+        return 0
+
+
+class SQLiteJobQueue:
+    """
+    Durable local job queue shared by several worker processes on one host.
+
+    Stands in for SQS FIFO (message group = phone). A job is only claimable
+    when no earlier job for the same phone is pending or processing, so
+    per-phone order holds across processes. Jobs left in "processing" by a
+    crashed worker are retried after the visibility timeout.
+
+    Like an SQS redrive policy, a job is retried until it has been claimed
+    max_attempts times and is then parked as "failed" (the dead-letter
+    rows), which are logged, counted in the stats and purged after
+    failed_retention_seconds. Retries are safe because the reply pipeline
+    skips messages that were already answered.
+    """
+
+    def __init__(
+        self,
+        path: str = "./sms_queue.db",
+        max_pending: int = 1000,
+        poll_interval: float = 0.2,
+        visibility_timeout: int = 120,
+        max_attempts: int = 3,
+        failed_retention_seconds: int = 7 * 86400
+    ):
+        """
+        Initialize SQLite queue.
+
+        Args:
+            path: SQLite database file
+            max_pending: Maximum pending + processing jobs before put() refuses
+            poll_interval: Seconds between polls when no job is claimable
+            visibility_timeout: Seconds before a stuck job is claimable again
+            max_attempts: Claims before a job is parked as failed
+            failed_retention_seconds: How long failed jobs are kept for inspection
+        """
+        self.path = path
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.failed_retention_seconds = failed_retention_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sms_jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, phone TEXT NOT NULL, "
+            "payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_sms_jobs_phone_status ON sms_jobs (phone, status, id)"
+        )
+
+    def _put_sync(self, job: Dict) -> bool:
+        with self._lock:
+            if self.size() >= self.max_pending:
+                return False
+            self._conn.execute(
+                "INSERT INTO sms_jobs (phone, payload, updated_at) VALUES (?, ?, ?)",
+                (job["from_phone"], json.dumps(job), time.time())
+            )
+            return True
+
+    def _claim_sync(self) -> Optional[Tuple[int, Dict]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Requeue jobs whose worker died mid-flight, unless out of attempts
+                self._conn.execute(
+                    "UPDATE sms_jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                    "updated_at = ? WHERE status = 'processing' AND updated_at < ?",
+                    (self.max_attempts, now, now - self.visibility_timeout)
+                )
+                row = self._conn.execute(
+                    "SELECT id, payload FROM sms_jobs j WHERE j.status = 'pending' "
+                    "AND NOT EXISTS (SELECT 1 FROM sms_jobs e WHERE e.phone = j.phone "
+                    "AND e.id < j.id AND e.status IN ('pending', 'processing')) "
+                    "AND NOT EXISTS (SELECT 1 FROM sms_jobs p WHERE p.phone = j.phone "
+                    "AND p.status = 'processing') "
+                    "ORDER BY j.id LIMIT 1"
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE sms_jobs SET status = 'processing', attempts = attempts + 1, "
+                        "updated_at = ? WHERE id = ?",
+                        (now, row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _complete_sync(self, job_id: int, success: bool) -> Optional[int]:
+        """Finish a job; returns its attempt count if it was parked as failed."""
+        now = time.time()
+        with self._lock:
+            if success:
+                self._conn.execute("DELETE FROM sms_jobs WHERE id = ?", (job_id,))
+                return None
+
+            row = self._conn.execute("SELECT attempts FROM sms_jobs WHERE id = ?", (job_id,)).fetchone()
+            attempts = row[0] if row else self.max_attempts
+            status = "failed" if attempts >= self.max_attempts else "pending"
+            self._conn.execute(
+                "UPDATE sms_jobs SET status = ?, updated_at = ? WHERE id = ?",
+                (status, now, job_id)
+            )
+            self._conn.execute(
+                "DELETE FROM sms_jobs WHERE status = 'failed' AND updated_at < ?",
+                (now - self.failed_retention_seconds,)
+            )
+            return attempts if status == "failed" else None
+
+    async def put(self, job: Dict) -> bool:
+        """Enqueue a job; returns False if the queue is full."""
+        return await asyncio.to_thread(self._put_sync, job)
+
+    async def claim(self, timeout: float = 1.0) -> Optional[Tuple[int, Dict]]:
+        """Poll for up to timeout seconds for the next claimable job."""
+        deadline = time.monotonic() + timeout
+        while True:
+            claimed = await asyncio.to_thread(self._claim_sync)
+            if claimed or time.monotonic() >= deadline:
+                return claimed
+            await asyncio.sleep(self.poll_interval)
+
+    async def complete(self, job_id: int, job: Dict, success: bool):
+        """Remove a finished job; requeue a failed one, or park it once out of attempts."""
+        attempts = await asyncio.to_thread(self._complete_sync, job_id, success)
+        if attempts is not None:
+            print(f"[SMS] Job {job_id} (message {job.get('message_id')}) failed after {attempts} attempts; moved to dead letters")
+
+    def size(self) -> int:
+        """Number of pending + processing jobs."""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM sms_jobs WHERE status IN ('pending', 'processing')"
+        ).fetchone()[0]
+
+    def failed_count(self) -> int:
+        """Number of jobs parked as failed (not yet purged)."""
+        return self._conn.execute("SELECT COUNT(*) FROM sms_jobs WHERE status = 'failed'").fetchone()[0]
+
+
+class SMSWorkerPool:
+    """Runs a bounded number of async workers that drain a job queue."""
+
+    def __init__(self, queue, handler: Callable[[Dict], Awaitable[Dict]], concurrency: int = 8):
+        """
+        Initialize worker pool.
+
+        Args:
+            queue: InProcessJobQueue or SQLiteJobQueue
+            handler: Async function that processes one job
+            concurrency: Number of concurrent workers
+        """
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.stats = {"submitted": 0, "rejected": 0, "processed": 0, "failed": 0}
+        self._workers: List[asyncio.Task] = []
+        self._running = False
+
+    async def start(self):
+        """Start the workers (no-op if already running)."""
+        if self._running:
+            return
+        self._running = True
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        print(f"[SMS] Worker pool started ({self.concurrency} workers, {type(self.queue).__name__})")
+
+    async def stop(self):
+        """Stop the workers after their current job."""
+        self._running = False
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, job: Dict) -> bool:
+        """
+        Queue a job for background processing.
+
+        Args:
+            job: Job dict (must include from_phone)
+
+        Returns:
+            True if queued, False if the queue is full
+        """
+        await self.start()
+        queued = await self.queue.put(job)
+        self.stats["submitted" if queued else "rejected"] += 1
+        return queued
+
+    async def _worker(self):
+        while self._running:
+            claimed = await self.queue.claim()
+            if not claimed:
+                continue
+
+            job_id, job = claimed
+            success = False
+            try:
+                await self.handler(job)
+                success = True
+                self.stats["processed"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"[SMS] Error processing message {job.get('message_id')}: {e}")
+            finally:
+                await self.queue.complete(job_id, job, success)
+
+    def get_stats(self) -> Dict:
+        """Get worker pool counters and current queue depth."""
+        return {
+            **self.stats,
+            "queued": self.queue.size(),
+            "dead_letters": self.queue.failed_count(),
+            "workers": len(self._workers),
+            "backend": type(self.queue).__name__
+        }
+
+
+def _create_sms_worker_pool() -> SMSWorkerPool:
+    """Build the worker pool configured in settings."""
+    from ..config import settings
+    from .sms_pipeline import sms_reply_pipeline
+
+    if settings.sms_queue_backend == "sqlite":
+        queue = SQLiteJobQueue(
+            path=settings.sms_queue_path,
+            max_pending=settings.sms_queue_max_pending,
+            max_attempts=settings.sms_queue_max_attempts,
+            failed_retention_seconds=settings.sms_queue_failed_retention_hours * 3600
+        )
+    else:
+        queue = InProcessJobQueue(max_pending=settings.sms_queue_max_pending)
+
+    return SMSWorkerPool(
+        queue=queue,
+        handler=sms_reply_pipeline.process_job,
+        concurrency=settings.sms_worker_concurrency
+    )
+
+
+# Global SMS worker pool instance (built on first use)
+sms_worker_pool = LazyService(_create_sms_worker_pool, "sms_worker_pool")
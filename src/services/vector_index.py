@@ -0,0 +1,298 @@
+"""In-memory NumPy vector index for the (small) parenting knowledge base."""
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.json"
+MANIFEST_FILE = "manifest.json"
+INDEX_FORMAT_VERSION = 1
+
+
+def _content_hash(vectors: np.ndarray, chunks_bytes: bytes) -> str:
+    """SHA-256 over the embedding matrix and the serialized chunks."""
+    digest = hashlib.sha256()
+    digest.update(str(vectors.dtype).encode())
+    digest.update(str(vectors.shape).encode())
+    digest.update(np.ascontiguousarray(vectors).tobytes())
+    digest.update(chunks_bytes)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: Path, write):
+    """Write via a temp file and rename, so readers never see a partial file."""
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def save_index(
+    directory: str,
+    embeddings,
+    documents: List[str],
+    metadatas: List[Dict],
+    ids: List[str],
+    model: Optional[str] = None,
+    dtype: str = "float32"
+) -> Dict:
+    """
+    Write an index directory readable by NumpyVectorIndex.load.
+
+    The directory holds the normalized embedding matrix (.npy), the chunk
+    texts and metadata (JSON) and a manifest describing both. Files are
+    replaced atomically with the manifest written last, so a process that
+    already has the old matrix memory-mapped keeps a consistent view.
+
+    Args:
+        directory: Output directory (created if missing)
+        embeddings: Array of shape (n_chunks, dims)
+        documents: Chunk texts
+        metadatas: Chunk metadata dicts
+        ids: Chunk IDs
+        model: Name of the embedding model that produced the vectors
+        dtype: Storage dtype, "float32" or "float16" (half the size)
+
+    Returns:
+        The manifest dict
+    """
+    if dtype not in ("float32", "float16"):
+        raise ValueError(f"Unsupported index dtype: {dtype}")
+
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+
+    vectors = np.asarray(embeddings, dtype="float32")
+    if vectors.ndim != 2 or len(vectors) != len(ids):
+        raise ValueError(f"Expected {len(ids)} embeddings, got array of shape {vectors.shape}")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = (vectors / norms).astype(dtype)
+
+    chunks_bytes = json.dumps(
+        {"ids": ids, "documents": documents, "metadatas": metadatas}, ensure_ascii=False
+    ).encode("utf-8")
+
+    manifest = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "model": model,
+        "dimensions": int(vectors.shape[1]),
+        "dtype": dtype,
+        "count": int(vectors.shape[0]),
+        "content_hash": _content_hash(vectors, chunks_bytes),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+
+    _write_atomic(path / EMBEDDINGS_FILE, lambda f: np.save(f, vectors))
+    _write_atomic(path / CHUNKS_FILE, lambda f: f.write(chunks_bytes))
+    _write_atomic(path / MANIFEST_FILE, lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")))
+    return manifest
+
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    """
+    Read an index manifest.
+
+    Args:
+        directory: Index directory
+
+    Returns:
+        Manifest dict, or None for indexes written before manifests existed
+    """
+    path = Path(directory) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class NumpyVectorIndex:
+    """
+    Brute-force cosine search over a matrix of normalized chunk embeddings.
+
+    With a few hundred chunks a single matrix-vector product is faster than
+    any ANN structure, and needs no database process or SQLite file.
+    Metadata filters use the same syntax as ChromaDB `where` clauses and
+    are applied as boolean masks before ranking.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        documents: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        manifest: Optional[Dict] = None
+    ):
+        """
+        Initialize index.
+
+        Args:
+            embeddings: L2-normalized array of shape (n_chunks, dims)
+            documents: Chunk texts
+            metadatas: Chunk metadata dicts
+            ids: Chunk IDs
+            manifest: Manifest the index was loaded with, if any
+        """
+        self.embeddings = embeddings
+        self.documents = documents
+        self.metadatas = metadatas
+        self.ids = ids
+        self.manifest = manifest or {}
+        self._columns: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def load(
+        cls,
+        directory: str,
+        mmap: bool = True,
+        expected_model: Optional[str] = None,
+        verify: bool = False
+    ) -> "NumpyVectorIndex":
+        """
+        Load an index written by save_index.
+
+        The matrix is memory-mapped read-only by default: nothing is
+        deserialized up front, and workers on the same host share the
+        page cache instead of each holding a private copy.
+
+        Args:
+            directory: Index directory
+            mmap: Memory-map the embedding matrix instead of reading it
+            expected_model: Reject the index if it was built with another model
+            verify: Recompute the content hash (reads the whole matrix)
+
+        Returns:
+            NumpyVectorIndex
+
+        Raises:
+            ValueError: If the files do not match the manifest
+        """
+        path = Path(directory)
+        manifest = read_manifest(directory)
+        if manifest and manifest.get("format_version", 0) > INDEX_FORMAT_VERSION:
+            raise ValueError(f"Index format {manifest['format_version']} is newer than supported ({INDEX_FORMAT_VERSION})")
+        if manifest and expected_model and manifest.get("model") not in (None, expected_model):
+            raise ValueError(f"Index was built with {manifest['model']}, expected {expected_model}")
+
+        embeddings = np.load(path / EMBEDDINGS_FILE, mmap_mode="r" if mmap else None)
+        with open(path / CHUNKS_FILE, "rb") as f:
+            chunks_bytes = f.read()
+        chunks = json.loads(chunks_bytes)
+
+        if manifest:
+            expected_shape = (manifest["count"], manifest["dimensions"])
+            if embeddings.shape != expected_shape or str(embeddings.dtype) != manifest["dtype"]:
+                raise ValueError(
+                    f"Index files ({embeddings.shape}, {embeddings.dtype}) do not match manifest "
+                    f"({expected_shape}, {manifest['dtype']})"
+                )
+            if verify and _content_hash(embeddings, chunks_bytes) != manifest["content_hash"]:
+                raise ValueError("Index content hash does not match manifest")
+
+        return cls(embeddings, chunks["documents"], chunks["metadatas"], chunks["ids"], manifest)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _column(self, key: str) -> np.ndarray:
+        """Metadata values for one key as an array (None where missing)."""
+        if key not in self._columns:
+            self._columns[key] = np.array([m.get(key) for m in self.metadatas], dtype=object)
+        return self._columns[key]
+
+    def _compare(self, key: str, op: str, value: Any) -> np.ndarray:
+        column = self._column(key)
+        if op == "$eq":
+            return column == value
+        if op == "$ne":
+            return column != value
+        if op == "$in":
+            return np.isin(column, list(value))
+        if op == "$nin":
+            return ~np.isin(column, list(value))
+
+        present = np.array([v is not None for v in column])
+        numeric = np.where(present, column, 0).astype(float)
+        if op == "$gt":
+            return present & (numeric > value)
+        if op == "$gte":
+            return present & (numeric >= value)
+        if op == "$lt":
+            return present & (numeric < value)
+        if op == "$lte":
+            return present & (numeric <= value)
+        raise ValueError(f"Unsupported filter operator: {op}")
+
+    def build_mask(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        """
+        Turn a ChromaDB-style where clause into a boolean mask.
+
+        Supports {"key": value}, {"key": {"$op": value}} with $eq, $ne,
+        $in, $nin, $gt, $gte, $lt, $lte, and {"$and"/"$or": [...]}.
+
+        Args:
+            where: Filter clause (None for no filter)
+
+        Returns:
+            Boolean array over chunks, or None for no filter
+        """
+        if not where:
+            return None
+
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self.build_mask(clause)
+            elif key == "$or":
+                mask &= np.logical_or.reduce([self.build_mask(clause) for clause in condition])
+            elif isinstance(condition, dict):
+                for op, value in condition.items():
+                    mask &= self._compare(key, op, value)
+            else:
+                mask &= self._compare(key, "$eq", condition)
+        return mask
+
+    def search(self, query_vector, n_results: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        """
+        Find the chunks most similar to a query vector.
+
+        Args:
+            query_vector: L2-normalized query embedding
+            n_results: Number of results to return
+            where: Optional ChromaDB-style metadata filter
+
+        Returns:
+            List of documents with content, metadata, distance (cosine
+            distance, lower is closer) and id, best first
+        """
+        mask = self.build_mask(where)
+        candidates = np.flatnonzero(mask) if mask is not None else None
+        if candidates is not None and len(candidates) == 0:
+            return []
+
+        matrix = self.embeddings if candidates is None else self.embeddings[candidates]
+        # float16 matrices are scored in float32 for accuracy
+        scores = matrix @ np.asarray(query_vector, dtype="float32")
+
+        k = min(n_results, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        documents = []
+        for position in top:
+            index = int(candidates[position]) if candidates is not None else int(position)
+            documents.append({
+                "content": self.documents[index],
+                "metadata": self.metadatas[index],
+                "distance": float(1.0 - scores[position]),
+                "id": self.ids[index]
+            })
+        return documents
@@ -1,8 +1,34 @@
 """Agentic AI workflows for complex multi-step parenting guidance."""
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime, date
-from .ai_service import ai_service
+from .ai_service import ai_service, stream_step
 from .rag_service import rag_service
+from .lazy import LazyService
+import asyncio
+import time
+
+
+class WorkflowStep:
+    """A named unit of workflow work (RAG lookup or LLM call) and its dependencies."""
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[Dict[str, Any]], Awaitable[Any]],
+        depends_on: Optional[List[str]] = None
+    ):
+        """
+        Initialize workflow step.
+
+        Args:
+            name: Step name; LLM steps use the result field they fill so
+                streamed tokens are labelled with it
+            run: Async function receiving {dependency name: output}
+            depends_on: Names of steps that must finish first
+        """
+        self.name = name
+        self.run = run
+        self.depends_on = depends_on or []
 
 
 class WorkflowService:
@@ -18,7 +44,7 @@ class WorkflowService:
             "preschool": self.preschool_readiness_workflow
         }
 
-    def execute_workflow(
+    async def execute_workflow(
         self,
         workflow_name: str,
         context: Dict[str, Any]
@@ -42,10 +68,12 @@ class WorkflowService:
 
         workflow_func = self.workflows[workflow_name]
         try:
-            result = workflow_func(context)
+            start = time.perf_counter()
+            result = await workflow_func(context)
             result["success"] = True
             result["workflow"] = workflow_name
             result["executed_at"] = datetime.now().isoformat()
+            result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
             return result
         except Exception as e:
             return {
@@ -54,7 +82,59 @@ class WorkflowService:
                 "error": str(e)
             }
 
-    def pregnancy_guidance_workflow(self, context: Dict) -> Dict:
+    async def _run_steps(self, steps: List[WorkflowStep]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Run workflow steps concurrently, respecting dependencies.
+
+        Each step starts as soon as the steps it depends on have finished, so
+        wall-clock time is the critical path rather than the sum of all steps.
+
+        Args:
+            steps: Steps in dependency order (dependencies listed first)
+
+        Returns:
+            Tuple of ({step name: output}, {step name: duration in ms})
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        timings: Dict[str, float] = {}
+
+        async def run_step(step: WorkflowStep):
+            deps = {}
+            for dep in step.depends_on:
+                deps[dep] = await tasks[dep]
+
+            # Label tokens streamed by this step (context is task-local)
+            stream_step.set(step.name)
+            start = time.perf_counter()
+            try:
+                return await step.run(deps)
+            finally:
+                timings[step.name] = round((time.perf_counter() - start) * 1000, 1)
+
+        for step in steps:
+            unknown = [dep for dep in step.depends_on if dep not in tasks]
+            if unknown:
+                raise ValueError(f"Step '{step.name}' depends on unknown steps: {unknown}")
+            tasks[step.name] = asyncio.create_task(run_step(step))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        outputs = {name: task.result() for name, task in tasks.items()}
+        return outputs, timings
+
+    async def _retrieve(self, query: str, n_results: int = 5) -> str:
+        """Fetch RAG context on a worker thread so lookups can overlap."""
+        return await asyncio.to_thread(
+            rag_service.get_context_for_question, query, n_results,
+            token_budget=ai_service.context_budgets.get("workflow")
+        )
+
+    async def pregnancy_guidance_workflow(self, context: Dict) -> Dict:
         """
         Multi-step workflow for pregnancy guidance.
 
@@ -87,13 +167,13 @@ class WorkflowService:
             trimester_name = "third"
 
         # Step 2: Get pregnancy knowledge from RAG
-        rag_context = rag_service.get_context_for_question(
-            f"pregnancy {trimester_name} trimester week {weeks}",
-            n_results=5
-        )
+        async def retrieve(deps):
+            return await self._retrieve(f"pregnancy {trimester_name} trimester week {weeks}", n_results=5)
 
         # Step 3: Generate personalized guidance
-        guidance_prompt = f"""Based on the pregnancy information provided, give guidance for a parent at week {weeks} of pregnancy ({trimester_name} trimester).
+        async def generate_guidance(deps):
+            rag_context = deps["rag_context"]
+            guidance_prompt = f"""Based on the pregnancy information provided, give guidance for a parent at week {weeks} of pregnancy ({trimester_name} trimester).
 
 Pregnancy Resources:
 {rag_context if rag_context else "Use general pregnancy knowledge."}
@@ -106,12 +186,18 @@ Provide:
 3. Warning signs to watch for
 4. Next appointment/milestone coming up"""
 
-        guidance = ai_service.answer_question(
-            question=guidance_prompt,
-            context=rag_context,
-            use_case="general",
-            max_tokens=400
-        )
+            return await ai_service.answer_question(
+                question=guidance_prompt,
+                context=rag_context,
+                use_case="general",
+                max_tokens=400
+            )
+
+        outputs, timings = await self._run_steps([
+            WorkflowStep("rag_context", retrieve),
+            WorkflowStep("guidance", generate_guidance, depends_on=["rag_context"])
+        ])
+        guidance = outputs["guidance"]
 
         # Step 4: Identify upcoming milestones
         milestones = []
@@ -140,10 +226,11 @@ Provide:
             "upcoming_milestones": milestones[:2],  # Next 2 milestones
             "action_items": action_items,
             "sources_used": guidance.get("sources", 0),
-            "workflow_steps": 5
+            "workflow_steps": 5,
+            "step_timings_ms": timings
         }
 
-    def vaccine_planning_workflow(self, context: Dict) -> Dict:
+    async def vaccine_planning_workflow(self, context: Dict) -> Dict:
         """
         Multi-step workflow for vaccine planning and education.
 
@@ -193,13 +280,13 @@ Provide:
                     break
 
         # Step 2: Get vaccine knowledge from RAG
-        rag_context = rag_service.get_context_for_question(
-            f"vaccines for {age_months} month old baby",
-            n_results=5
-        )
+        async def retrieve(deps):
+            return await self._retrieve(f"vaccines for {age_months} month old baby", n_results=5)
 
         # Step 3: Generate vaccine plan
-        plan_prompt = f"""Create a vaccine plan for a {age_months}-month-old child.
+        async def generate_plan(deps):
+            rag_context = deps["rag_context"]
+            plan_prompt = f"""Create a vaccine plan for a {age_months}-month-old child.
 
 Vaccines due now: {', '.join(due_now) if due_now else 'None (up to date)'}
 
@@ -214,23 +301,33 @@ Provide:
 3. What to expect (side effects)
 4. Tips for comfort after vaccination"""
 
-        plan = ai_service.answer_question(
-            question=plan_prompt,
-            context=rag_context,
-            use_case="vaccine_info",
-            max_tokens=400
-        )
+            return await ai_service.answer_question(
+                question=plan_prompt,
+                context=rag_context,
+                use_case="vaccine_info",
+                max_tokens=400
+            )
 
-        # Step 4: Address concerns with AI if provided
-        concern_response = None
-        if concerns:
-            concern_response = ai_service.answer_question(
+        # Step 4: Address concerns with AI if provided (runs alongside the plan)
+        async def address_concern(deps):
+            return await ai_service.answer_question(
                 question=f"Parent vaccine concern: {concerns}",
-                context=rag_context,
+                context=deps["rag_context"],
                 use_case="vaccine_info",
                 max_tokens=200
             )
 
+        steps = [
+            WorkflowStep("rag_context", retrieve),
+            WorkflowStep("vaccine_plan", generate_plan, depends_on=["rag_context"])
+        ]
+        if concerns:
+            steps.append(WorkflowStep("concern_addressed", address_concern, depends_on=["rag_context"]))
+
+        outputs, timings = await self._run_steps(steps)
+        plan = outputs["vaccine_plan"]
+        concern_response = outputs.get("concern_addressed")
+
         # Step 5: Create timeline
         timeline = []
         for item in upcoming[:3]:  # Next 3 vaccine visits
@@ -247,10 +344,11 @@ Provide:
             "concern_addressed": concern_response.get("answer") if concern_response else None,
             "upcoming_timeline": timeline,
             "sources_used": plan.get("sources", 0),
-            "workflow_steps": 5
+            "workflow_steps": 5,
+            "step_timings_ms": timings
         }
 
-    def milestone_assessment_workflow(self, context: Dict) -> Dict:
+    async def milestone_assessment_workflow(self, context: Dict) -> Dict:
         """
         Multi-step workflow for developmental milestone assessment.
 
@@ -291,14 +389,17 @@ Provide:
                 expected_milestones = milestones
                 break
 
-        # Step 2: Get developmental knowledge from RAG
-        rag_context = rag_service.get_context_for_question(
-            f"development milestones {age_months} months",
-            n_results=5
-        )
+        # Step 2: Get developmental and activity knowledge from RAG (independent lookups)
+        async def retrieve(deps):
+            return await self._retrieve(f"development milestones {age_months} months", n_results=5)
+
+        async def retrieve_activities(deps):
+            return await self._retrieve(f"activities {age_months} months", n_results=3)
 
         # Step 3: Assess development
-        assessment_prompt = f"""Assess development for a {age_months}-month-old child.
+        async def assess(deps):
+            rag_context = deps["rag_context"]
+            assessment_prompt = f"""Assess development for a {age_months}-month-old child.
 
 Expected milestones at this age: {', '.join(expected_milestones)}
 {"Current abilities: " + abilities if abilities else ""}
@@ -313,27 +414,39 @@ Provide:
 3. Which to focus on next
 4. When to consult pediatrician (red flags)"""
 
-        assessment = ai_service.answer_question(
-            question=assessment_prompt,
-            context=rag_context,
-            use_case="general",
-            max_tokens=400
-        )
+            return await ai_service.answer_question(
+                question=assessment_prompt,
+                context=rag_context,
+                use_case="general",
+                max_tokens=400
+            )
 
-        # Step 4: Generate activities to support development
-        activities_prompt = f"""Suggest 3-5 age-appropriate activities to support development for a {age_months}-month-old.
+        # Step 4: Generate activities to support development (runs alongside the assessment)
+        async def suggest_activities(deps):
+            activities_context = deps["activities_context"]
+            activities_prompt = f"""Suggest 3-5 age-appropriate activities to support development for a {age_months}-month-old.
 
 Focus on: {', '.join(expected_milestones[:3])}
 
 Activities Resources:
-{rag_service.get_context_for_question(f"activities {age_months} months", n_results=3)}
+{activities_context}
 
 List specific, practical activities parents can do at home."""
 
-        activities = ai_service.answer_question(
-            question=activities_prompt,
-            max_tokens=250
-        )
+            return await ai_service.answer_question(
+                question=activities_prompt,
+                context=activities_context,
+                max_tokens=250
+            )
+
+        outputs, timings = await self._run_steps([
+            WorkflowStep("rag_context", retrieve),
+            WorkflowStep("activities_context", retrieve_activities),
+            WorkflowStep("assessment", assess, depends_on=["rag_context"]),
+            WorkflowStep("recommended_activities", suggest_activities, depends_on=["activities_context"])
+        ])
+        assessment = outputs["assessment"]
+        activities = outputs["recommended_activities"]
 
         # Step 5: Flag concerns
         red_flags = []
@@ -352,10 +465,11 @@ List specific, practical activities parents can do at home."""
             "red_flags": red_flags if red_flags else None,
             "follow_up_needed": len(red_flags) > 0,
             "sources_used": assessment.get("sources", 0),
-            "workflow_steps": 5
+            "workflow_steps": 5,
+            "step_timings_ms": timings
         }
 
-    def activity_recommendation_workflow(self, context: Dict) -> Dict:
+    async def activity_recommendation_workflow(self, context: Dict) -> Dict:
         """
         Multi-step workflow for personalized activity recommendations.
 
@@ -389,13 +503,13 @@ List specific, practical activities parents can do at home."""
             categories = ["Learning activities", "Social play", "Creative arts", "Outdoor play"]
 
         # Step 2: Get activity knowledge from RAG
-        rag_context = rag_service.get_context_for_question(
-            f"activities for {age_months} month old {interests} {goals}",
-            n_results=5
-        )
+        async def retrieve(deps):
+            return await self._retrieve(f"activities for {age_months} month old {interests} {goals}", n_results=5)
 
         # Step 3: Generate recommendations
-        rec_prompt = f"""Recommend age-appropriate activities for a {age_months}-month-old child.
+        async def recommend(deps):
+            rag_context = deps["rag_context"]
+            rec_prompt = f"""Recommend age-appropriate activities for a {age_months}-month-old child.
 
 Focus areas: {goals}
 {"Child interests: " + interests if interests else ""}
@@ -410,11 +524,17 @@ Provide:
 3. Developmental benefits of each
 4. How to adapt for different skill levels"""
 
-        recommendations = ai_service.answer_question(
-            question=rec_prompt,
-            context=rag_context,
-            max_tokens=500
-        )
+            return await ai_service.answer_question(
+                question=rec_prompt,
+                context=rag_context,
+                max_tokens=500
+            )
+
+        outputs, timings = await self._run_steps([
+            WorkflowStep("rag_context", retrieve),
+            WorkflowStep("detailed_recommendations", recommend, depends_on=["rag_context"])
+        ])
+        recommendations = outputs["detailed_recommendations"]
 
         # Step 4: Create weekly activity plan
         weekly_plan = {
@@ -444,10 +564,11 @@ Provide:
             "weekly_plan": weekly_plan,
             "safety_tips": safety_tips,
             "sources_used": recommendations.get("sources", 0),
-            "workflow_steps": 5
+            "workflow_steps": 5,
+            "step_timings_ms": timings
         }
 
-    def preschool_readiness_workflow(self, context: Dict) -> Dict:
+    async def preschool_readiness_workflow(self, context: Dict) -> Dict:
         """
         Multi-step workflow for preschool readiness assessment.
 
@@ -497,13 +618,13 @@ Provide:
         }
 
         # Step 2: Get preschool knowledge from RAG
-        rag_context = rag_service.get_context_for_question(
-            f"preschool readiness {age_months} months",
-            n_results=5
-        )
+        async def retrieve(deps):
+            return await self._retrieve(f"preschool readiness {age_months} months", n_results=5)
 
         # Step 3: Evaluate readiness
-        eval_prompt = f"""Assess preschool readiness for a {age_months}-month-old ({age_years:.1f} years).
+        async def evaluate(deps):
+            rag_context = deps["rag_context"]
+            eval_prompt = f"""Assess preschool readiness for a {age_months}-month-old ({age_years:.1f} years).
 
 {"Current skills: " + skills if skills else ""}
 {"Target start: " + target_date if target_date else ""}
@@ -519,12 +640,12 @@ Provide:
 3. Areas to develop before starting
 4. Realistic timeline recommendation"""
 
-        evaluation = ai_service.answer_question(
-            question=eval_prompt,
-            context=rag_context,
-            use_case="general",
-            max_tokens=400
-        )
+            return await ai_service.answer_question(
+                question=eval_prompt,
+                context=rag_context,
+                use_case="general",
+                max_tokens=400
+            )
 
         # Step 4: Generate preparation plan
         prep_plan = {
@@ -545,16 +666,25 @@ Provide:
             ]
         }
 
-        # Step 5: School selection guidance
-        selection_prompt = f"""Provide preschool selection guidance for a {age_years:.1f}-year-old.
+        # Step 5: School selection guidance (independent of the evaluation)
+        async def guide_selection(deps):
+            selection_prompt = f"""Provide preschool selection guidance for a {age_years:.1f}-year-old.
 
 What should parents look for when choosing a preschool?
 Provide 5 key factors to consider."""
 
-        selection_guidance = ai_service.answer_question(
-            question=selection_prompt,
-            max_tokens=250
-        )
+            return await ai_service.answer_question(
+                question=selection_prompt,
+                max_tokens=250
+            )
+
+        outputs, timings = await self._run_steps([
+            WorkflowStep("rag_context", retrieve),
+            WorkflowStep("readiness_evaluation", evaluate, depends_on=["rag_context"]),
+            WorkflowStep("school_selection_guidance", guide_selection)
+        ])
+        evaluation = outputs["readiness_evaluation"]
+        selection_guidance = outputs["school_selection_guidance"]
 
         # Determine if age-appropriate for preschool
         typical_preschool_age = 36  # 3 years
@@ -569,9 +699,10 @@ Provide 5 key factors to consider."""
             "preparation_plan": prep_plan,
             "school_selection_guidance": selection_guidance.get("answer", ""),
             "sources_used": evaluation.get("sources", 0),
-            "workflow_steps": 5
+            "workflow_steps": 5,
+            "step_timings_ms": timings
         }
 
 
-# Global workflow service instance
-workflow_service = WorkflowService()
+# Global workflow service instance (built on first use)
+workflow_service = LazyService(WorkflowService, "workflow_service")
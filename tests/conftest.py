@@ -0,0 +1,6 @@
+"""Shared pytest configuration."""
+import os
+import sys
+
+# Add repository root to path so tests import the src package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
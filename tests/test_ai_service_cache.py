@@ -0,0 +1,75 @@
+"""Tests for how AIService shares cached answers between requests."""
+import asyncio
+
+import pytest
+
+from src.services import ai_service as ai_module
+from src.services.ai_service import AIService, CHILD_NAME_PLACEHOLDER
+from src.services.cache_service import InMemoryCacheBackend, ResponseCache
+
+
+class FakeRAG:
+    def get_context_for_question(self, *args, **kwargs):
+        return "[Source 1 - general]\nSome trusted guidance.\n"
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """AIService with a fake model, fake retrieval and an empty cache."""
+    monkeypatch.setattr(ai_module, "rag_service", FakeRAG())
+    monkeypatch.setattr(ai_module, "response_cache", ResponseCache(backend=InMemoryCacheBackend()))
+    monkeypatch.setattr(ai_module.settings, "response_cache_enabled", True)
+
+    svc = AIService()
+    svc.client = object()
+    svc.calls = []
+    svc.answer = "Offer fluids and rest."
+
+    async def call_model(messages, system_prompt, max_tokens=200):
+        svc.calls.append(messages)
+        return {"text": svc.answer, "model": "fake", "provider": "fake"}
+
+    svc._call_model = call_model
+    return svc
+
+
+def test_answer_question_scopes_cache_by_context(service):
+    question = "What helps a toddler with a cold?"
+    first = asyncio.run(service.answer_question(question, context="[Source 1 - general]\nContext A\n"))
+    other = asyncio.run(service.answer_question(question, context="[Source 1 - general]\nContext B\n"))
+    repeat = asyncio.run(service.answer_question(question, context="[Source 1 - general]\nContext A\n"))
+
+    assert len(service.calls) == 2
+    assert "cached" not in first and "cached" not in other
+    assert repeat["cached"] is True
+
+
+def test_sms_response_scopes_cache_by_history(service):
+    question = "How much milk should she drink?"
+    asyncio.run(service.generate_sms_response(question, conversation_history="User: she is 2"))
+    asyncio.run(service.generate_sms_response(question, conversation_history="User: she is 10 months"))
+    asyncio.run(service.generate_sms_response(question, conversation_history="User: she is 2"))
+
+    assert len(service.calls) == 2
+
+
+def test_sms_response_without_history_is_shared(service):
+    question = "How much milk should a toddler drink?"
+    asyncio.run(service.generate_sms_response(question))
+    asyncio.run(service.generate_sms_response(question))
+
+    assert len(service.calls) == 1
+
+
+def test_child_name_placeholder_replaces_whole_words_only(service):
+    question = "Is it ok to skip a nap today?"
+    service.answer = "Al also needs rest, so keep Al's bedtime early."
+
+    first = asyncio.run(service.generate_sms_response(question, child_context={"name": "Al", "age_months": 20}))
+    cached = ai_module.response_cache.get(question, "sms:general:300", 20)
+    second = asyncio.run(service.generate_sms_response(question, child_context={"name": "Bo", "age_months": 22}))
+
+    assert first == service.answer
+    assert cached == f"{CHILD_NAME_PLACEHOLDER} also needs rest, so keep {CHILD_NAME_PLACEHOLDER}'s bedtime early."
+    assert second == "Bo also needs rest, so keep Bo's bedtime early."
+    assert len(service.calls) == 1
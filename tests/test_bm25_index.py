@@ -0,0 +1,94 @@
+"""Tests for lexical BM25 search and reciprocal-rank fusion."""
+import pytest
+
+from src.services.bm25_index import BM25Index, metadata_matches, reciprocal_rank_fusion, tokenize
+
+
+@pytest.fixture
+def index():
+    return BM25Index.build(
+        ids=["dtap", "mmr", "fever", "sleep"],
+        documents=[
+            "The DTaP vaccine is given at 2, 4 and 6 months.",
+            "MMR protects against measles, mumps and rubella.",
+            "A fever of 100.4 or higher in a newborn needs a doctor.",
+            "Most babies sleep 12 to 16 hours a day.",
+        ],
+        metadatas=[
+            {"category": "vaccine", "age_min": 2},
+            {"category": "vaccine", "age_min": 12},
+            {"category": "symptom", "age_min": 0},
+            {"category": "sleep", "age_min": 0},
+        ],
+    )
+
+
+def test_tokenize_keeps_abbreviations_and_drops_stopwords():
+    assert tokenize("What is the DTaP shot for?") == ["dtap", "shot"]
+
+
+def test_exact_term_ranks_its_chunk_first(index):
+    results = index.search("When is DTaP due?")
+
+    assert [r["id"] for r in results] == ["dtap"]
+    assert results[0]["metadata"]["category"] == "vaccine"
+    assert results[0]["score"] > 0
+
+
+def test_rarer_terms_weigh_more(index):
+    results = index.search("vaccine measles")
+
+    assert results[0]["id"] == "mmr"
+    assert {r["id"] for r in results} == {"dtap", "mmr"}
+
+
+def test_chunks_without_query_terms_are_omitted(index):
+    assert index.search("toddler tantrums") == []
+
+
+def test_search_applies_metadata_filter(index):
+    results = index.search("vaccine measles months", where={"age_min": {"$lt": 6}})
+
+    assert [r["id"] for r in results] == ["dtap"]
+
+
+def test_n_results_limits_output(index):
+    assert len(index.search("vaccine measles fever sleep", n_results=2)) == 2
+
+
+def test_save_and_load_round_trip(index, tmp_path):
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+
+    assert len(loaded) == len(index)
+    assert loaded.search("newborn fever") == index.search("newborn fever")
+    assert BM25Index.load(str(tmp_path / "missing")) is None
+
+
+def test_metadata_matches_operators():
+    metadata = {"category": "vaccine", "age_min": 2}
+
+    assert metadata_matches(metadata, None)
+    assert metadata_matches(metadata, {"category": "vaccine"})
+    assert metadata_matches(metadata, {"category": {"$in": ["vaccine", "symptom"]}})
+    assert not metadata_matches(metadata, {"age_max": {"$gte": 1}})
+    assert metadata_matches(metadata, {"$or": [{"category": "sleep"}, {"age_min": {"$lte": 2}}]})
+    assert not metadata_matches(metadata, {"$and": [{"category": "vaccine"}, {"age_min": {"$gt": 2}}]})
+    with pytest.raises(ValueError):
+        metadata_matches(metadata, {"age_min": {"$near": 2}})
+
+
+def test_rrf_rewards_documents_in_both_lists():
+    vector = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+    lexical = [{"id": "c"}, {"id": "d"}, {"id": "a"}]
+
+    fused = reciprocal_rank_fusion([vector, lexical], n_results=3, k=60)
+
+    assert [doc["id"] for doc in fused] == ["a", "c", "b"]
+    assert fused[0]["rrf_score"] == round(1 / 61 + 1 / 63, 6)
+
+
+def test_rrf_keeps_first_copy_and_skips_missing_ids():
+    fused = reciprocal_rank_fusion([[{"id": "a", "content": "vector"}, {"content": "no id"}], [{"id": "a", "content": "lexical"}]])
+
+    assert fused == [{"id": "a", "content": "vector", "rrf_score": round(2 / 61, 6)}]
@@ -0,0 +1,136 @@
+"""Tests for the response and classification caches."""
+import asyncio
+import threading
+
+import numpy as np
+
+from src.services import cache_service
+from src.services.cache_service import (
+    InMemoryCacheBackend, ResponseCache, SQLiteCacheBackend, age_bucket, content_digest, normalize_text
+)
+
+
+def make_cache(**kwargs) -> ResponseCache:
+    return ResponseCache(backend=InMemoryCacheBackend(max_entries=10), **kwargs)
+
+
+def test_normalize_text_ignores_case_and_punctuation():
+    assert normalize_text("Normal temperature for a baby?") == normalize_text("normal  temperature for a baby")
+
+
+def test_normalize_text_keeps_decimal_points():
+    assert normalize_text("Is a fever of 100.4 ok?") == "is a fever of 100.4 ok"
+    assert normalize_text("fever of 100.4") != normalize_text("fever of 100 4")
+
+
+def test_age_bucket():
+    assert age_bucket(None) == "any"
+    assert age_bucket(2) == "0-3m"
+    assert age_bucket(18) == "13-24m"
+    assert age_bucket(100) == "61m+"
+
+
+def test_response_cache_hit_for_same_question_scope_and_age():
+    cache = make_cache()
+    cache.set("When should my baby start solids?", "general", {"answer": "6 months"}, age_months=5)
+
+    assert cache.get("when should my baby start solids", "general", age_months=4) == {"answer": "6 months"}
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_response_cache_scope_and_age_bucket_are_part_of_the_key():
+    cache = make_cache()
+    cache.set("When should my baby start solids?", "general", "6 months", age_months=5)
+
+    assert cache.get("When should my baby start solids?", "symptom_triage", age_months=5) is None
+    assert cache.get("When should my baby start solids?", "general", age_months=30) is None
+
+
+def test_response_cache_content_digest_separates_scopes():
+    cache = make_cache()
+    question = "Is this rash something to worry about?"
+    cache.set(question, f"general:ctx-{content_digest('context A')}", "answer A")
+
+    assert cache.get(question, f"general:ctx-{content_digest('context B')}") is None
+    assert cache.get(question, f"general:ctx-{content_digest('context A')}") == "answer A"
+
+
+def test_response_cache_skips_short_questions():
+    cache = make_cache()
+    cache.set("yes please", "sms", "ok")
+
+    assert cache.get("yes please", "sms") is None
+    assert cache.get_stats()["skipped"] == 1
+
+
+def test_in_memory_backend_evicts_least_recently_used():
+    backend = InMemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, 60)
+    backend.set("b", 2, 60)
+    backend.get("a")
+    backend.set("c", 3, 60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == 1
+    assert backend.evictions == 1
+
+
+def test_in_memory_backend_expires_entries():
+    backend = InMemoryCacheBackend()
+    backend.set("a", 1, -1)
+
+    assert backend.get("a") is None
+
+
+def test_sqlite_backend_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteCacheBackend(path=path).set("key", {"answer": "yes"}, 60)
+
+    assert SQLiteCacheBackend(path=path).get("key") == {"answer": "yes"}
+
+
+class FakeEmbeddings:
+    """Embeds text as a fixed vector and records the calling thread."""
+
+    def __init__(self):
+        self.threads = []
+
+    def encode(self, texts):
+        self.threads.append(threading.get_ident())
+        return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+
+def test_semantic_lookup_runs_off_the_event_loop(monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(cache_service, "embedding_service", embeddings)
+    cache = make_cache(semantic=True)
+
+    async def run():
+        await cache.set_async("How much should a newborn sleep?", "general", "14-17 hours")
+        return await cache.get_async("How long does a newborn sleep?", "general"), threading.get_ident()
+
+    value, loop_thread = asyncio.run(run())
+
+    assert value == "14-17 hours"
+    assert embeddings.threads and loop_thread not in embeddings.threads
+    assert cache.get_stats()["semantic_hits"] == 1
+
+
+def test_semantic_lookup_requires_the_same_numbers(monkeypatch):
+    monkeypatch.setattr(cache_service, "embedding_service", FakeEmbeddings())
+    cache = make_cache(semantic=True)
+    cache.set("Is a temperature of 100.4 a fever?", "general", "Yes")
+
+    assert cache.get("Is a temperature of 101.4 a fever?", "general") is None
+    assert cache.get("Is a temp of 100.4 a fever?", "general") == "Yes"
+
+
+def test_semantic_lookup_is_off_for_excluded_use_cases(monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(cache_service, "embedding_service", embeddings)
+    cache = make_cache(semantic=True)
+    cache.set("My baby has a rash on her cheeks", "sms:symptom_triage:300", "answer")
+
+    assert cache.get("My baby has a rash on his cheeks", "sms:symptom_triage:300") is None
+    assert cache.get("My baby has a rash on her cheeks", "sms:symptom_triage:300") == "answer"
+    assert embeddings.threads == []
@@ -0,0 +1,74 @@
+"""Tests for memoized question classification."""
+import asyncio
+
+import pytest
+
+from src.services import ai_service as ai_module
+from src.services.ai_service import AIService
+from src.services.cache_service import ClassificationCache
+
+
+def test_cache_keys_on_question_and_age_bucket():
+    cache = ClassificationCache()
+    cache.set("Is it normal to wake at night?", "development", age_months=8)
+
+    assert cache.get("is it normal to wake at night", age_months=9) == "development"
+    assert cache.get("Is it normal to wake at night?", age_months=30) is None
+    assert cache.get("Is it normal to wake at night?") is None
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ClassificationCache(max_entries=2)
+    cache.set("first question", "general")
+    cache.set("second question", "general")
+    cache.get("first question")
+    cache.set("third question", "general")
+
+    assert cache.get("first question") == "general"
+    assert cache.get("second question") is None
+    assert cache.get_stats()["evictions"] == 1
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """AIService whose slow classification tiers are counted."""
+    monkeypatch.setattr(ai_module, "classification_cache", ClassificationCache())
+    monkeypatch.setattr(ai_module.settings, "classification_cache_enabled", True)
+
+    svc = AIService()
+    svc.slow_calls = 0
+    svc.slow_result = ("development", True)
+
+    async def classify_uncertain(question, child_context=None):
+        svc.slow_calls += 1
+        return svc.slow_result
+
+    svc._classify_uncertain = classify_uncertain
+    return svc
+
+
+def test_slow_tier_result_is_reused(service):
+    question = "Why does she line up all her toys?"
+    first = asyncio.run(service.classify_question_type(question, {"age_months": 20}))
+    second = asyncio.run(service.classify_question_type(question, {"age_months": 22}))
+
+    assert first == second == "development"
+    assert service.slow_calls == 1
+
+
+def test_keyword_matches_bypass_cache(service):
+    category = asyncio.run(service.classify_question_type("When is the next vaccine due?"))
+
+    assert category == "vaccine"
+    assert service.slow_calls == 0
+    assert ai_module.classification_cache.get_stats()["stores"] == 0
+
+
+def test_unanswered_classification_is_not_cached(service):
+    service.slow_result = ("general", False)
+    question = "Why does she line up all her toys?"
+    asyncio.run(service.classify_question_type(question))
+    asyncio.run(service.classify_question_type(question))
+
+    assert service.slow_calls == 2
@@ -0,0 +1,97 @@
+"""Tests for token-budgeted context assembly."""
+from src.services.context_builder import ContextBuilder, estimate_tokens, parse_budgets
+
+
+def chunk(source, chunk_id, content, category="symptoms"):
+    return {"content": content, "metadata": {"source": source, "chunk_id": chunk_id, "category": category}}
+
+
+def test_parse_budgets():
+    assert parse_budgets("sms:400, general:1200,bad") == {"sms": 400, "general": 1200}
+
+
+def test_adjacent_chunks_merge_without_repeating_overlap():
+    results = [
+        chunk("fever.md", 1, "Give fluids often. Call the doctor if the fever lasts three days."),
+        chunk("fever.md", 0, "A fever is common. Give fluids often."),
+    ]
+
+    passages = ContextBuilder().merge_chunks(results)
+
+    assert len(passages) == 1
+    assert passages[0]["text"] == "A fever is common. Give fluids often. Call the doctor if the fever lasts three days."
+
+
+def test_merge_keeps_newlines_and_list_markers():
+    results = [
+        chunk("rash.md", 0, "Watch for:\n- a rash that does not fade\n- a stiff neck"),
+        chunk("rash.md", 1, "- a stiff neck\n- unusual sleepiness\n\nCall 911 if breathing is hard."),
+    ]
+
+    text = ContextBuilder().merge_chunks(results)[0]["text"]
+
+    assert text == (
+        "Watch for:\n- a rash that does not fade\n- a stiff neck\n"
+        "- unusual sleepiness\n\nCall 911 if breathing is hard."
+    )
+
+
+def test_non_adjacent_chunks_are_kept_apart():
+    results = [
+        chunk("sleep.md", 0, "Newborns sleep a lot."),
+        chunk("sleep.md", 2, "Toddlers need a routine."),
+        chunk("sleep.md", 2, "Duplicate of chunk two."),
+    ]
+
+    assert ContextBuilder().merge_chunks(results)[0]["text"] == "Newborns sleep a lot.\nToddlers need a routine."
+
+
+def test_sources_keep_order_of_best_result():
+    results = [chunk("b.md", 0, "First source."), chunk("a.md", 0, "Second source."), chunk("b.md", 1, "More b.")]
+
+    passages = ContextBuilder().merge_chunks(results)
+
+    assert [p["source"] for p in passages] == ["b.md", "a.md"]
+    assert [p["rank"] for p in passages] == [0, 1]
+
+
+def test_duplicate_sentences_across_sources_are_dropped():
+    results = [
+        chunk("a.md", 0, "Offer small sips of water. Rest helps."),
+        chunk("b.md", 0, "Offer small sips of water. Watch for dehydration."),
+    ]
+
+    context = ContextBuilder().build("water", results)["context"]
+
+    assert context.count("Offer small sips of water.") == 1
+    assert "Watch for dehydration." in context
+
+
+def test_budget_prefers_sentences_matching_query():
+    results = [chunk("fever.md", 0, "Babies cry for many reasons. A fever above 100.4 needs a call to the doctor. Sleep helps.")]
+
+    built = ContextBuilder().build("When is a fever too high?", results, token_budget=25)
+
+    assert "fever above 100.4" in built["context"]
+    assert "Babies cry" not in built["context"]
+    assert built["tokens"] <= 25
+    assert built["sources"] == 1
+
+
+def test_header_is_charged_against_budget():
+    results = [chunk("a.md", 0, "Alpha sentence here."), chunk("b.md", 0, "Beta sentence here.")]
+    one_source = estimate_tokens("[Source 1 - symptoms]\n") + 1 + estimate_tokens("Alpha sentence here.") + 1
+
+    built = ContextBuilder().build("alpha beta", results, token_budget=one_source)
+
+    assert built["sources"] == 1
+    assert built["context"] == "[Source 1 - symptoms]\nAlpha sentence here.\n"
+
+
+def test_tiny_budget_keeps_start_of_best_sentence():
+    results = [chunk("a.md", 0, "Keep the baby cool and offer fluids every hour.")]
+
+    built = ContextBuilder().build("fluids", results, token_budget=9)
+
+    assert built["context"].startswith("[Source 1 - symptoms]\nKeep the")
+    assert built["saved_tokens"] > 0
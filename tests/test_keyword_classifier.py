@@ -0,0 +1,67 @@
+"""Tests for compiled keyword matching."""
+from src.services.keyword_classifier import KEYWORD_TABLE, KeywordClassifier, keyword_classifier
+
+
+def test_common_inflections_match():
+    assert keyword_classifier.classify("She seems feverish tonight") == "symptom"
+    assert keyword_classifier.classify("Is teething this painful?") == "symptom"
+    assert keyword_classifier.classify("He keeps coughing") == "symptom"
+    assert keyword_classifier.classify("When are the next vaccines due?") == "vaccine"
+    assert keyword_classifier.classify("Are preschoolers ready for reading?") == "education"
+
+
+def test_keywords_only_match_whole_words():
+    # "help" must not hit "hep", "understand" must not hit "stand"
+    assert keyword_classifier.classify("Can you help me?") == "general"
+    assert keyword_classifier.classify("I don't understand") == "general"
+    assert keyword_classifier.classify("She loves her shotgun-style snack bag") == "general"
+
+
+def test_priority_order_picks_first_category():
+    text = "Fever after his vaccine shot at the preschool"
+    assert set(keyword_classifier.categories(text)) >= {"vaccine", "symptom", "education"}
+    assert keyword_classifier.classify(text) == "vaccine"
+    assert keyword_classifier.classify(text, priority=["education", "symptom"]) == "education"
+
+
+def test_default_when_nothing_matches():
+    assert keyword_classifier.classify("What a lovely day") == "general"
+    assert keyword_classifier.classify("What a lovely day", default="other") == "other"
+
+
+def test_emergency_phrases_and_apostrophes():
+    assert keyword_classifier.has_category("My baby can't breathe", "emergency")
+    assert keyword_classifier.has_category("My baby can’t breathe", "emergency")
+    assert keyword_classifier.has_category("He is CHOKING", "emergency")
+    assert not keyword_classifier.has_category("She breathes fine", "emergency")
+
+
+def test_phrase_reports_contained_keyword_categories():
+    matches = keyword_classifier.find_all("severe pain in her ear")
+    assert ("emergency", "severe pain") in {(m.category, m.keyword) for m in matches}
+    assert ("symptom", "severe pain") in {(m.category, m.keyword) for m in matches}
+
+
+def test_cancel_intent():
+    assert keyword_classifier.has_category("cancel", "cancel")
+    assert keyword_classifier.has_category("never mind", "cancel")
+    assert keyword_classifier.has_category("Please STOP", "cancel")
+    assert not keyword_classifier.has_category("Her crying stopped", "cancel")
+
+
+def test_match_positions_index_message():
+    text = "Rash and fever"
+    matches = keyword_classifier.find_all(text)
+    assert [(m.keyword, text.lower()[m.start:m.end]) for m in matches] == [("rash", "rash"), ("fever", "fever")]
+
+
+def test_custom_table_and_suffixes():
+    classifier = KeywordClassifier({"fruit": ["apple"]}, suffixes=["s"])
+    assert classifier.classify("two apples", priority=["fruit"]) == "fruit"
+    assert classifier.classify("applesauce", priority=["fruit"]) == "general"
+
+
+def test_every_table_keyword_matches_itself():
+    for category, keywords in KEYWORD_TABLE.items():
+        for keyword in keywords:
+            assert keyword_classifier.has_category(keyword, category), (category, keyword)
@@ -0,0 +1,71 @@
+"""Tests for lazily constructed service singletons."""
+import threading
+import time
+
+from src.services.lazy import LazyService
+
+
+class Counter:
+    built = 0
+
+    def __init__(self):
+        time.sleep(0.05)
+        Counter.built += 1
+        self.value = 1
+
+    def double(self):
+        return self.value * 2
+
+
+def test_nothing_is_built_until_first_use():
+    Counter.built = 0
+    service = LazyService(Counter, "counter")
+
+    assert not service.is_initialized()
+    assert "not initialized" in repr(service)
+    assert Counter.built == 0
+
+    assert service.double() == 2
+    assert service.is_initialized()
+    assert repr(service) == "<LazyService counter (initialized)>"
+    assert Counter.built == 1
+
+
+def test_attribute_writes_reach_the_instance():
+    service = LazyService(Counter, "counter")
+    service.value = 5
+
+    assert service.double() == 10
+    assert service._get().value == 5
+
+
+def test_concurrent_first_use_builds_once():
+    Counter.built = 0
+    service = LazyService(Counter, "counter")
+    threads = [threading.Thread(target=lambda: service.double()) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Counter.built == 1
+
+
+def test_failed_factory_is_retried():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("no credentials")
+        return Counter()
+
+    service = LazyService(factory, "flaky")
+    try:
+        service.double()
+    except RuntimeError:
+        pass
+
+    assert not service.is_initialized()
+    assert service.double() == 2
+    assert len(attempts) == 2
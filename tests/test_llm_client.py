@@ -0,0 +1,200 @@
+"""Tests for the async model client layer."""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from src.services.ai_service import AIService
+from src.services.llm_client import AsyncBedrockRuntime, create_async_anthropic_client
+
+
+class FakeBody:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def read(self):
+        return json.dumps(self.payload).encode()
+
+
+class FakeBedrockClient:
+    """Blocking boto3-style client: each call holds its thread for `delay` seconds."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def invoke_model(self, modelId, body):
+        time.sleep(self.delay)
+        return {"body": FakeBody({"content": [{"text": f"answer from {modelId}"}], "usage": {"output_tokens": 3}})}
+
+
+def make_runtime(client, workers: int = 4) -> AsyncBedrockRuntime:
+    """AsyncBedrockRuntime around a fake client (no boto3 session)."""
+    runtime = AsyncBedrockRuntime.__new__(AsyncBedrockRuntime)
+    runtime.client = client
+    runtime._executor = ThreadPoolExecutor(max_workers=workers)
+    return runtime
+
+
+def test_anthropic_client_pool_is_bounded():
+    client = create_async_anthropic_client(api_key="test", max_connections=7)
+
+    assert client._client._transport._pool._max_connections == 7
+
+
+def test_bedrock_calls_overlap_without_blocking_the_loop():
+    runtime = make_runtime(FakeBedrockClient(delay=0.2), workers=4)
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def run():
+        tick_task = asyncio.create_task(ticker())
+        started = time.monotonic()
+        results = await asyncio.gather(*[runtime.invoke_model(modelId=f"m{i}", body="{}") for i in range(4)])
+        elapsed = time.monotonic() - started
+        tick_task.cancel()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+
+    assert [r["content"][0]["text"] for r in results] == [f"answer from m{i}" for i in range(4)]
+    # Four 0.2s calls run side by side, and the loop kept ticking meanwhile
+    assert elapsed < 0.6
+    assert len(ticks) > 5
+
+
+def test_call_model_awaits_bedrock_runtime():
+    service = AIService()
+    service.provider = "bedrock"
+    service.bedrock_runtime = make_runtime(FakeBedrockClient())
+
+    result = asyncio.run(service._call_model([{"role": "user", "content": "hi"}], "system"))
+
+    assert result["provider"] == "bedrock"
+    assert result["text"].startswith("answer from")
+    assert result["tokens"] == 3
+
+
+def test_call_model_awaits_anthropic_client():
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(content=[SimpleNamespace(text="hello")], usage=None)
+
+    service = AIService()
+    service.provider = "anthropic"
+    service.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+    result = asyncio.run(service._call_model([{"role": "user", "content": "hi"}], "system", max_tokens=50))
+
+    assert result["text"] == "hello"
+    assert result["provider"] == "anthropic"
+    assert calls[0]["max_tokens"] == 50
+
+
+class FakeEventStream:
+    """Blocking Bedrock event stream of `count` content deltas."""
+
+    def __init__(self, count: int, delay: float = 0.0, fail_after: int = None):
+        self.count = count
+        self.delay = delay
+        self.fail_after = fail_after
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for i in range(self.count):
+            if self.closed:
+                return
+            if self.fail_after is not None and i == self.fail_after:
+                raise RuntimeError("stream broke")
+            time.sleep(self.delay)
+            self.read += 1
+            chunk = {"type": "content_block_delta", "delta": {"text": f"t{i} "}}
+            yield {"chunk": {"bytes": json.dumps(chunk).encode()}}
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStreamingClient:
+    def __init__(self, stream: FakeEventStream):
+        self.stream = stream
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        return {"body": self.stream}
+
+
+def test_bedrock_stream_yields_chunks_in_order():
+    runtime = make_runtime(FakeStreamingClient(FakeEventStream(5)))
+
+    async def run():
+        return [chunk["delta"]["text"] async for chunk in runtime.invoke_model_stream(modelId="m", body="{}")]
+
+    assert asyncio.run(run()) == [f"t{i} " for i in range(5)]
+
+
+def test_bedrock_stream_errors_reach_the_consumer():
+    runtime = make_runtime(FakeStreamingClient(FakeEventStream(5, fail_after=2)))
+
+    async def run():
+        received = []
+        try:
+            async for chunk in runtime.invoke_model_stream(modelId="m", body="{}"):
+                received.append(chunk)
+        except RuntimeError as e:
+            return received, str(e)
+
+    received, error = asyncio.run(run())
+
+    assert len(received) == 2
+    assert error == "stream broke"
+
+
+def test_cancelled_consumer_stops_the_bedrock_reader():
+    stream = FakeEventStream(100, delay=0.01)
+    runtime = make_runtime(FakeStreamingClient(stream))
+
+    async def consume():
+        async for _ in runtime.invoke_model_stream(modelId="m", body="{}"):
+            pass
+
+    async def run():
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        read_at_cancel = stream.read
+        await asyncio.sleep(0.1)
+        return read_at_cancel
+
+    read_at_cancel = asyncio.run(run())
+
+    assert stream.closed
+    assert stream.read <= read_at_cancel + 1
+    assert stream.read < 100
+
+
+def test_stream_events_forwards_tokens_then_result():
+    service = AIService()
+    service.provider = "bedrock"
+    service.bedrock_runtime = make_runtime(FakeStreamingClient(FakeEventStream(3)))
+
+    async def run():
+        return [e async for e in service.stream_events(
+            lambda: service._call_model([{"role": "user", "content": "hi"}], "system")
+        )]
+
+    events = asyncio.run(run())
+
+    assert [e["text"] for e in events if e["type"] == "token"] == ["t0 ", "t1 ", "t2 "]
+    assert events[-1]["type"] == "result"
+    assert events[-1]["data"]["text"] == "t0 t1 t2 "
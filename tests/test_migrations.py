@@ -0,0 +1,109 @@
+"""Tests for versioned schema migrations."""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from src import migrations
+from src.config import settings
+from src.migrations import Migration, SchemaVersionError, check_schema, get_current_version, upgrade
+
+
+def make_table(name):
+    def create(conn):
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY)"))
+    return create
+
+
+@pytest.fixture
+def bind(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'coo.db'}")
+
+
+@pytest.fixture
+def fake_migrations(monkeypatch):
+    """Three small migrations in place of the model-backed ones."""
+    registry = [
+        Migration(1, "first", make_table("first")),
+        Migration(2, "second", make_table("second")),
+        Migration(3, "third", make_table("third")),
+    ]
+    monkeypatch.setattr(migrations, "MIGRATIONS", registry)
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", 3)
+    return registry
+
+
+@pytest.fixture
+def marker_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "markers"
+    monkeypatch.setattr(settings, "schema_marker_dir", str(directory))
+    monkeypatch.setattr(settings, "db_auto_migrate", False)
+    return directory
+
+
+def test_missing_version_table_is_version_zero(bind):
+    assert get_current_version(bind) == 0
+
+
+def test_database_errors_propagate(tmp_path):
+    unreachable = create_engine(f"sqlite:///{tmp_path / 'missing' / 'coo.db'}")
+
+    with pytest.raises(OperationalError):
+        get_current_version(unreachable)
+
+
+def test_upgrade_applies_pending_in_order(bind, fake_migrations):
+    assert upgrade(target=2, bind=bind) == [1, 2]
+    assert get_current_version(bind) == 2
+    assert not inspect(bind).has_table("third")
+
+    assert upgrade(bind=bind) == [3]
+    assert upgrade(bind=bind) == []
+    assert get_current_version(bind) == 3
+
+
+def test_failed_migration_is_not_recorded(bind, fake_migrations):
+    def broken(conn):
+        make_table("half_done")(conn)
+        raise RuntimeError("bad migration")
+
+    fake_migrations[1] = Migration(2, "broken", broken)
+
+    with pytest.raises(RuntimeError):
+        upgrade(bind=bind)
+
+    assert get_current_version(bind) == 1
+
+    # The next run retries it
+    fake_migrations[1] = Migration(2, "fixed", make_table("second"))
+    assert upgrade(bind=bind) == [2, 3]
+
+
+def test_check_schema_rejects_stale_schema(bind, fake_migrations, marker_dir):
+    upgrade(target=1, bind=bind)
+
+    with pytest.raises(SchemaVersionError, match="Schema version 1 < 3"):
+        check_schema(bind)
+    assert not marker_dir.exists()
+
+
+def test_check_schema_auto_migrates_and_writes_marker(bind, fake_migrations, marker_dir, monkeypatch):
+    monkeypatch.setattr(settings, "db_auto_migrate", True)
+
+    assert check_schema(bind)
+    assert get_current_version(bind) == 3
+    assert len(list(marker_dir.iterdir())) == 1
+
+    # Marker short-circuits the query on later cold starts
+    unreachable = create_engine("sqlite:////nonexistent/dir/coo.db")
+    assert check_schema(unreachable)
+
+
+def test_full_upgrade_creates_latest_schema(bind):
+    pytest.importorskip("src.models.models")
+
+    upgrade(bind=bind)
+    tables = set(inspect(bind).get_table_names())
+
+    assert get_current_version(bind) == migrations.SCHEMA_VERSION
+    assert {"conversation_turns", "sms_replies", "sms_unknown_sender_replies", "schema_version"} <= tables
+    assert upgrade(bind=bind) == []
@@ -0,0 +1,88 @@
+"""Tests for knowledge base path metadata and retrieval pre-filters."""
+from src.services.bm25_index import metadata_matches
+from src.services.retrieval_filters import (
+    MAX_CHILD_AGE_MONTHS,
+    MAX_PREGNANCY_WEEK,
+    build_retrieval_filters,
+    derive_path_metadata,
+)
+
+
+SOURCES = [
+    "development/12mo_milestones.md",
+    "development/18mo_milestones.md",
+    "development/2yr_milestones.md",
+    "pregnancy/week_12.md",
+    "pregnancy/week_20.md",
+    "pregnancy/nutrition.md",
+    "vaccines/schedule.md",
+]
+
+
+def test_milestone_files_get_overlapping_age_windows():
+    metadata = derive_path_metadata(SOURCES)
+
+    assert metadata["development/12mo_milestones.md"]["age_min_months"] == 0
+    assert metadata["development/12mo_milestones.md"]["age_max_months"] == 18
+    assert metadata["development/18mo_milestones.md"]["age_min_months"] == 12
+    assert metadata["development/18mo_milestones.md"]["age_max_months"] == 24
+    assert metadata["development/2yr_milestones.md"]["age_max_months"] == MAX_CHILD_AGE_MONTHS
+
+    # A 20 month old matches both neighbouring milestone files
+    matching = [source for source, meta in metadata.items()
+                if meta["age_min_months"] <= 20 <= meta["age_max_months"]]
+    assert "development/18mo_milestones.md" in matching
+    assert "development/2yr_milestones.md" in matching
+    assert "development/12mo_milestones.md" not in matching
+
+
+def test_pregnancy_and_child_content_never_cross():
+    metadata = derive_path_metadata(SOURCES)
+
+    week_20 = metadata["pregnancy/week_20.md"]
+    assert (week_20["age_min_months"], week_20["age_max_months"]) == (-1, -1)
+    assert (week_20["pregnancy_week_min"], week_20["pregnancy_week_max"]) == (12, MAX_PREGNANCY_WEEK)
+    assert metadata["pregnancy/nutrition.md"]["pregnancy_week_max"] == MAX_PREGNANCY_WEEK
+
+    schedule = metadata["vaccines/schedule.md"]
+    assert schedule["category"] == "vaccines"
+    assert (schedule["pregnancy_week_min"], schedule["pregnancy_week_max"]) == (0, 0)
+    assert (schedule["age_min_months"], schedule["age_max_months"]) == (0, MAX_CHILD_AGE_MONTHS)
+
+
+def test_filters_go_from_strictest_to_none():
+    filters = build_retrieval_filters("development", {"age_months": 20})
+
+    assert filters == [
+        {"$and": [
+            {"category": "development"},
+            {"age_min_months": {"$lte": 20}},
+            {"age_max_months": {"$gte": 20}},
+        ]},
+        {"category": "development"},
+        {"$and": [{"age_min_months": {"$lte": 20}}, {"age_max_months": {"$gte": 20}}]},
+        None,
+    ]
+
+
+def test_pregnancy_week_filter_only_for_pregnancy_questions():
+    assert build_retrieval_filters("pregnancy", {"pregnancy_week": 20})[0] == {"$and": [
+        {"category": "pregnancy"},
+        {"pregnancy_week_min": {"$lte": 20}},
+        {"pregnancy_week_max": {"$gte": 20}},
+    ]}
+    # A vaccine question during pregnancy filters on category only
+    assert build_retrieval_filters("vaccine", {"pregnancy_week": 20}) == [{"category": "vaccines"}, None]
+
+
+def test_general_question_without_context_is_unfiltered():
+    assert build_retrieval_filters("general") == [None]
+    assert build_retrieval_filters("account_management", {}) == [None]
+
+
+def test_filters_select_expected_chunks():
+    metadata = derive_path_metadata(SOURCES)
+    strictest = build_retrieval_filters("development", {"age_months": 20})[0]
+
+    selected = sorted(source for source, meta in metadata.items() if metadata_matches(meta, strictest))
+    assert selected == ["development/18mo_milestones.md", "development/2yr_milestones.md"]
@@ -0,0 +1,264 @@
+"""Tests for inbound SMS deduplication, reply claims and outcome replay."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("src.models.models")
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from src.api.routes import sms as sms_routes
+from src.migrations import upgrade
+from src.models.models import Message, MessageDirection, MessageStatus
+from src.services import sms_pipeline as pipeline_module
+from src.services import sms_service as sms_module
+from src.services.sms_replies import RecentMessageSids
+from src.services.sms_service import SMSService
+
+
+KNOWN_PHONE = "+15550000001"
+UNKNOWN_PHONE = "+15559999999"
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'coo.db'}")
+    upgrade(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """Fresh SMSService wired into the webhook and pipeline; sent SMS go to service.sent."""
+    service = SMSService()
+    service.sent = []
+    service.twilio_failures = 0
+
+    async def send_sms_async(to_phone, message, db=None, family_id=None):
+        if service.twilio_failures:
+            service.twilio_failures -= 1
+            return {"success": False, "error": "Twilio unavailable", "sid": None}
+        service.sent.append((to_phone, message))
+        return {"success": True}
+
+    service.send_sms_async = send_sms_async
+    monkeypatch.setattr(pipeline_module, "sms_service", service)
+    monkeypatch.setattr(sms_routes, "sms_service", service)
+    monkeypatch.setattr(sms_routes.settings, "sms_processing_mode", "inline")
+    monkeypatch.setattr(
+        sms_module.phone_identity_cache, "get_identity",
+        lambda phone, db: {"family_id": 1, "family_member_id": None} if phone == KNOWN_PHONE else None
+    )
+    return service
+
+
+@pytest.fixture
+def replies(monkeypatch):
+    """Replace reply generation; set replies.fail to make the next reply raise."""
+    state = {"fail": 0, "calls": 0}
+    pipeline = pipeline_module.sms_reply_pipeline
+
+    async def process(job, db):
+        state["calls"] += 1
+        if state["fail"]:
+            state["fail"] -= 1
+            raise RuntimeError("model unavailable")
+        if not job.get("family_id"):
+            await pipeline._send(job["from_phone"], "Welcome to Coo!", db)
+            return {"status": "unknown_sender", "message": "Help message sent"}
+        await pipeline._send(job["from_phone"], "answer", db, job["family_id"])
+        return {"status": "answered", "family_id": job["family_id"], "message_id": job["message_id"], "response_sent": True}
+
+    monkeypatch.setattr(pipeline, "_process", process)
+    return state
+
+
+def webhook(db, sid: str, phone: str = KNOWN_PHONE) -> dict:
+    return asyncio.run(sms_routes.sms_webhook(From=phone, To="+15550000000", Body="Is a fever of 101 ok?", MessageSid=sid, db=db))
+
+
+def new_container(service):
+    """Forget every SID seen in memory, as on a freshly started container."""
+    service.recent_sids = RecentMessageSids()
+
+
+def test_twilio_retry_replays_the_recorded_outcome(db, service, replies):
+    first = webhook(db, "SM1")
+    retry = webhook(db, "SM1")
+
+    assert first["status"] == "answered"
+    assert retry == first
+    assert len(service.sent) == 1
+    assert db.query(Message).filter(Message.twilio_sid == "SM1").count() == 1
+
+
+def test_failed_reply_is_retried(db, service, replies):
+    replies["fail"] = 1
+    failed = webhook(db, "SM1")
+    retry = webhook(db, "SM1")
+    replay = webhook(db, "SM1")
+
+    assert failed["status"] == "failed"
+    assert retry["status"] == "answered"
+    assert replay == retry
+    assert len(service.sent) == 1
+
+
+def test_retry_on_another_container_is_not_answered_twice(db, service, replies):
+    webhook(db, "SM1")
+    new_container(service)
+    retry = webhook(db, "SM1")
+
+    assert retry["status"] == "already_replied"
+    assert len(service.sent) == 1
+    assert replies["calls"] == 1
+
+
+def test_unknown_sender_is_welcomed_once_across_containers(db, service, replies):
+    first = webhook(db, "SM1", UNKNOWN_PHONE)
+    retry = webhook(db, "SM1", UNKNOWN_PHONE)
+    new_container(service)
+    cold_retry = webhook(db, "SM1", UNKNOWN_PHONE)
+
+    assert first["status"] == retry["status"] == cold_retry["status"] == "unknown_sender"
+    assert service.sent == [(UNKNOWN_PHONE, "Welcome to Coo!")]
+
+
+def test_background_mode_records_queued_outcome(db, service, replies, monkeypatch):
+    jobs = []
+
+    class FakePool:
+        async def submit(self, job):
+            jobs.append(job)
+            return True
+
+    monkeypatch.setattr(sms_routes.settings, "sms_processing_mode", "background")
+    monkeypatch.setattr(sms_routes, "sms_worker_pool", FakePool())
+    queued = webhook(db, "SM1")
+    retry = webhook(db, "SM1")
+
+    assert queued["status"] == "queued"
+    assert retry == queued
+    assert len(jobs) == 1
+    assert service.sent == []
+
+
+def inbound(sid: str) -> Message:
+    return Message(
+        family_id=1, from_phone=KNOWN_PHONE, to_phone="+15550000000",
+        direction=MessageDirection.INBOUND, content="hi",
+        twilio_sid=sid, status=MessageStatus.DELIVERED
+    )
+
+
+def test_twilio_sid_is_unique(db):
+    db.add(inbound("SM1"))
+    db.commit()
+    db.add(inbound("SM1"))
+
+    with pytest.raises(IntegrityError):
+        db.commit()
+
+
+def test_unique_sid_migration_keeps_the_first_copy(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    upgrade(target=4, bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS uq_message_twilio_sid"))
+    session = sessionmaker(bind=engine)()
+    session.add_all([inbound("SM1"), inbound("SM1"), inbound("SM2")])
+    session.commit()
+
+    upgrade(bind=engine)
+
+    rows = session.query(Message.id, Message.twilio_sid).order_by(Message.id).all()
+    assert [sid for _, sid in rows] == ["SM1", None, "SM2"]
+    session.close()
+    engine.dispose()
+
+
+def test_rejected_sms_is_not_marked_as_replied(db, service, replies):
+    service.twilio_failures = 1
+    failed = webhook(db, "SM1")
+    retry = webhook(db, "SM1")
+
+    assert failed["status"] == "failed"
+    assert retry["status"] == "answered"
+    assert len(service.sent) == 1
+
+
+def test_failed_welcome_is_sent_on_retry(db, service, replies):
+    service.twilio_failures = 1
+    failed = webhook(db, "SM1", UNKNOWN_PHONE)
+    new_container(service)
+    retry = webhook(db, "SM1", UNKNOWN_PHONE)
+
+    assert failed["status"] == "failed"
+    assert retry["status"] == "unknown_sender"
+    assert service.sent == [(UNKNOWN_PHONE, "Welcome to Coo!")]
+
+
+class FakeConversation:
+    """Records the turns saved by the pipeline."""
+
+    def __init__(self, saved):
+        self.saved = saved
+        self.pending = []
+
+    def get_state(self):
+        return None
+
+    def set_state(self, state):
+        pass
+
+    def add_message(self, role, content, metadata=None):
+        self.pending.append(role)
+
+    def get_active_child(self):
+        return None
+
+    def set_active_child(self, **kwargs):
+        pass
+
+    async def format_for_ai(self, last_n=3):
+        return ""
+
+    async def save(self):
+        self.saved.extend(self.pending)
+        self.pending = []
+
+
+def test_conversation_is_saved_once_when_a_send_is_retried(db, service, monkeypatch):
+    saved = []
+    conversations = pipeline_module.conversation_service
+    ai = pipeline_module.ai_service
+
+    async def open_session_async(family_id, phone, db):
+        return FakeConversation(saved)
+
+    async def no_child(message, family_id, db):
+        return None
+
+    async def classify(question):
+        return "general"
+
+    async def answer(**kwargs):
+        return "Call your pediatrician if it lasts more than a day."
+
+    monkeypatch.setattr(conversations, "open_session_async", open_session_async)
+    monkeypatch.setattr(conversations, "extract_child_from_message_async", no_child)
+    monkeypatch.setattr(ai, "classify_question_type", classify)
+    monkeypatch.setattr(ai, "generate_sms_response", answer)
+    monkeypatch.setattr(ai, "check_emergency_keywords", lambda text: False)
+
+    service.twilio_failures = 1
+    webhook(db, "SM1")
+    assert saved == []
+
+    webhook(db, "SM1")
+    assert saved == ["user", "assistant"]
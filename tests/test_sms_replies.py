@@ -0,0 +1,78 @@
+"""Tests for the SMS reply ledger and the recent MessageSid map."""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.sms_reply import SMSReply, UnknownSenderReply
+from src.services.sms_replies import REPLY_PROCESSING, RecentMessageSids, ReplyLedger
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'replies.db'}")
+    for model in (SMSReply, UnknownSenderReply):
+        model.__table__.create(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_recent_sids_remember_outcomes():
+    sids = RecentMessageSids()
+    sids.add("SM1")
+    assert sids.seen("SM1")
+    assert sids.get_outcome("SM1") is None
+
+    sids.add("SM1", {"status": "answered"})
+    sids.add("SM1")
+    assert sids.get_outcome("SM1") == {"status": "answered"}
+
+
+def test_recent_sids_are_bounded():
+    sids = RecentMessageSids(max_entries=2)
+    for sid in ("SM1", "SM2", "SM3"):
+        sids.add(sid, {"status": sid})
+
+    assert not sids.seen("SM1")
+    assert sids.get_outcome("SM3") == {"status": "SM3"}
+
+
+def test_claim_is_exclusive_until_released(db):
+    ledger = ReplyLedger()
+
+    assert ledger.claim(1, 10, db) is True
+    assert ledger.claim(1, 10, db) is False
+    assert db.get(SMSReply, 1).status == REPLY_PROCESSING
+
+    ledger.release(1, db)
+    assert db.get(SMSReply, 1) is None
+    assert ledger.claim(1, 10, db) is True
+
+
+def test_finished_reply_is_never_claimed_again(db):
+    ledger = ReplyLedger(claim_timeout_seconds=-1)
+    ledger.claim(1, 10, db)
+    ledger.finish(1, "answered", db)
+
+    assert ledger.claim(1, 10, db) is False
+    # Releasing only drops "processing" claims
+    ledger.release(1, db)
+    assert db.get(SMSReply, 1).status == "answered"
+
+
+def test_stale_claim_is_taken_over(db):
+    ledger = ReplyLedger(claim_timeout_seconds=-1)
+
+    assert ledger.claim(1, 10, db) is True
+    assert ledger.claim(1, 10, db) is True
+
+
+def test_unknown_sender_is_recorded_once_until_forgotten(db):
+    ledger = ReplyLedger()
+
+    assert ledger.record_unknown_sender("SM1", "+15559999999", db) is True
+    assert ledger.record_unknown_sender("SM1", "+15559999999", db) is False
+
+    ledger.forget_unknown_sender("SM1", db)
+    assert ledger.record_unknown_sender("SM1", "+15559999999", db) is True
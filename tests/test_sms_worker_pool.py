@@ -0,0 +1,152 @@
+"""Tests for the background SMS job queues and worker pool."""
+import asyncio
+
+from src.services.sms_worker_pool import InProcessJobQueue, SMSWorkerPool, SQLiteJobQueue
+
+
+def job(phone: str, n: int) -> dict:
+    return {"from_phone": phone, "body": f"message {n}", "message_id": n}
+
+
+def test_in_process_queue_holds_a_phones_next_job_until_complete():
+    async def run():
+        queue = InProcessJobQueue()
+        for j in (job("+1", 1), job("+1", 2), job("+2", 3)):
+            await queue.put(j)
+
+        first = await queue.claim(timeout=0.01)
+        second = await queue.claim(timeout=0.01)
+        blocked = await queue.claim(timeout=0.01)
+        await queue.complete(first[0], first[1], success=True)
+        third = await queue.claim(timeout=0.01)
+        return first, second, blocked, third
+
+    first, second, blocked, third = asyncio.run(run())
+
+    assert first[1]["message_id"] == 1
+    assert second[1]["message_id"] == 3
+    assert blocked is None
+    assert third[1]["message_id"] == 2
+
+
+def test_in_process_queue_refuses_jobs_when_full():
+    async def run():
+        queue = InProcessJobQueue(max_pending=1)
+        return await queue.put(job("+1", 1)), await queue.put(job("+2", 2))
+
+    assert asyncio.run(run()) == (True, False)
+
+
+def test_worker_pool_keeps_per_phone_order():
+    handled = []
+
+    async def handler(j):
+        # Earlier messages take longer, so any reordering would show up
+        await asyncio.sleep(0.01 * (4 - j["message_id"] % 4))
+        handled.append((j["from_phone"], j["message_id"]))
+        return {"status": "ok"}
+
+    async def run():
+        pool = SMSWorkerPool(InProcessJobQueue(), handler, concurrency=4)
+        for n in range(8):
+            await pool.submit(job(f"+{n % 2}", n))
+        while pool.queue.size():
+            await asyncio.sleep(0.01)
+        await pool.stop()
+        return pool.get_stats()
+
+    stats = asyncio.run(run())
+
+    assert stats["processed"] == 8
+    for phone in ("+0", "+1"):
+        ids = [n for p, n in handled if p == phone]
+        assert ids == sorted(ids)
+
+
+def test_worker_pool_counts_failed_jobs():
+    async def handler(j):
+        raise RuntimeError("model unavailable")
+
+    async def run():
+        pool = SMSWorkerPool(InProcessJobQueue(), handler, concurrency=1)
+        await pool.submit(job("+1", 1))
+        while pool.queue.size():
+            await asyncio.sleep(0.01)
+        await pool.stop()
+        return pool.get_stats()
+
+    stats = asyncio.run(run())
+
+    assert stats["failed"] == 1
+    assert stats["queued"] == 0
+
+
+def test_sqlite_queue_orders_jobs_per_phone_across_instances(tmp_path):
+    path = str(tmp_path / "queue.db")
+
+    async def run():
+        producer = SQLiteJobQueue(path=path, poll_interval=0.01)
+        worker_a = SQLiteJobQueue(path=path, poll_interval=0.01)
+        worker_b = SQLiteJobQueue(path=path, poll_interval=0.01)
+        for j in (job("+1", 1), job("+1", 2), job("+2", 3)):
+            await producer.put(j)
+
+        first = await worker_a.claim(timeout=0)
+        second = await worker_b.claim(timeout=0)
+        blocked = await worker_b.claim(timeout=0)
+        await worker_a.complete(first[0], first[1], success=True)
+        third = await worker_b.claim(timeout=0)
+        return first, second, blocked, third
+
+    first, second, blocked, third = asyncio.run(run())
+
+    assert [first[1]["message_id"], second[1]["message_id"], third[1]["message_id"]] == [1, 3, 2]
+    assert blocked is None
+
+
+def test_sqlite_queue_retries_then_parks_failed_jobs(tmp_path):
+    async def run():
+        queue = SQLiteJobQueue(path=str(tmp_path / "queue.db"), max_attempts=2)
+        await queue.put(job("+1", 1))
+        claims = 0
+        while True:
+            claimed = await queue.claim(timeout=0)
+            if not claimed:
+                break
+            claims += 1
+            await queue.complete(claimed[0], claimed[1], success=False)
+        return queue, claims
+
+    queue, claims = asyncio.run(run())
+
+    assert claims == 2
+    assert queue.size() == 0
+    assert queue.failed_count() == 1
+
+
+def test_sqlite_queue_requeues_stuck_jobs_until_out_of_attempts(tmp_path):
+    async def run():
+        queue = SQLiteJobQueue(path=str(tmp_path / "queue.db"), visibility_timeout=-1, max_attempts=2)
+        await queue.put(job("+1", 1))
+        # The worker "crashes" after each claim, so the job is never completed
+        return [await queue.claim(timeout=0) for _ in range(3)], queue
+
+    claims, queue = asyncio.run(run())
+
+    assert [c is not None for c in claims] == [True, True, False]
+    assert queue.failed_count() == 1
+
+
+def test_sqlite_queue_purges_old_failed_jobs(tmp_path):
+    async def run():
+        queue = SQLiteJobQueue(path=str(tmp_path / "queue.db"), max_attempts=1, failed_retention_seconds=0)
+        for n in (1, 2):
+            await queue.put(job(f"+{n}", n))
+            claimed = await queue.claim(timeout=0)
+            await queue.complete(claimed[0], claimed[1], success=False)
+        return queue
+
+    queue = asyncio.run(run())
+
+    # The first parked job is purged when the second one fails
+    assert queue.failed_count() == 1
@@ -0,0 +1,117 @@
+"""Tests for the in-memory NumPy vector index."""
+import numpy as np
+import pytest
+
+from src.services.vector_index import NumpyVectorIndex, read_manifest, save_index
+
+
+def unit(*values):
+    vector = np.array(values, dtype="float32")
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def index():
+    embeddings = np.stack([unit(1, 0, 0), unit(1, 1, 0), unit(0, 1, 0), unit(0, 0, 1)])
+    metadatas = [
+        {"category": "vaccines", "age_min_months": 0},
+        {"category": "vaccines", "age_min_months": 12},
+        {"category": "symptoms", "age_min_months": 0},
+        {"category": "sleep"},
+    ]
+    return NumpyVectorIndex(embeddings, ["a", "b", "c", "d"], metadatas, ["id-a", "id-b", "id-c", "id-d"])
+
+
+def test_search_ranks_by_cosine_similarity(index):
+    results = index.search(unit(1, 0.2, 0), n_results=3)
+
+    assert [r["id"] for r in results] == ["id-a", "id-b", "id-c"]
+    assert results[0]["distance"] < results[1]["distance"] < results[2]["distance"]
+    assert results[0]["content"] == "a"
+
+
+def test_search_returns_all_when_fewer_chunks_than_requested(index):
+    assert len(index.search(unit(0, 0, 1), n_results=10)) == 4
+
+
+def test_filter_applies_before_ranking(index):
+    results = index.search(unit(1, 0, 0), n_results=2, where={"category": "symptoms"})
+
+    assert [r["id"] for r in results] == ["id-c"]
+    assert index.search(unit(1, 0, 0), where={"category": "none"}) == []
+
+
+def test_mask_operators(index):
+    assert index.build_mask(None) is None
+    assert index.build_mask({"category": {"$in": ["vaccines", "sleep"]}}).tolist() == [True, True, False, True]
+    assert index.build_mask({"category": {"$nin": ["vaccines"]}}).tolist() == [False, False, True, True]
+    # Missing keys never satisfy a numeric comparison
+    assert index.build_mask({"age_min_months": {"$lte": 6}}).tolist() == [True, False, True, False]
+    assert index.build_mask({"$or": [{"category": "sleep"}, {"age_min_months": {"$gt": 6}}]}).tolist() == [
+        False, True, False, True
+    ]
+    assert index.build_mask({"$and": [{"category": "vaccines"}, {"age_min_months": {"$gte": 12}}]}).tolist() == [
+        False, True, False, False
+    ]
+    with pytest.raises(ValueError):
+        index.build_mask({"age_min_months": {"$near": 1}})
+
+
+def save_sample(directory, dtype="float32"):
+    return save_index(
+        str(directory),
+        embeddings=[[3.0, 4.0], [0.0, 2.0]],
+        documents=["first", "second"],
+        metadatas=[{"category": "a"}, {"category": "b"}],
+        ids=["1", "2"],
+        model="test-model",
+        dtype=dtype,
+    )
+
+
+def test_saved_index_is_normalized_and_memory_mapped(tmp_path):
+    manifest = save_sample(tmp_path)
+    loaded = NumpyVectorIndex.load(str(tmp_path), expected_model="test-model", verify=True)
+
+    assert manifest["count"] == 2 and manifest["dimensions"] == 2
+    assert read_manifest(str(tmp_path)) == manifest
+    assert isinstance(loaded.embeddings, np.memmap)
+    assert np.allclose(loaded.embeddings[0], [0.6, 0.8])
+    assert loaded.search(unit(0, 1), n_results=1)[0]["id"] == "2"
+
+
+def test_float16_index_loads(tmp_path):
+    save_sample(tmp_path, dtype="float16")
+    loaded = NumpyVectorIndex.load(str(tmp_path), mmap=False)
+
+    assert loaded.embeddings.dtype == np.float16
+    assert loaded.search(unit(1, 0), n_results=1)[0]["id"] == "1"
+
+
+def test_load_rejects_mismatched_index(tmp_path):
+    save_sample(tmp_path)
+
+    with pytest.raises(ValueError, match="built with test-model"):
+        NumpyVectorIndex.load(str(tmp_path), expected_model="other-model")
+
+    np.save(tmp_path / "embeddings.npy", np.zeros((3, 2), dtype="float32"))
+    with pytest.raises(ValueError, match="do not match manifest"):
+        NumpyVectorIndex.load(str(tmp_path))
+
+
+def test_verify_detects_changed_content(tmp_path):
+    save_sample(tmp_path)
+    (tmp_path / "chunks.json").write_text(
+        '{"ids": ["1", "2"], "documents": ["edited", "second"], "metadatas": [{}, {}]}'
+    )
+
+    assert NumpyVectorIndex.load(str(tmp_path)).documents[0] == "edited"
+    with pytest.raises(ValueError, match="content hash"):
+        NumpyVectorIndex.load(str(tmp_path), verify=True)
+
+
+def test_save_rejects_bad_input(tmp_path):
+    with pytest.raises(ValueError):
+        save_index(str(tmp_path), [[1.0, 0.0]], ["a"], [{}], ["1"], dtype="int8")
+    with pytest.raises(ValueError):
+        save_index(str(tmp_path), [[1.0, 0.0]], ["a", "b"], [{}, {}], ["1", "2"])
@@ -0,0 +1,103 @@
+"""Tests for the workflow step scheduler."""
+import asyncio
+import time
+
+import pytest
+
+from src.services.ai_service import stream_step
+from src.services.workflow_service import WorkflowService, WorkflowStep
+
+
+def sleeper(name: str, delay: float, log: list):
+    async def run(deps):
+        log.append(("start", name, stream_step.get()))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return {"name": name, "deps": deps}
+    return run
+
+
+def test_independent_steps_overlap():
+    log = []
+    steps = [
+        WorkflowStep("a", sleeper("a", 0.2, log)),
+        WorkflowStep("b", sleeper("b", 0.2, log)),
+        WorkflowStep("c", sleeper("c", 0.2, log)),
+    ]
+
+    start = time.perf_counter()
+    outputs, timings = asyncio.run(WorkflowService()._run_steps(steps))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.45
+    assert set(outputs) == {"a", "b", "c"}
+    assert set(timings) == {"a", "b", "c"}
+    assert all(ms >= 150 for ms in timings.values())
+
+
+def test_dependent_step_waits_and_receives_outputs():
+    log = []
+    steps = [
+        WorkflowStep("retrieve", sleeper("retrieve", 0.05, log)),
+        WorkflowStep("other", sleeper("other", 0.05, log)),
+        WorkflowStep("answer", sleeper("answer", 0.0, log), depends_on=["retrieve", "other"]),
+    ]
+
+    outputs, _ = asyncio.run(WorkflowService()._run_steps(steps))
+
+    answer_start = log.index(("start", "answer", "answer"))
+    assert log.index(("end", "retrieve")) < answer_start
+    assert log.index(("end", "other")) < answer_start
+    assert outputs["answer"]["deps"] == {"retrieve": outputs["retrieve"], "other": outputs["other"]}
+
+
+def test_each_step_labels_its_own_stream():
+    log = []
+    steps = [WorkflowStep(name, sleeper(name, 0.01, log)) for name in ("summary", "advice")]
+
+    asyncio.run(WorkflowService()._run_steps(steps))
+
+    starts = {entry[1]: entry[2] for entry in log if entry[0] == "start"}
+    assert starts == {"summary": "summary", "advice": "advice"}
+
+
+def test_unknown_dependency_is_rejected():
+    steps = [WorkflowStep("answer", sleeper("answer", 0.0, []), depends_on=["missing"])]
+
+    with pytest.raises(ValueError, match="missing"):
+        asyncio.run(WorkflowService()._run_steps(steps))
+
+
+def test_failure_cancels_remaining_steps():
+    log = []
+
+    async def boom(deps):
+        raise RuntimeError("model unavailable")
+
+    steps = [
+        WorkflowStep("fails", boom),
+        WorkflowStep("slow", sleeper("slow", 1.0, log)),
+        WorkflowStep("after", sleeper("after", 0.0, log), depends_on=["fails"]),
+    ]
+
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        asyncio.run(WorkflowService()._run_steps(steps))
+
+    assert ("end", "slow") not in log
+    assert not any(entry[1] == "after" for entry in log)
+
+
+def test_execute_workflow_reports_failure():
+    service = WorkflowService()
+
+    async def broken(context):
+        raise RuntimeError("no context")
+
+    service.workflows["broken"] = broken
+
+    result = asyncio.run(service.execute_workflow("broken", {}))
+    assert result == {"success": False, "workflow": "broken", "error": "no context"}
+
+    unknown = asyncio.run(service.execute_workflow("nope", {}))
+    assert unknown["success"] is False
+    assert "broken" in unknown["available_workflows"]